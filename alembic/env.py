@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 
 from app.database import Base
-from app.models import User, Project, Task
+from app.models import User, Project, Task, ArchivedTask, Job, IdempotencyKey, TaskReminder, SchedulerLease
 
 config = context.config
 fileConfig(config.config_file_name)
@@ -0,0 +1,43 @@
+"""Create archived tasks table
+
+Revision ID: 3b7d1f9c5e08
+Revises: d81e5b3c7a46
+Create Date: 2026-10-19 17:48:33.209175
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d1f9c5e08'
+down_revision: Union[str, None] = 'd81e5b3c7a46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('archived_tasks',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status', sa.SmallInteger(), nullable=False),
+    sa.Column('priority', sa.SmallInteger(), nullable=False),
+    sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('project_id', sa.String(length=36), nullable=False),
+    sa.Column('assignee_id', sa.String(length=36), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('rank', sa.String(length=64), server_default='', nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_tasks_project_id_created_at', 'archived_tasks', ['project_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_archived_tasks_project_id_created_at', table_name='archived_tasks')
+    op.drop_table('archived_tasks')
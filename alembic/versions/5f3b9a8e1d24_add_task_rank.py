@@ -0,0 +1,65 @@
+"""Add task rank
+
+Revision ID: 5f3b9a8e1d24
+Revises: e2d7f04a6c51
+Create Date: 2026-10-19 14:05:52.771930
+
+"""
+import math
+from itertools import groupby
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3b9a8e1d24'
+down_revision: Union[str, None] = 'e2d7f04a6c51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# A copy of app.services.ranking.spaced_ranks as of this revision, so the
+# migration doesn't change when the app's ranking code does.
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+
+def spaced_ranks(count: int) -> list[str]:
+    width = max(1, math.ceil(math.log(count + 1, BASE)) + 1)
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * step
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append(''.join(reversed(digits)).rstrip('0'))
+    return ranks
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('rank', sa.String(length=64), server_default='', nullable=False))
+
+    # Existing tasks keep their creation order.
+    tasks = sa.table('tasks', sa.column('id'), sa.column('project_id'), sa.column('created_at'), sa.column('rank'))
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(tasks.c.id, tasks.c.project_id).order_by(tasks.c.project_id, tasks.c.created_at, tasks.c.id)
+    ).all()
+    for _, project_rows in groupby(rows, key=lambda row: row.project_id):
+        task_ids = [row.id for row in project_rows]
+        bind.execute(
+            tasks.update().where(tasks.c.id == sa.bindparam('task_id')).values(rank=sa.bindparam('new_rank')),
+            [{'task_id': task_id, 'new_rank': rank} for task_id, rank in zip(task_ids, spaced_ranks(len(task_ids)))],
+        )
+
+    op.create_index('ix_tasks_project_id_rank', 'tasks', ['project_id', 'rank'], unique=False)
+    op.create_index('ix_tasks_project_id_status_rank', 'tasks', ['project_id', 'status', 'rank'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_project_id_status_rank', table_name='tasks')
+    op.drop_index('ix_tasks_project_id_rank', table_name='tasks')
+    op.drop_column('tasks', 'rank')
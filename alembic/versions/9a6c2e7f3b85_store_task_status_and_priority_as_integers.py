@@ -0,0 +1,50 @@
+"""Store task status and priority as integers
+
+Revision ID: 9a6c2e7f3b85
+Revises: 5f3b9a8e1d24
+Create Date: 2026-10-19 15:12:40.085214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6c2e7f3b85'
+down_revision: Union[str, None] = '5f3b9a8e1d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match TASK_STATUS_ORDINALS and TASK_PRIORITY_ORDINALS in app/models/task.py.
+STATUS_ORDINALS = {'TODO': 1, 'IN_PROGRESS': 2, 'DONE': 3}
+PRIORITY_ORDINALS = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3}
+
+
+def _to_ordinal(column: str, ordinals: dict) -> str:
+    cases = ' '.join(f"WHEN '{name}' THEN {ordinal}" for name, ordinal in ordinals.items())
+    return f'CASE {column}::text {cases} END'
+
+
+def _to_name(column: str, ordinals: dict, enum_name: str) -> str:
+    cases = ' '.join(f"WHEN {ordinal} THEN '{name}'" for name, ordinal in ordinals.items())
+    return f'(CASE {column} {cases} END)::{enum_name}'
+
+
+def upgrade() -> None:
+    op.alter_column('tasks', 'status', type_=sa.SmallInteger(), postgresql_using=_to_ordinal('status', STATUS_ORDINALS))
+    op.alter_column('tasks', 'priority', type_=sa.SmallInteger(), postgresql_using=_to_ordinal('priority', PRIORITY_ORDINALS))
+    op.execute('DROP TYPE IF EXISTS taskstatus')
+    op.execute('DROP TYPE IF EXISTS taskpriority')
+    op.create_index('ix_tasks_project_id_priority', 'tasks', ['project_id', 'priority'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_project_id_priority', table_name='tasks')
+    status_enum = sa.Enum(*STATUS_ORDINALS, name='taskstatus')
+    priority_enum = sa.Enum(*PRIORITY_ORDINALS, name='taskpriority')
+    status_enum.create(op.get_bind())
+    priority_enum.create(op.get_bind())
+    op.alter_column('tasks', 'status', type_=status_enum, postgresql_using=_to_name('status', STATUS_ORDINALS, 'taskstatus'))
+    op.alter_column('tasks', 'priority', type_=priority_enum, postgresql_using=_to_name('priority', PRIORITY_ORDINALS, 'taskpriority'))
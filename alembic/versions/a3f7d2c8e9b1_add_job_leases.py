@@ -0,0 +1,28 @@
+"""Add job leases
+
+Revision ID: a3f7d2c8e9b1
+Revises: f6a2c9d4e713
+Create Date: 2026-10-20 10:12:44.108352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f7d2c8e9b1'
+down_revision: Union[str, None] = 'f6a2c9d4e713'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('lease_owner', sa.String(length=100), nullable=True))
+    op.add_column('jobs', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'lease_expires_at')
+    op.drop_column('jobs', 'lease_owner')
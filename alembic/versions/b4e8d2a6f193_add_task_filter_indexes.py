@@ -0,0 +1,29 @@
+"""Add task filter indexes
+
+Revision ID: b4e8d2a6f193
+Revises: 3b7d1f9c5e08
+Create Date: 2026-10-19 19:05:12.431870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8d2a6f193'
+down_revision: Union[str, None] = '3b7d1f9c5e08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_project_id_created_at', 'tasks', ['project_id', 'created_at'], unique=False)
+    op.create_index('ix_tasks_project_id_due_date', 'tasks', ['project_id', 'due_date'], unique=False)
+    op.create_index('ix_tasks_project_id_assignee_id', 'tasks', ['project_id', 'assignee_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_project_id_assignee_id', table_name='tasks')
+    op.drop_index('ix_tasks_project_id_due_date', table_name='tasks')
+    op.drop_index('ix_tasks_project_id_created_at', table_name='tasks')
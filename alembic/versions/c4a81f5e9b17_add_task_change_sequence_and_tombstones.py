@@ -0,0 +1,45 @@
+"""Add task change sequence and tombstones
+
+Revision ID: c4a81f5e9b17
+Revises: 7b1e4c9d2a30
+Create Date: 2026-10-19 11:03:27.550921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a81f5e9b17'
+down_revision: Union[str, None] = '7b1e4c9d2a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('projects', sa.Column('min_change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('tasks', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index('ix_tasks_project_id_change_seq', 'tasks', ['project_id', 'change_seq'], unique=False)
+    op.create_table('task_tombstones',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.String(length=36), nullable=False),
+    sa.Column('task_id', sa.String(length=36), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_tombstones_project_id_change_seq', 'task_tombstones', ['project_id', 'change_seq'], unique=False)
+    op.create_index(op.f('ix_task_tombstones_deleted_at'), 'task_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_task_tombstones_deleted_at'), table_name='task_tombstones')
+    op.drop_index('ix_task_tombstones_project_id_change_seq', table_name='task_tombstones')
+    op.drop_table('task_tombstones')
+    op.drop_index('ix_tasks_project_id_change_seq', table_name='tasks')
+    op.drop_column('tasks', 'change_seq')
+    op.drop_column('projects', 'min_change_seq')
+    op.drop_column('projects', 'change_seq')
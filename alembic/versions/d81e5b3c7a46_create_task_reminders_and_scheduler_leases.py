@@ -0,0 +1,47 @@
+"""Create task reminders and scheduler leases
+
+Revision ID: d81e5b3c7a46
+Revises: 9a6c2e7f3b85
+Create Date: 2026-10-19 16:30:17.644903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81e5b3c7a46'
+down_revision: Union[str, None] = '9a6c2e7f3b85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('task_reminders',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('task_id', sa.String(length=36), nullable=False),
+    sa.Column('project_id', sa.String(length=36), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('due_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('task_id', 'kind', 'due_date', name='uq_task_reminders_task_id_kind_due_date')
+    )
+    op.create_index(op.f('ix_task_reminders_project_id'), 'task_reminders', ['project_id'], unique=False)
+    op.create_table('scheduler_leases',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('holder', sa.String(length=100), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Only open tasks are scanned, so done tasks stay out of the index.
+    op.create_index('ix_tasks_open_due_date', 'tasks', ['due_date', 'id'], unique=False, postgresql_where=sa.text('status != 3'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_open_due_date', table_name='tasks', postgresql_where=sa.text('status != 3'))
+    op.drop_table('scheduler_leases')
+    op.drop_index(op.f('ix_task_reminders_project_id'), table_name='task_reminders')
+    op.drop_table('task_reminders')
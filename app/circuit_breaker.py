@@ -0,0 +1,128 @@
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    # Tracks call outcomes over a sliding window. Once enough calls have been
+    # seen and too many of them failed (or were slow), the breaker opens and
+    # rejects calls for ``open_seconds``. After that a few probe calls are let
+    # through (half-open): a successful probe closes it, a failed one opens it
+    # again. Probes that never report back (their request was cancelled) don't
+    # hold it half-open: after another ``open_seconds`` it opens again. Everything
+    # runs on the event loop, so no locking is needed.
+    def __init__(
+        self,
+        window_seconds: float = 30.0,
+        min_calls: int = 20,
+        failure_rate: float = 0.5,
+        slow_seconds: float = 1.0,
+        slow_rate: float = 0.8,
+        open_seconds: float = 10.0,
+        half_open_probes: int = 3,
+        clock=time.monotonic,
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.half_opened_at = 0.0
+        self.probes = 0
+        self.stats = {"opened": 0, "rejected": 0}
+        self._calls: deque[tuple[float, bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+
+    def _prune(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            _, failed, slow = self._calls.popleft()
+            self._failures -= failed
+            self._slow -= slow
+
+    def _reset_window(self) -> None:
+        self._calls.clear()
+        self._failures = 0
+        self._slow = 0
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.probes = 0
+        self.stats["opened"] += 1
+        self._reset_window()
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - self.clock())
+
+    def allow(self) -> bool:
+        # Whether a call may go ahead. Every allowed call must be followed by
+        # record_success, record_failure or release.
+        now = self.clock()
+        if self.state == HALF_OPEN and now - self.half_opened_at >= self.open_seconds:
+            self._open(now)
+        if self.state == OPEN:
+            if now - self.opened_at < self.open_seconds:
+                self.stats["rejected"] += 1
+                return False
+            self.state = HALF_OPEN
+            self.half_opened_at = now
+            self.probes = 0
+        if self.state == HALF_OPEN:
+            if self.probes >= self.half_open_probes:
+                self.stats["rejected"] += 1
+                return False
+            self.probes += 1
+        return True
+
+    def release(self) -> None:
+        # An allowed call that ended without an outcome, e.g. cancelled; a
+        # probe slot it held is free again.
+        if self.state == HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def record_success(self, duration: float = 0.0) -> None:
+        now = self.clock()
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            self._reset_window()
+            return
+        self._record(now, failed=False, slow=duration >= self.slow_seconds)
+
+    def record_failure(self) -> None:
+        now = self.clock()
+        if self.state == HALF_OPEN:
+            self._open(now)
+            return
+        self._record(now, failed=True, slow=False)
+
+    def _record(self, now: float, failed: bool, slow: bool) -> None:
+        if self.state != CLOSED:
+            return
+        self._prune(now)
+        self._calls.append((now, failed, slow))
+        self._failures += failed
+        self._slow += slow
+        calls = len(self._calls)
+        if calls >= self.min_calls and (
+            self._failures / calls >= self.failure_rate or self._slow / calls >= self.slow_rate
+        ):
+            self._open(now)
+
+    def snapshot(self) -> dict:
+        self._prune(self.clock())
+        return {
+            "state": self.state,
+            "calls": len(self._calls),
+            "failures": self._failures,
+            "slow": self._slow,
+            **self.stats,
+        }
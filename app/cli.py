@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from app.config import get_settings
+from app.profiling import sign_profile_token
+from app.services.archive import archive_done_tasks, partition_statements
+from app.services.changes import compact_tombstones
+from app.services.idempotency import purge_expired_keys
+from app.services.reminders import reminder_scheduler, scan_due_tasks
+from app.services.webhooks import dispatch_webhooks, webhook_dispatcher
+from app.sharding import all_engines, all_sessionmakers, get_shard_router, rebalance
+from app.utils.security import PASSWORD_SCHEMES, calibrate_hashing
+
+
+async def run_compact_tombstones(args: argparse.Namespace) -> None:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=args.days)
+    removed = 0
+    for session_factory in all_sessionmakers():
+        async with session_factory() as session:
+            removed += await compact_tombstones(session, cutoff)
+            await session.commit()
+    print(f"Removed {removed} tombstones older than {args.days} days")
+
+
+async def run_purge_idempotency_keys(args: argparse.Namespace) -> None:
+    removed = 0
+    for session_factory in all_sessionmakers():
+        async with session_factory() as session:
+            removed += await purge_expired_keys(session, datetime.now(timezone.utc))
+            await session.commit()
+    print(f"Removed {removed} expired idempotency keys")
+
+
+async def run_scan_reminders(args: argparse.Namespace) -> None:
+    for session_factory in all_sessionmakers():
+        created = await scan_due_tasks(session_factory, reminder_scheduler.holder)
+        if created is None:
+            print("Another process holds the reminder lease")
+        else:
+            print(f"Created {created} task reminders")
+
+
+async def run_dispatch_webhooks(args: argparse.Namespace) -> None:
+    async with webhook_dispatcher.client() as client:
+        for session_factory in all_sessionmakers():
+            attempted = await dispatch_webhooks(session_factory, client, webhook_dispatcher.holder)
+            if attempted is None:
+                print("Another process holds the webhook lease")
+            else:
+                print(f"Attempted {attempted} webhook deliveries")
+
+
+async def run_archive_tasks(args: argparse.Namespace) -> None:
+    days = args.days if args.days is not None else get_settings().archive_after_days
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    archived = 0
+    for session_factory in all_sessionmakers():
+        archived += await archive_done_tasks(session_factory, cutoff, get_settings().job_batch_size)
+    print(f"Archived {archived} tasks done more than {days} days ago")
+
+
+async def run_partition_tasks(args: argparse.Namespace) -> None:
+    engines = all_engines()
+    years = None
+    if args.by == "created_at":
+        firsts = []
+        for engine in engines:
+            async with engine.connect() as conn:
+                firsts.append((await conn.execute(text("SELECT min(created_at) FROM tasks"))).scalar())
+        this_year = datetime.now(timezone.utc).year
+        first = min((value for value in firsts if value is not None), default=None)
+        years = range(first.year if first else this_year, this_year + 2)
+    statements = partition_statements(args.by, years)
+    if not args.execute:
+        print(";\n".join(statements) + ";")
+        return
+    if any(engine.dialect.name != "postgresql" for engine in engines):
+        raise SystemExit("Partitioning is only supported on PostgreSQL")
+    for engine in engines:
+        async with engine.begin() as conn:
+            for statement in statements:
+                await conn.execute(text(statement))
+    print(f"Partitioned tasks by {args.by}")
+
+
+async def run_rebalance_shards(args: argparse.Namespace) -> None:
+    router = get_shard_router()
+    if router is None:
+        raise SystemExit("DATABASE_SHARDS is not configured")
+    moves = await rebalance(router, execute=args.execute, batch_size=get_settings().job_batch_size)
+    for user_id, source, target in moves:
+        print(f"{user_id}: {source} -> {target}")
+    verb = "Moved" if args.execute else "Would move"
+    print(f"{verb} {len(moves)} users")
+
+
+async def run_profile_token(args: argparse.Namespace) -> None:
+    expires_at = int(time.time()) + args.minutes * 60
+    print(sign_profile_token(expires_at))
+
+
+async def run_calibrate_hashing(args: argparse.Namespace) -> None:
+    target = args.target_ms / 1000
+    rounds, seconds = await asyncio.to_thread(calibrate_hashing, args.scheme, target, args.memory_cost)
+    if seconds > target:
+        print(f"Even the lowest cost takes {seconds * 1000:.0f} ms on this host")
+    print(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    print(f"PASSWORD_HASH_ROUNDS={rounds}")
+    if args.memory_cost is not None and args.scheme == "argon2":
+        print(f"PASSWORD_HASH_MEMORY_COST={args.memory_cost}")
+    print(f"# verification takes {seconds * 1000:.0f} ms (target {args.target_ms:.0f} ms)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Task Manager maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compact = commands.add_parser("compact-tombstones", help="Delete old delta-sync tombstones")
+    compact.add_argument("--days", type=int, default=30, help="Keep tombstones newer than this")
+    compact.set_defaults(handler=run_compact_tombstones)
+
+    purge = commands.add_parser("purge-idempotency-keys", help="Delete expired idempotency keys")
+    purge.set_defaults(handler=run_purge_idempotency_keys)
+
+    reminders = commands.add_parser("scan-reminders", help="Create reminders for tasks coming due")
+    reminders.set_defaults(handler=run_scan_reminders)
+
+    webhooks = commands.add_parser("dispatch-webhooks", help="Deliver pending outbox events to webhooks once")
+    webhooks.set_defaults(handler=run_dispatch_webhooks)
+
+    archive = commands.add_parser("archive-tasks", help="Move old DONE tasks to the archive table")
+    archive.add_argument("--days", type=int, default=None, help="Archive tasks done longer ago than this")
+    archive.set_defaults(handler=run_archive_tasks)
+
+    partition = commands.add_parser("partition-tasks", help="Rebuild tasks as a partitioned table (PostgreSQL)")
+    partition.add_argument("--by", choices=("status", "created_at"), default="status")
+    partition.add_argument("--execute", action="store_true", help="Run the DDL instead of printing it")
+    partition.set_defaults(handler=run_partition_tasks)
+
+    shards = commands.add_parser("rebalance-shards", help="Move users to the shard the hash ring assigns them")
+    shards.add_argument("--execute", action="store_true", help="Move the users instead of listing them")
+    shards.set_defaults(handler=run_rebalance_shards)
+
+    profile = commands.add_parser("profile-token", help="Print an X-Profile header value for request profiling")
+    profile.add_argument("--minutes", type=int, default=15, help="How long the token stays valid")
+    profile.set_defaults(handler=run_profile_token)
+
+    calibrate = commands.add_parser("calibrate-hashing", help="Pick the password hashing cost for a target time")
+    calibrate.add_argument("--scheme", choices=PASSWORD_SCHEMES, default="bcrypt")
+    calibrate.add_argument("--target-ms", type=float, default=250.0, help="Longest acceptable verification time")
+    calibrate.add_argument("--memory-cost", type=int, default=None, help="argon2 memory cost in KiB")
+    calibrate.set_defaults(handler=run_calibrate_hashing)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,111 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+
+    # Password hashing: bcrypt, argon2 (needs argon2-cffi) or pbkdf2_sha256.
+    # Rounds are bcrypt's log2 cost, pbkdf2's iterations or argon2's time cost;
+    # unset uses passlib's default. Memory cost (KiB) applies to argon2 only.
+    password_hash_scheme: str = "bcrypt"
+    password_hash_rounds: int | None = None
+    password_hash_memory_cost: int | None = None
+
+    # Server and connection pool
+    host: str = "0.0.0.0"
+    port: int = 8000
+    web_concurrency: int | None = None
+    graceful_shutdown_seconds: int = 30
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_compiled_cache_size: int = 1200
+    db_prepared_statement_cache_size: int = 500
+    db_pool_timeout: float = 30.0
+    db_echo: bool = False
+
+    # Database circuit breaker and read retries
+    db_breaker_enabled: bool = True
+    db_breaker_window_seconds: float = 30.0
+    db_breaker_min_calls: int = 20
+    db_breaker_failure_rate: float = 0.5
+    db_breaker_slow_ms: float = 1000.0
+    db_breaker_slow_rate: float = 0.8
+    db_breaker_open_seconds: float = 10.0
+    db_breaker_half_open_probes: int = 3
+    db_read_retries: int = 2
+    db_retry_base_ms: float = 50.0
+    # "name=url,..." to spread users over several databases; empty uses DATABASE_URL only
+    database_shards: str = ""
+
+    # Logging
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_queue_size: int = 10000
+    # "logger=rate,..." keeps that fraction of a logger's records below WARNING
+    log_sampling: str = ""
+    access_log_enabled: bool = True
+
+    # Profiling and the slow-query log
+    profile_sample_rate: float = 0.0
+    profile_keep: int = 50
+    profile_dir: str | None = None
+    slow_query_ms: float | None = 200.0
+
+    # Rate limiting and admission control
+    rate_limit_enabled: bool = True
+    rate_limit_auth_per_minute: int = 10
+    rate_limit_write_per_minute: int = 120
+    rate_limit_read_per_minute: int = 1200
+    rate_limit_redis_url: str | None = None
+    max_concurrent_requests: int = 256
+    trust_forwarded_for: bool = False
+
+    # Background jobs
+    job_workers: int = 2
+    job_queue_size: int = 100
+    job_batch_size: int = 1000
+    job_inline_delete_limit: int = 1000
+    job_lease_seconds: int = 60
+
+    # Server-sent events
+    events_buffer_size: int = 500
+    events_queue_size: int = 100
+    events_keepalive_seconds: float = 15.0
+
+    # Batch requests
+    batch_max_requests: int = 20
+
+    # Task ranks: a project is rebalanced once a new rank is longer than this
+    rank_rebalance_length: int = 16
+
+    # Due-date reminders
+    reminders_enabled: bool = True
+    reminder_interval_seconds: float = 60.0
+    reminder_window_hours: int = 24
+    reminder_overdue_lookback_hours: int = 24
+    reminder_batch_size: int = 500
+    reminder_lease_seconds: int = 300
+
+    # Webhooks: outbox dispatcher
+    webhooks_enabled: bool = True
+    webhook_interval_seconds: float = 5.0
+    webhook_claim_size: int = 500
+    webhook_batch_size: int = 50
+    webhook_workers: int = 10
+    webhook_endpoint_concurrency: int = 2
+    webhook_timeout_seconds: float = 10.0
+    webhook_max_attempts: int = 10
+    webhook_retry_base_seconds: float = 5.0
+    webhook_retry_max_seconds: float = 3600.0
+    webhook_lease_seconds: int = 300
+    # Comma-separated hosts exempt from the public-address check (e.g. an internal receiver).
+    webhook_allowed_hosts: str = ""
+
+    # Archival of old DONE tasks
+    archive_after_days: int = 90
+
+    # Idempotency keys
+    idempotency_ttl_hours: int = 24
+    idempotency_cache_size: int = 10000
+
     class Config:
         env_file=".env"
         extra = "ignore"
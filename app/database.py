@@ -1,27 +1,262 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.orm import DeclarativeBase
+import asyncio
+import random
+from functools import lru_cache
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+from sqlalchemy.orm import DeclarativeBase, Session
+from app import metrics
+from app.circuit_breaker import CircuitBreaker
 from app.config import get_settings
 
-settings = get_settings()
 
-engine = create_async_engine(settings.database_url, echo=True)
+def is_transient(exc: BaseException) -> bool:
+    # Connection trouble (dropped or refused connections, pool and network
+    # timeouts) as opposed to errors in the statement itself.
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated or isinstance(exc, (OperationalError, InterfaceError))
+    return isinstance(exc, (PoolTimeoutError, OSError))
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+
+retry_stats = {"retries": 0}
+
+
+def retry_delay(attempt: int) -> float:
+    # Full jitter: anywhere up to the exponential backoff for this attempt.
+    base = get_settings().db_retry_base_ms / 1000
+    return random.uniform(0, base * 2 ** (attempt - 1))
+
+
+class RetryingSession(AsyncSession):
+    # A SELECT that starts a transaction is retried on a transient error: no
+    # earlier statement can be lost with the broken connection, and reading
+    # again has no side effects. Anything later in a transaction is not.
+    _retrying = False
+
+    async def _with_retries(self, statement, call):
+        # scalars() calls execute(); only the outermost call retries.
+        if self._retrying:
+            return await call()
+        retryable = getattr(statement, "is_select", False) and not self.in_transaction()
+        attempt = 0
+        self._retrying = True
+        try:
+            while True:
+                try:
+                    return await call()
+                except Exception as exc:
+                    if not retryable or attempt >= get_settings().db_read_retries or not is_transient(exc):
+                        raise
+                await self.rollback()
+                attempt += 1
+                retry_stats["retries"] += 1
+                await asyncio.sleep(retry_delay(attempt))
+        finally:
+            self._retrying = False
+
+    async def execute(self, statement, *args, **kwargs):
+        execute = super().execute
+        return await self._with_retries(statement, lambda: execute(statement, *args, **kwargs))
+
+    async def scalar(self, statement, *args, **kwargs):
+        scalar = super().scalar
+        return await self._with_retries(statement, lambda: scalar(statement, *args, **kwargs))
+
+    async def scalars(self, statement, *args, **kwargs):
+        scalars = super().scalars
+        return await self._with_retries(statement, lambda: scalars(statement, *args, **kwargs))
+
+
+# The engine (and with it the DB driver import) is created on first use, not at import.
+def create_engine_for_url(url: str) -> AsyncEngine:
+    settings = get_settings()
+    engine_options = {"query_cache_size": settings.db_compiled_cache_size}
+    if not url.startswith("sqlite"):
+        engine_options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_pre_ping=True,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    if url.startswith("postgresql+asyncpg"):
+        # asyncpg prepares every statement server-side and keeps this many per connection.
+        engine_options["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+        }
+    return create_async_engine(url, echo=settings.db_echo, **engine_options)
+
+
+def create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=engine,
+        class_=RetryingSession,
+        expire_on_commit=False,
+    )
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    return create_engine_for_url(get_settings().database_url)
+
+
+@lru_cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return create_sessionmaker(get_engine())
 
 
 class Base(DeclarativeBase):
     pass
 
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
+async def get_db(request: Request):
+    # Read sub-requests of POST /batch run on the batch's own session.
+    shared = getattr(request.state, "batch_db", None)
+    if shared is not None:
+        yield shared
+        return
+    # With sharding configured, the session goes to the shard of the user in
+    # the bearer token (or of the user being registered); other
+    # unauthenticated requests use DATABASE_URL.
+    from app.sharding import sessions_for_shard, shard_for_user
+    from app.utils.security import bearer_subject
+
+    user_id = getattr(request.state, "shard_user_id", None) or bearer_subject(request.headers.get("authorization"))
+    shard = shard_for_user(user_id)
+    session_factory = sessions_for_shard(shard)
+    breaker = breaker_for(shard)
+    if breaker is not None and not breaker.allow():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database unavailable, please retry later",
+            headers={"Retry-After": str(max(1, round(breaker.retry_after())))},
+        )
+    async with session_factory() as session:
         try:
             yield session
             await session.commit()
-        except Exception:
+        except Exception as exc:
+            if breaker is not None:
+                record_outcome(breaker, exc)
             await session.rollback()
-            raise
\ No newline at end of file
+            raise
+        except BaseException:
+            # Cancelled (client went away); says nothing about the database.
+            if breaker is not None:
+                breaker.release()
+            raise
+        else:
+            if breaker is not None:
+                record_outcome(breaker, None)
+
+
+# One breaker per database (each shard trips on its own), keyed by shard
+# name so /metrics never shows a database URL.
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(shard: str | None) -> CircuitBreaker | None:
+    settings = get_settings()
+    if not settings.db_breaker_enabled:
+        return None
+    key = shard or "DATABASE_URL"
+    if key not in _breakers:
+        _breakers[key] = CircuitBreaker(
+            window_seconds=settings.db_breaker_window_seconds,
+            min_calls=settings.db_breaker_min_calls,
+            failure_rate=settings.db_breaker_failure_rate,
+            slow_seconds=settings.db_breaker_slow_ms / 1000,
+            slow_rate=settings.db_breaker_slow_rate,
+            open_seconds=settings.db_breaker_open_seconds,
+            half_open_probes=settings.db_breaker_half_open_probes,
+        )
+    return _breakers[key]
+
+
+def record_outcome(breaker: CircuitBreaker, exc: BaseException | None) -> None:
+    # Errors raised by the endpoint itself (a 404, a validation error) say
+    # nothing about the database and count as successful calls. Latency is
+    # the request's slowest statement.
+    from app.profiling import request_context
+
+    if exc is not None and is_transient(exc):
+        breaker.record_failure()
+        return
+    context = request_context.get()
+    breaker.record_success(context.max_query_seconds if context is not None else 0.0)
+
+
+async def warm_up_engine(connections: int) -> None:
+    # Holding several connections at once makes the pool open them all now,
+    # instead of on the first requests after a deploy.
+    async def ping():
+        async with get_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def dispose_engine() -> None:
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
+        get_engine.cache_clear()
+        get_sessionmaker.cache_clear()
+    from app.sharding import dispose_shards
+
+    await dispose_shards()
+
+
+# Outcome of SQLAlchemy's compiled-statement cache lookup for every execution.
+compiled_cache_stats = {"hit": 0, "miss": 0, "uncached": 0}
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_compiled_cache_lookups(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is None:
+        return
+    if context.cache_hit is CacheStats.CACHE_HIT:
+        compiled_cache_stats["hit"] += 1
+    elif context.cache_hit is CacheStats.CACHE_MISS:
+        compiled_cache_stats["miss"] += 1
+    else:
+        compiled_cache_stats["uncached"] += 1
+
+
+def _compiled_cache_metrics() -> dict:
+    lookups = compiled_cache_stats["hit"] + compiled_cache_stats["miss"]
+    return {
+        **compiled_cache_stats,
+        "hit_rate": round(compiled_cache_stats["hit"] / lookups, 4) if lookups else None,
+    }
+
+
+metrics.register("db_compiled_cache", _compiled_cache_metrics)
+metrics.register("db_circuit_breaker", lambda: {
+    **retry_stats,
+    "breakers": {key: breaker.snapshot() for key, breaker in _breakers.items()},
+})
+
+
+# Callbacks run once the current transaction commits and are dropped on rollback.
+def run_after_commit(session: AsyncSession, callback) -> None:
+    session.sync_session.info.setdefault("after_commit", []).append(callback)
+
+
+def run_after_rollback(session: AsyncSession, callback) -> None:
+    session.sync_session.info.setdefault("after_rollback", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+    session.info.pop("after_rollback", None)
+    for callback in session.info.pop("after_commit", ()):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _run_after_rollback_callbacks(session: Session) -> None:
+    session.info.pop("after_commit", None)
+    for callback in session.info.pop("after_rollback", ()):
+        callback()
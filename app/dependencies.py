@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
@@ -10,9 +10,15 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
 ) -> User:
+    # Sub-requests of POST /batch reuse the user the batch already authenticated.
+    batch_user = getattr(request.state, "batch_user", None)
+    if batch_user is not None:
+        return batch_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -42,4 +48,26 @@ async def get_current_active_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user",
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def field_selector(allowed: tuple[str, ...], default: tuple[str, ...]):
+    # Dependency for a ``fields=a,b,c`` query parameter. The id is always returned.
+    def select_fields(
+        fields: str | None = Query(
+            default=None,
+            description=f"Comma-separated fields to return. Default: {','.join(default)}",
+        ),
+    ) -> tuple[str, ...]:
+        if fields is None:
+            return default
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+            )
+        return tuple(dict.fromkeys(["id", *requested]))
+
+    return select_fields
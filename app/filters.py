@@ -0,0 +1,102 @@
+import enum
+from datetime import datetime, timezone
+from sqlalchemy import and_, or_, not_
+
+
+class FilterError(ValueError):
+    def __init__(self, message: str, param: str | None = None):
+        super().__init__(message)
+        self.param = param
+
+
+# A filter turns one query parameter into a condition on a model's column.
+# Filters name columns rather than holding them, so one filter set applies to
+# any model with those columns (tasks and archived tasks).
+class InFilter:
+    # ``a,b,c`` matches any of the values; ``null_token`` matches NULL.
+    def __init__(self, column: str, enum_class: type[enum.Enum] | None = None, null_token: str | None = None):
+        self.column = column
+        self.enum_class = enum_class
+        self.null_token = null_token
+
+    def parse(self, raw: str):
+        values = []
+        for item in (part.strip() for part in raw.split(",")):
+            if not item:
+                continue
+            if item == self.null_token:
+                values.append(None)
+            elif self.enum_class is not None:
+                try:
+                    values.append(self.enum_class(item))
+                except ValueError:
+                    allowed = [member.value for member in self.enum_class]
+                    raise FilterError(f"Invalid value {item!r}. Allowed: {', '.join(allowed)}")
+            else:
+                values.append(item)
+        if not values:
+            raise FilterError("At least one value is required")
+        return tuple(dict.fromkeys(values))
+
+    def condition(self, model, values, now: datetime):
+        column = getattr(model, self.column)
+        present = [value for value in values if value is not None]
+        conditions = []
+        if present:
+            conditions.append(column == present[0] if len(present) == 1 else column.in_(present))
+        if None in values:
+            conditions.append(column.is_(None))
+        return conditions[0] if len(conditions) == 1 else or_(*conditions)
+
+
+class RangeFilter:
+    # ``after`` is inclusive and ``before`` exclusive, so adjacent ranges
+    # never overlap. Naive datetimes are taken as UTC.
+    def __init__(self, column: str, bound: str):
+        self.column = column
+        self.bound = bound
+
+    def parse(self, raw: datetime) -> datetime:
+        return raw.astimezone(timezone.utc) if raw.tzinfo else raw.replace(tzinfo=timezone.utc)
+
+    def condition(self, model, value: datetime, now: datetime):
+        column = getattr(model, self.column)
+        return column >= value if self.bound == "after" else column < value
+
+
+class OverdueFilter:
+    # Past its due date and not in one of the ``closed`` states.
+    def __init__(self, due_column: str, status_column: str, closed: tuple):
+        self.due_column = due_column
+        self.status_column = status_column
+        self.closed = closed
+
+    def parse(self, raw: bool) -> bool:
+        return raw
+
+    def condition(self, model, value: bool, now: datetime):
+        due = getattr(model, self.due_column)
+        overdue = and_(due.is_not(None), due < now, getattr(model, self.status_column).not_in(self.closed))
+        return overdue if value else not_(overdue)
+
+
+class FilterSet:
+    def __init__(self, **filters):
+        self.filters = filters
+
+    def parse(self, **raw) -> dict:
+        # Parameters left out (None) are skipped. Raises FilterError with the
+        # offending parameter on bad input.
+        parsed = {}
+        for name, value in raw.items():
+            if value is None:
+                continue
+            try:
+                parsed[name] = self.filters[name].parse(value)
+            except FilterError as exc:
+                raise FilterError(str(exc), param=name) from None
+        return parsed
+
+    def conditions(self, model, parsed: dict, now: datetime | None = None) -> list:
+        now = now or datetime.now(timezone.utc)
+        return [self.filters[name].condition(model, value, now) for name, value in parsed.items()]
@@ -0,0 +1,131 @@
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from app import metrics
+
+# Set by the access log middleware for the duration of a request.
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar("request_id", default=None)
+
+stats = {"dropped": 0, "sampled_out": 0}
+
+# LogRecord attributes that are not user-supplied ``extra`` fields.
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    # Keeps a fraction of the records below WARNING from the given loggers
+    # (and their children); warnings and errors are always kept.
+    def __init__(self, rates: dict[str, float], rng=random.random):
+        super().__init__()
+        self.rates = rates
+        self.rng = rng
+
+    def rate_for(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0 or self.rng() < rate:
+            return True
+        stats["sampled_out"] += 1
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    # Runs on the calling thread (usually the event loop): it only stamps the
+    # request id and enqueues. Formatting and I/O happen on the listener
+    # thread. A full queue drops the record instead of blocking.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        # Arguments are merged now, while they still hold their current values.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            stats["dropped"] += 1
+
+
+def parse_sampling(value: str) -> dict[str, float]:
+    # "app.access=0.1,sqlalchemy.engine=0.01"
+    rates = {}
+    for entry in value.split(","):
+        name, sep, rate = entry.strip().partition("=")
+        if sep:
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+_listener: QueueListener | None = None
+_queue: queue.Queue | None = None
+
+
+def configure_logging(settings) -> None:
+    # Replaces the root handlers with the queue. Called once per process.
+    global _listener, _queue
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    _queue = queue.Queue(maxsize=settings.log_queue_size)
+    handler = DroppingQueueHandler(_queue)
+    handler.addFilter(SamplingFilter(parse_sampling(settings.log_sampling)))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+
+    _listener = QueueListener(_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    # Flushes what is queued and stops the writer thread.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+metrics.register("logging", lambda: {**stats, "queued": _queue.qsize() if _queue is not None else 0})
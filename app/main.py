@@ -1,9 +1,14 @@
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
+from app import metrics
 from app.config import get_settings
-from app.routers import auth, projects, tasks
+from app.database import warm_up_engine, dispose_engine
+from app.log import configure_logging
+from app.utils import security
 from app.exceptions import (
     AppException,
     app_exception_handler,
@@ -12,43 +17,125 @@ from app.exceptions import (
     generic_exception_handler,
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
 
-app = FastAPI(
-    title="Task Manager API",
-    description="A RESTful API for managing tasks and projects",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.services.jobs import job_queue
+    from app.services.reminders import reminder_scheduler
+    from app.services.webhooks import webhook_dispatcher
+
+    settings = get_settings()
+    app.state.ready = False
+    security.warm_up()
+    await warm_up_engine(settings.db_pool_size)
+    await job_queue.start()
+    if settings.reminders_enabled:
+        reminder_scheduler.start()
+    if settings.webhooks_enabled:
+        webhook_dispatcher.start()
+    app.state.ready = True
+    logger.info("Task Manager API ready")
+    yield
+    app.state.ready = False
+    await webhook_dispatcher.stop()
+    await reminder_scheduler.stop()
+    await job_queue.stop()
+    await dispose_engine()
+
+
+def create_app() -> FastAPI:
+    # Routers pull in models, schemas and services, so they are imported only
+    # when an app is actually built.
+    from app.routers import auth, projects, tasks, jobs, events, batch, webhooks
+    from app.middleware.rate_limit import RateLimitMiddleware, build_rate_limiter
+    from app.middleware.access_log import AccessLogMiddleware
+    from app.profiling import ProfilingMiddleware, profile_store, verify_profile_token
+
+    settings = get_settings()
+
+    # Records are queued here and written as JSON by a background thread
+    configure_logging(settings)
+
+    app = FastAPI(
+        title="Task Manager API",
+        description="A RESTful API for managing tasks and projects",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan,
+    )
+
+    # Register exception handlers
+    app.add_exception_handler(AppException, app_exception_handler)
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
+    app.add_exception_handler(Exception, generic_exception_handler)
+
+    # Admission control
+    if settings.rate_limit_enabled:
+        app.state.rate_limiter = build_rate_limiter(settings)
+        app.add_middleware(RateLimitMiddleware, limiter=app.state.rate_limiter)
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.profile_sample_rate,
+        profile_dir=settings.profile_dir,
+    )
+    # Outermost, so rejected requests are logged too
+    if settings.access_log_enabled:
+        app.add_middleware(AccessLogMiddleware)
+
+    # Include routers
+    app.include_router(auth.router)
+    app.include_router(projects.router)
+    app.include_router(tasks.router)
+    app.include_router(tasks.lookup_router)
+    app.include_router(jobs.router)
+    app.include_router(events.router)
+    app.include_router(batch.router)
+    app.include_router(webhooks.router)
 
-# Register exception handlers
-app.add_exception_handler(AppException, app_exception_handler)
-app.add_exception_handler(RequestValidationError, validation_exception_handler)
-app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
-app.add_exception_handler(Exception, generic_exception_handler)
+    @app.get("/")
+    async def root():
+        return {"message": "Task Manager API", "status": "running"}
 
-# Include routers
-app.include_router(auth.router)
-app.include_router(projects.router)
-app.include_router(tasks.router)
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
 
+    @app.get("/health/ready")
+    async def readiness_check():
+        if not getattr(app.state, "ready", False):
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"status": "starting"},
+            )
+        return {"status": "ready"}
 
-@app.get("/")
-async def root():
-    return {"message": "Task Manager API", "status": "running"}
+    @app.get("/metrics", include_in_schema=False)
+    async def read_metrics(x_profile: str = Header(default="")):
+        if not verify_profile_token(x_profile):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profile token")
+        return metrics.snapshot()
 
+    @app.get("/debug/profiles/{request_id}", include_in_schema=False)
+    async def read_profile(request_id: str, x_profile: str = Header(default="")):
+        if not verify_profile_token(x_profile):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profile token")
+        profile = profile_store.get(request_id)
+        if profile is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+        return profile
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+    logger.info("Task Manager API started")
+    return app
 
 
-logger.info("Task Manager API started")
\ No newline at end of file
+def __getattr__(name: str):
+    # `app.main:app` is built on first access, so importing this module (from
+    # the launcher, alembic or tests) does not pay for building the app.
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
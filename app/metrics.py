@@ -0,0 +1,13 @@
+from typing import Callable
+
+# Components register a callable returning a JSON-serializable dict; GET /metrics
+# calls them all. Collection happens only when metrics are read.
+_collectors: dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, collect: Callable[[], dict]) -> None:
+    _collectors[name] = collect
+
+
+def snapshot() -> dict:
+    return {name: collect() for name, collect in _collectors.items()}
@@ -0,0 +1,261 @@
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass
+from app.utils.security import bearer_subject
+
+
+@dataclass(frozen=True)
+class Limit:
+    per_minute: int
+
+    @property
+    def capacity(self) -> float:
+        return float(self.per_minute)
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+@dataclass(frozen=True)
+class RouteGroup:
+    name: str
+    methods: frozenset[str] | None = None
+    paths: tuple[str, ...] = ()
+    per_ip: Limit | None = None
+    per_user: Limit | None = None
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods is not None and method not in self.methods:
+            return False
+        if self.paths and not path.startswith(self.paths):
+            return False
+        return True
+
+
+# In-process buckets, split across independently locked shards. Each shard is
+# bounded; when it fills up the longest-idle buckets are dropped, which loses
+# nothing because an idle bucket has refilled anyway.
+class MemoryBucketStore:
+    def __init__(self, shards: int = 64, max_keys_per_shard: int = 4096):
+        self._shards: list[dict[str, list[float]]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._max_keys = max_keys_per_shard
+
+    async def consume(self, key: str, limit: Limit, now: float) -> float:
+        index = hash(key) % len(self._shards)
+        shard = self._shards[index]
+        with self._locks[index]:
+            bucket = shard.pop(key, None)
+            if bucket is None:
+                if len(shard) >= self._max_keys:
+                    # Dicts keep insertion order and buckets are re-inserted on
+                    # every hit, so the first keys are the least recently used.
+                    for stale in list(shard)[: self._max_keys // 4]:
+                        del shard[stale]
+                bucket = [limit.capacity, now]
+            tokens = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+            shard[key] = bucket
+            bucket[1] = now
+            if tokens >= 1.0:
+                bucket[0] = tokens - 1.0
+                return 0.0
+            bucket[0] = tokens
+            return (1.0 - tokens) / limit.rate
+
+    def clear(self) -> None:
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+
+
+_REDIS_TOKEN_BUCKET = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+# Buckets shared by every worker and host. Requires the optional ``redis``
+# package; refills use the Redis server clock so hosts never disagree.
+class RedisBucketStore:
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError(
+                "RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed"
+            ) from exc
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self._prefix = prefix
+
+    async def consume(self, key: str, limit: Limit, now: float) -> float:
+        result = await self._script(
+            keys=[self._prefix + key],
+            args=[limit.capacity, limit.rate],
+        )
+        return float(result)
+
+    def clear(self) -> None:
+        pass
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        groups: list[RouteGroup],
+        store: MemoryBucketStore | RedisBucketStore,
+        max_concurrency: int,
+        trust_forwarded_for: bool = False,
+        clock=time.monotonic,
+    ):
+        self.groups = groups
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self.trust_forwarded_for = trust_forwarded_for
+        self.clock = clock
+        self.in_flight = 0
+
+    def match(self, method: str, path: str) -> RouteGroup | None:
+        for group in self.groups:
+            if group.matches(method, path):
+                return group
+        return None
+
+    def client_ip(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.split(b",", 1)[0].strip().decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    def user_id(scope) -> str | None:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                return bearer_subject(value.decode("latin-1"))
+        return None
+
+    async def check(self, group: RouteGroup, scope) -> float:
+        now = self.clock()
+        retry_after = 0.0
+        if group.per_ip is not None:
+            key = f"{group.name}:ip:{self.client_ip(scope)}"
+            retry_after = await self.store.consume(key, group.per_ip, now)
+        if not retry_after and group.per_user is not None:
+            user_id = self.user_id(scope)
+            if user_id is not None:
+                key = f"{group.name}:user:{user_id}"
+                retry_after = await self.store.consume(key, group.per_user, now)
+        return retry_after
+
+    def reset(self) -> None:
+        self.store.clear()
+        self.in_flight = 0
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"error": detail, "status_code": status_code}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+# Pure ASGI (no BaseHTTPMiddleware) to keep per-request overhead to a few microseconds.
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        app,
+        limiter: RateLimiter,
+        exempt_paths: tuple[str, ...] = ("/health",),
+        streaming_suffixes: tuple[str, ...] = ("/events",),
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.exempt_paths = exempt_paths
+        self.streaming_suffixes = streaming_suffixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter
+        if limiter.in_flight >= limiter.max_concurrency:
+            await _reject(send, 503, "Server is busy, please retry", 1)
+            return
+
+        group = limiter.match(scope["method"], scope["path"])
+        if group is not None:
+            retry_after = await limiter.check(group, scope)
+            if retry_after:
+                await _reject(send, 429, "Too many requests", retry_after)
+                return
+
+        # Long-lived streams are rate limited on connect but hold no concurrency slot.
+        if scope["path"].endswith(self.streaming_suffixes):
+            await self.app(scope, receive, send)
+            return
+
+        limiter.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.in_flight -= 1
+
+
+def build_rate_limiter(settings) -> RateLimiter:
+    writes = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+    groups = [
+        RouteGroup(
+            name="auth",
+            methods=frozenset({"POST"}),
+            paths=("/auth/login", "/auth/register"),
+            per_ip=Limit(settings.rate_limit_auth_per_minute),
+        ),
+        RouteGroup(
+            name="write",
+            methods=writes,
+            per_ip=Limit(settings.rate_limit_write_per_minute * 5),
+            per_user=Limit(settings.rate_limit_write_per_minute),
+        ),
+        RouteGroup(
+            name="read",
+            per_user=Limit(settings.rate_limit_read_per_minute),
+        ),
+    ]
+    if settings.rate_limit_redis_url:
+        store = RedisBucketStore(settings.rate_limit_redis_url)
+    else:
+        store = MemoryBucketStore()
+    return RateLimiter(
+        groups=groups,
+        store=store,
+        max_concurrency=settings.max_concurrent_requests,
+        trust_forwarded_for=settings.trust_forwarded_for,
+    )
@@ -1,5 +1,9 @@
 from app.models.user import User
 from app.models.project import Project
-from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.task import Task, TaskStatus, TaskPriority, TaskTombstone, ArchivedTask
+from app.models.job import Job, JobStatus
+from app.models.idempotency import IdempotencyKey
+from app.models.reminder import TaskReminder, SchedulerLease
+from app.models.webhook import OutboxEvent, WebhookEndpoint, WebhookDelivery
 
-__all__ = ["User", "Project", "Task", "TaskStatus", "TaskPriority"]
\ No newline at end of file
+__all__ = ["User", "Project", "Task", "TaskStatus", "TaskPriority", "TaskTombstone", "ArchivedTask", "Job", "JobStatus", "IdempotencyKey", "TaskReminder", "SchedulerLease", "OutboxEvent", "WebhookEndpoint", "WebhookDelivery"]
\ No newline at end of file
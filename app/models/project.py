@@ -1,4 +1,4 @@
-from sqlalchemy import String, Text, ForeignKey, DateTime
+from sqlalchemy import String, Text, ForeignKey, DateTime, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -15,6 +15,10 @@ class Project(Base):
     owner_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Last change sequence handed out to this project's tasks, and the oldest
+    # sequence a delta sync can still resume from after tombstone compaction.
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    min_change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
 
     # Relationships
     owner: Mapped["User"] = relationship("User", back_populates="owned_projects")
@@ -1,7 +1,8 @@
-from sqlalchemy import String, Text, ForeignKey, DateTime, Enum
+from sqlalchemy import String, Text, ForeignKey, DateTime, BigInteger, Integer, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.types import OrdinalEnum
 import uuid
 from datetime import datetime
 import enum
@@ -19,20 +20,90 @@ class TaskPriority(str, enum.Enum):
     HIGH = "high"
 
 
+# Stored values; they must not change once rows exist (see the migrations).
+TASK_STATUS_ORDINALS = ((TaskStatus.TODO, 1), (TaskStatus.IN_PROGRESS, 2), (TaskStatus.DONE, 3))
+TASK_PRIORITY_ORDINALS = ((TaskPriority.LOW, 1), (TaskPriority.MEDIUM, 2), (TaskPriority.HIGH, 3))
+# Written out literally so the planner can match it against the partial index.
+OPEN_TASK_CONDITION = f"status != {dict(TASK_STATUS_ORDINALS)[TaskStatus.DONE]}"
+
+
 class Task(Base):
     __tablename__ = "tasks"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
-    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), default=TaskStatus.TODO)
-    priority: Mapped[TaskPriority] = mapped_column(Enum(TaskPriority), default=TaskPriority.MEDIUM)
+    status: Mapped[TaskStatus] = mapped_column(OrdinalEnum(TaskStatus, TASK_STATUS_ORDINALS), default=TaskStatus.TODO)
+    priority: Mapped[TaskPriority] = mapped_column(
+        OrdinalEnum(TaskPriority, TASK_PRIORITY_ORDINALS), default=TaskPriority.MEDIUM
+    )
     due_date: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     project_id: Mapped[str] = mapped_column(String(36), ForeignKey("projects.id"), nullable=False)
     assignee_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("users.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    # User-defined order within the project (see app/services/ranking.py).
+    rank: Mapped[str] = mapped_column(String(64), default="", server_default="")
 
     # Relationships
     project: Mapped["Project"] = relationship("Project", back_populates="tasks")
-    assignee: Mapped["User | None"] = relationship("User", back_populates="assigned_tasks", foreign_keys=[assignee_id])
\ No newline at end of file
+    assignee: Mapped["User | None"] = relationship("User", back_populates="assigned_tasks", foreign_keys=[assignee_id])
+
+    __table_args__ = (
+        Index("ix_tasks_project_id_change_seq", "project_id", "change_seq"),
+        Index("ix_tasks_project_id_rank", "project_id", "rank"),
+        Index("ix_tasks_project_id_status_rank", "project_id", "status", "rank"),
+        Index("ix_tasks_project_id_priority", "project_id", "priority"),
+        # List filters and sorts (see TASK_FILTERS in app/routers/tasks.py)
+        Index("ix_tasks_project_id_created_at", "project_id", "created_at"),
+        Index("ix_tasks_project_id_due_date", "project_id", "due_date"),
+        Index("ix_tasks_project_id_assignee_id", "project_id", "assignee_id"),
+        Index(
+            "ix_tasks_open_due_date",
+            "due_date",
+            "id",
+            postgresql_where=text(OPEN_TASK_CONDITION),
+            sqlite_where=text(OPEN_TASK_CONDITION),
+        ),
+    )
+
+
+class TaskTombstone(Base):
+    __tablename__ = "task_tombstones"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Not foreign keys: tombstones describe rows that no longer exist.
+    project_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    task_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = (
+        Index("ix_task_tombstones_project_id_change_seq", "project_id", "change_seq"),
+    )
+
+
+# DONE tasks moved out of ``tasks`` once they are old (see app/services/archive.py).
+# Same columns, so rows move with INSERT ... SELECT and serialize as TaskResponse.
+class ArchivedTask(Base):
+    __tablename__ = "archived_tasks"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    status: Mapped[TaskStatus] = mapped_column(OrdinalEnum(TaskStatus, TASK_STATUS_ORDINALS))
+    priority: Mapped[TaskPriority] = mapped_column(OrdinalEnum(TaskPriority, TASK_PRIORITY_ORDINALS))
+    due_date: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Not foreign keys, like tombstones; project deletion clears these explicitly.
+    project_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    assignee_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    rank: Mapped[str] = mapped_column(String(64), default="", server_default="")
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_archived_tasks_project_id_created_at", "project_id", "created_at"),
+    )
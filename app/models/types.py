@@ -0,0 +1,27 @@
+import enum
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class OrdinalEnum(TypeDecorator):
+    # Stores an enum as a small integer. The API keeps the enum values, while
+    # the column sorts in ordinal order and indexes stay narrow.
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: type[enum.Enum], ordinals: tuple[tuple[enum.Enum, int], ...]):
+        super().__init__()
+        self.enum_class = enum_class
+        self.ordinals = ordinals
+        self._to_ordinal = dict(ordinals)
+        self._from_ordinal = {ordinal: member for member, ordinal in ordinals}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._to_ordinal[self.enum_class(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._from_ordinal[value]
@@ -0,0 +1,303 @@
+import asyncio
+import contextvars
+import cProfile
+import hashlib
+import hmac
+import json
+import logging
+import pstats
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import metrics
+from app.config import get_settings
+from app.log import request_id_var
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.slow_query")
+
+PROFILE_HEADER = b"x-profile"
+
+
+@dataclass
+class RequestContext:
+    scope: dict
+    queries: int = 0
+    db_seconds: float = 0.0
+    max_query_seconds: float = 0.0
+    # Per-statement timings, only collected while the request is profiled.
+    statements: list | None = None
+
+    @property
+    def route(self) -> str | None:
+        route = self.scope.get("route")
+        return getattr(route, "path", None)
+
+
+request_context: contextvars.ContextVar[RequestContext | None] = contextvars.ContextVar("request_context", default=None)
+
+stats = {"profiled": 0, "skipped_busy": 0, "slow_queries": 0}
+
+
+# Profiling is triggered by ``X-Profile: <expires>.<signature>``, an HMAC of
+# the expiry time under SECRET_KEY (see ``python -m app.cli profile-token``).
+def sign_profile_token(expires_at: int) -> str:
+    key = get_settings().secret_key.encode()
+    signature = hmac.new(key, f"profile:{expires_at}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_profile_token(value: str, now: float | None = None) -> bool:
+    expires, _, _ = value.partition(".")
+    if not expires.isdigit() or int(expires) < (now or time.time()):
+        return False
+    return hmac.compare_digest(value, sign_profile_token(int(expires)))
+
+
+def _label(func: tuple) -> str:
+    filename, line, name = func
+    return name if filename == "~" else f"{filename}:{line}({name})"
+
+
+def code_key(func) -> tuple:
+    code = func.__code__
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def call_tree(
+    profiler: cProfile.Profile,
+    root: tuple | None = None,
+    max_depth: int = 12,
+    min_ms: float = 0.5,
+) -> list[dict]:
+    # Turns cProfile's caller/callee edges into nested nodes with cumulative
+    # and own time, starting at ``root`` (or at every function without a
+    # recorded caller). Time spent suspended in an await is not CPU time on
+    # any frame, so it only shows up in the request's wall time and db_ms.
+    data = pstats.Stats(profiler).stats
+    callees: dict[tuple, list[tuple]] = {}
+    for func, (_, _, _, _, callers) in data.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge))
+
+    def node(func, calls, own, cumulative, path, depth):
+        entry = {
+            "function": _label(func),
+            "calls": calls,
+            "total_ms": round(cumulative * 1000, 3),
+            "own_ms": round(own * 1000, 3),
+        }
+        if depth < max_depth:
+            children = [
+                node(child, edge[1], edge[2], edge[3], path | {child}, depth + 1)
+                for child, edge in sorted(callees.get(func, ()), key=lambda item: -item[1][3])
+                if child not in path and edge[3] * 1000 >= min_ms
+            ]
+            if children:
+                entry["children"] = children
+        return entry
+
+    if root in data:
+        roots = [root]
+    else:
+        roots = [func for func, (_, _, _, _, callers) in data.items() if not callers]
+    roots.sort(key=lambda func: -data[func][3])
+    return [
+        node(func, data[func][1], data[func][2], data[func][3], {func}, 0)
+        for func in roots
+        if data[func][3] * 1000 >= min_ms
+    ]
+
+
+class ProfileStore:
+    # Recent profiles by request id, readable with GET /debug/profiles/{id}.
+    def __init__(self, maxlen: int | None = None):
+        self._maxlen = maxlen
+        self._profiles: dict[str, dict] = {}
+        self._order: deque[str] = deque()
+
+    def add(self, profile: dict) -> None:
+        maxlen = self._maxlen or get_settings().profile_keep
+        self._profiles[profile["request_id"]] = profile
+        self._order.append(profile["request_id"])
+        while len(self._order) > maxlen:
+            self._profiles.pop(self._order.popleft(), None)
+
+    def get(self, request_id: str) -> dict | None:
+        return self._profiles.get(request_id)
+
+    def clear(self) -> None:
+        self._profiles.clear()
+        self._order.clear()
+
+
+profile_store = ProfileStore()
+# cProfile hooks the whole thread, so only one request is profiled at a time,
+# and it also records the CPU time of every other request the event loop runs
+# meanwhile. Sampled profiles are therefore only taken when the request is
+# the only one in flight; a profile asked for with X-Profile always runs and
+# reports how many other requests overlapped it.
+_profiling = False
+_in_flight = 0
+_overlapping = 0
+
+
+def _write_profile(directory: str, profile: dict) -> None:
+    path = Path(directory) / f"{profile['request_id']}.json"
+    path.write_text(json.dumps(profile))
+
+
+class ProfilingMiddleware:
+    # Pure ASGI. Every request gets a RequestContext (used by the slow-query
+    # log); a request carrying a valid X-Profile token, or picked by
+    # PROFILE_SAMPLE_RATE, is also run under cProfile. Must sit inside the
+    # access log middleware so the request id is set.
+    def __init__(self, app, sample_rate: float = 0.0, profile_dir: str | None = None, rng=random.random):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.profile_dir = profile_dir
+        self.rng = rng
+
+    def requested_profile(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return verify_profile_token(value.decode("latin-1"))
+        return False
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and self.rng() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global _in_flight, _overlapping
+        context = RequestContext(scope)
+        token = request_context.set(context)
+        _in_flight += 1
+        if _profiling:
+            _overlapping += 1
+        try:
+            requested = self.requested_profile(scope)
+            if not requested and not self.sampled():
+                await self.app(scope, receive, send)
+                return
+            if _profiling or (not requested and _in_flight > 1):
+                stats["skipped_busy"] += 1
+                await self.app(scope, receive, send)
+                return
+            await self.profile(scope, receive, send, context)
+        finally:
+            _in_flight -= 1
+            request_context.reset(token)
+
+    async def profile(self, scope, receive, send, context: RequestContext) -> None:
+        global _profiling, _overlapping
+        request_id = request_id_var.get()
+        context.statements = []
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if request_id:
+                    message["headers"] = [*message.get("headers", ()), (b"x-profile-id", request_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        _profiling = True
+        _overlapping = _in_flight - 1
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            _profiling = False
+            duration = time.perf_counter() - start
+
+        stats["profiled"] += 1
+        profile = {
+            "request_id": request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": context.route,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 3),
+            # Requests that ran alongside; their CPU time is in the tree too.
+            "overlapping_requests": _overlapping,
+            "db": {
+                "queries": context.queries,
+                "time_ms": round(context.db_seconds * 1000, 3),
+                "statements": context.statements,
+            },
+            "calls": call_tree(profiler, root=code_key(type(self.app).__call__)),
+        }
+        if request_id:
+            profile_store.add(profile)
+        if self.profile_dir:
+            try:
+                await asyncio.to_thread(_write_profile, self.profile_dir, profile)
+            except OSError:
+                logger.exception("Could not store profile %s", request_id)
+
+
+def parameters_shape(parameters, executemany: bool):
+    # Types only; parameter values can hold personal data.
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "row": parameters_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    request = request_context.get()
+    if request is not None:
+        request.queries += 1
+        request.db_seconds += duration
+        request.max_query_seconds = max(request.max_query_seconds, duration)
+        if request.statements is not None:
+            request.statements.append({"statement": statement[:500], "duration_ms": round(duration * 1000, 3)})
+
+    threshold = get_settings().slow_query_ms
+    if threshold is not None and duration * 1000 >= threshold:
+        stats["slow_queries"] += 1
+        slow_query_logger.warning(
+            "Slow query (%.1f ms)",
+            duration * 1000,
+            extra={
+                "statement": statement[:2000],
+                "parameters": parameters_shape(parameters, executemany),
+                "duration_ms": round(duration * 1000, 3),
+                "route": request.route if request is not None else None,
+            },
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_query_timer(context) -> None:
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+metrics.register("profiling", lambda: dict(stats))
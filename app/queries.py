@@ -0,0 +1,78 @@
+from sqlalchemy import select, bindparam, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.project import Project
+from app.models.task import Task, ArchivedTask
+
+# Prebuilt statements for the lookups that nearly every request makes. Building
+# a select() and generating its cache key costs tens of microseconds per call;
+# these are built once, their cache keys are memoized on the statement, and
+# values travel as bound parameters, so every execution hits the compiled cache
+# (and, on asyncpg, the connection's prepared statement cache).
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+USER_ID_EXISTS = select(User.id).where(User.id == bindparam("user_id"))
+
+OWNED_PROJECT = select(Project).where(
+    Project.id == bindparam("project_id"),
+    Project.owner_id == bindparam("owner_id"),
+)
+
+PROJECT_TASK = select(Task).where(
+    Task.id == bindparam("task_id"),
+    Task.project_id == bindparam("project_id"),
+)
+
+PROJECT_ARCHIVED_TASK = select(ArchivedTask).where(
+    ArchivedTask.id == bindparam("task_id"),
+    ArchivedTask.project_id == bindparam("project_id"),
+)
+
+# Live and archived tasks by id, limited to projects the owner has, in one
+# round trip. ``task_ids`` is an expanding parameter.
+OWNED_TASKS = union_all(*(
+    select(*(getattr(model, column.name) for column in Task.__table__.columns))
+    .join(Project, Project.id == model.project_id)
+    .where(
+        model.id.in_(bindparam("task_ids", expanding=True)),
+        Project.owner_id == bindparam("owner_id"),
+    )
+    for model in (Task, ArchivedTask)
+))
+
+
+async def get_user(db: AsyncSession, user_id: str) -> User | None:
+    result = await db.execute(USER_BY_ID, {"user_id": user_id})
+    return result.scalar_one_or_none()
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    result = await db.execute(USER_BY_EMAIL, {"email": email})
+    return result.scalar_one_or_none()
+
+
+async def user_exists(db: AsyncSession, user_id: str) -> bool:
+    result = await db.execute(USER_ID_EXISTS, {"user_id": user_id})
+    return result.scalar_one_or_none() is not None
+
+
+async def get_owned_project(db: AsyncSession, project_id: str, owner_id: str) -> Project | None:
+    result = await db.execute(OWNED_PROJECT, {"project_id": project_id, "owner_id": owner_id})
+    return result.scalar_one_or_none()
+
+
+async def get_project_task(db: AsyncSession, project_id: str, task_id: str) -> Task | None:
+    result = await db.execute(PROJECT_TASK, {"project_id": project_id, "task_id": task_id})
+    return result.scalar_one_or_none()
+
+
+async def get_archived_task(db: AsyncSession, project_id: str, task_id: str) -> ArchivedTask | None:
+    result = await db.execute(PROJECT_ARCHIVED_TASK, {"project_id": project_id, "task_id": task_id})
+    return result.scalar_one_or_none()
+
+
+async def get_owned_tasks(db: AsyncSession, owner_id: str, task_ids: list[str]) -> list[dict]:
+    result = await db.execute(OWNED_TASKS, {"owner_id": owner_id, "task_ids": task_ids})
+    return [dict(row) for row in result.mappings()]
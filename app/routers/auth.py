@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
@@ -8,21 +8,38 @@ from app.services.auth import (
     create_user,
     authenticate_user,
     create_user_token,
+    new_user_id,
 )
 from app.dependencies import get_current_active_user
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def place_new_user(user_data: UserCreate, request: Request) -> str:
+    # Runs before get_db, which then opens the session on the new user's
+    # shard, so the insert is part of the request's transaction.
+    request.state.shard_user_id = new_user_id(user_data.email)
+    return request.state.shard_user_id
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+async def register(
+    user_data: UserCreate,
+    user_id: str = Depends(place_new_user),
+    db: AsyncSession = Depends(get_db),
+):
     existing_user = await get_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    user = await create_user(db, user_data)
+    user = await create_user(db, user_data, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
+        )
     return user
 
 
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import get_db
+from app.dependencies import get_current_active_user
+from app.models.user import User
+from app.schemas.batch import BatchItem, BatchRequest, BatchResponse, BatchResult
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+
+async def dispatch(request: Request, item: BatchItem, state: dict) -> BatchResult:
+    # Runs one sub-request through the full app (middleware, validation and
+    # exception handlers included) without leaving the process.
+    path, _, query = item.path.partition("?")
+    body = b"" if item.body is None else json.dumps(item.body).encode()
+    headers = [(b"authorization", request.headers["authorization"].encode("latin-1"))]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": request.scope["asgi"],
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": item.method,
+        "scheme": request.url.scheme,
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "state": state,
+    }
+
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    response = {"status": 500, "content_type": b"", "chunks": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["content_type"] = dict(message.get("headers", ())).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # The error handlers have already sent a 500 for it.
+        logger.exception("Batch sub-request %s %s failed", item.method, item.path)
+
+    content = b"".join(response["chunks"])
+    if not content:
+        result = None
+    elif response["content_type"].startswith(b"application/json"):
+        result = json.loads(content)
+    else:
+        result = content.decode("utf-8", "replace")
+    return BatchResult(id=item.id, status=response["status"], body=result)
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    if len(batch.requests) > get_settings().batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {get_settings().batch_max_requests} requests",
+        )
+
+    # The user is authenticated once for the whole batch and shared, detached,
+    # with every sub-request.
+    db.expunge(current_user)
+    if batch.concurrent:
+        # A session cannot run queries concurrently, so each sub-request opens its own.
+        results = await asyncio.gather(
+            *(dispatch(request, item, {"batch_user": current_user}) for item in batch.requests)
+        )
+        return BatchResponse(responses=results)
+
+    results = []
+    for item in batch.requests:
+        if item.method == "GET":
+            state = {"batch_user": current_user, "batch_db": db}
+        else:
+            # Writes commit on their own session, as they would outside a batch.
+            state = {"batch_user": current_user}
+        results.append(await dispatch(request, item, state))
+        if item.method != "GET":
+            # Later reads must not be served stale objects from the shared identity map.
+            db.expire_all()
+    return BatchResponse(responses=results)
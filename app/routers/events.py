@@ -0,0 +1,49 @@
+import asyncio
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import get_db
+from app.dependencies import get_current_active_user
+from app.models.user import User
+from app.routers.tasks import get_project_or_404
+from app.services.events import broker, Subscription
+
+router = APIRouter(prefix="/projects/{project_id}/events", tags=["Events"])
+
+
+async def event_stream(subscription: Subscription, keepalive: float):
+    try:
+        yield "retry: 3000\n\n"
+        for frame in subscription.backlog:
+            yield frame
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if frame is None:
+                break
+            yield frame
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@router.get("")
+async def stream_project_events(
+    project_id: str,
+    last_event_id: str | None = Header(default=None),
+    since: str | None = Query(default=None, description="Resume after this event id"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    # Ownership is checked once here; the session is released before streaming starts.
+    await get_project_or_404(project_id, current_user, db)
+
+    subscription = broker.subscribe(project_id, last_event_id if last_event_id is not None else since)
+    return StreamingResponse(
+        event_stream(subscription, get_settings().events_keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from app.database import get_db
+from app.dependencies import get_current_active_user
+from app.models.user import User
+from app.models.job import Job, JobStatus
+from app.schemas.job import JobResponse
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+async def get_job_or_404(job_id: str, current_user: User, db: AsyncSession) -> Job:
+    result = await db.execute(
+        select(Job).where(
+            Job.id == job_id,
+            Job.owner_id == current_user.id,
+        )
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    return await get_job_or_404(job_id, current_user, db)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    job = await get_job_or_404(job_id, current_user, db)
+    # Conditional updates, so a worker claiming the job meanwhile can't have
+    # it both cancelled and running.
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+        .values(status=JobStatus.CANCELLED)
+    )
+    if result.rowcount == 0:
+        # Running handlers notice this the next time they report progress.
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.RUNNING)
+            .values(cancel_requested=True)
+        )
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Job already finished",
+        )
+    await db.refresh(job)
+    return job
@@ -1,16 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, delete
+from app.config import get_settings
 from app.database import get_db
-from app.dependencies import get_current_active_user
+from app.dependencies import get_current_active_user, field_selector
 from app.models.user import User
 from app.models.project import Project
+from app.models.task import Task, TaskTombstone, ArchivedTask
+from app.queries import get_owned_project
+from app.schemas.job import JobResponse
 from app.schemas.project import (
     ProjectCreate,
+    ProjectDuplicate,
+    ProjectDuplicateResponse,
     ProjectUpdate,
     ProjectResponse,
     ProjectListResponse,
+    PROJECT_FIELDS,
+    PROJECT_LIST_FIELDS,
 )
+from app.schemas.task import TASK_PREVIEW_FIELDS
+from app.services.duplicate import copy_project
+from app.services.idempotency import claim_idempotency_key, store_idempotent_response
+from app.services.jobs import job_queue
+from app.services.outbox import record_event, record_task_events
+from app.services.project_jobs import count_project_tasks
+import json
 import math
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
@@ -19,9 +35,16 @@ router = APIRouter(prefix="/projects", tags=["Projects"])
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project_data: ProjectCreate,
+    request: Request,
+    idempotency_key: str | None = Header(default=None, max_length=255),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
+    if idempotency_key:
+        replay = await claim_idempotency_key(db, request, current_user.id, idempotency_key)
+        if replay is not None:
+            return replay
+    
     project = Project(
         name=project_data.name,
         description=project_data.description,
@@ -30,16 +53,54 @@ async def create_project(
     db.add(project)
     await db.flush()
     await db.refresh(project)
+    response = ProjectResponse.model_validate(project)
+    if idempotency_key:
+        await store_idempotent_response(db, current_user.id, idempotency_key, status.HTTP_201_CREATED, response)
+    record_event(db, current_user.id, "project.created", project.id, response.model_dump_json())
     return project
 
 
-@router.get("", response_model=ProjectListResponse)
+PROJECT_INCLUDES = ("tasks_preview",)
+
+
+async def task_previews(db: AsyncSession, project_ids: list[str], limit: int) -> dict[str, list[dict]]:
+    # The first ``limit`` tasks in board order of every project on the page,
+    # numbered per project by a window function and fetched in one query.
+    position = func.row_number().over(partition_by=Task.project_id, order_by=(Task.rank, Task.id))
+    numbered = (
+        select(Task.project_id, *(getattr(Task, name) for name in TASK_PREVIEW_FIELDS), position.label("position"))
+        .where(Task.project_id.in_(project_ids))
+        .subquery()
+    )
+    result = await db.execute(
+        select(numbered.c.project_id, *(numbered.c[name] for name in TASK_PREVIEW_FIELDS))
+        .where(numbered.c.position <= limit)
+        .order_by(numbered.c.project_id, numbered.c.position)
+    )
+    previews = {project_id: [] for project_id in project_ids}
+    for row in result.mappings():
+        previews[row["project_id"]].append({name: row[name] for name in TASK_PREVIEW_FIELDS})
+    return previews
+
+
+@router.get("", response_model=ProjectListResponse, response_model_exclude_unset=True)
 async def list_projects(
     page: int = Query(default=1, ge=1, description="Page number"),
     per_page: int = Query(default=10, ge=1, le=100, description="Items per page"),
+    fields: tuple[str, ...] = Depends(field_selector(PROJECT_FIELDS, PROJECT_LIST_FIELDS)),
+    include: str | None = Query(default=None, description="Comma-separated extras: tasks_preview"),
+    preview_limit: int = Query(default=5, ge=1, le=50, description="Tasks per project with include=tasks_preview"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
+    includes = {name.strip() for name in (include or "").split(",") if name.strip()}
+    unknown = sorted(includes.difference(PROJECT_INCLUDES))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(unknown)}. Allowed: {', '.join(PROJECT_INCLUDES)}",
+        )
+
     # Get total count
     count_result = await db.execute(
         select(func.count()).select_from(Project).where(Project.owner_id == current_user.id)
@@ -49,13 +110,18 @@ async def list_projects(
     # Get paginated results
     offset = (page - 1) * per_page
     result = await db.execute(
-        select(Project)
+        select(*(getattr(Project, name) for name in fields))
         .where(Project.owner_id == current_user.id)
         .order_by(Project.created_at.desc())
         .offset(offset)
         .limit(per_page)
     )
-    projects = result.scalars().all()
+    projects = [dict(row) for row in result.mappings()]
+
+    if "tasks_preview" in includes and projects:
+        previews = await task_previews(db, [project["id"] for project in projects], preview_limit)
+        for project in projects:
+            project["tasks_preview"] = previews[project["id"]]
     
     return ProjectListResponse(
         projects=projects,
@@ -72,13 +138,7 @@ async def get_project(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == current_user.id,
-        )
-    )
-    project = result.scalar_one_or_none()
+    project = await get_owned_project(db, project_id, current_user.id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,13 +154,7 @@ async def update_project(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == current_user.id,
-        )
-    )
-    project = result.scalar_one_or_none()
+    project = await get_owned_project(db, project_id, current_user.id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -113,27 +167,106 @@ async def update_project(
     
     await db.flush()
     await db.refresh(project)
+    record_event(db, current_user.id, "project.updated", project.id, ProjectResponse.model_validate(project).model_dump_json())
     return project
 
 
-@router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_project(
+@router.post("/{project_id}/duplicate", response_model=ProjectDuplicateResponse, status_code=status.HTTP_201_CREATED)
+async def duplicate_project(
     project_id: str,
+    options: ProjectDuplicate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == current_user.id,
+    project = await get_owned_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found",
         )
+
+    copy, tasks_copied = await copy_project(
+        db,
+        project,
+        name=options.name or f"{project.name} (copy)"[:100],
+        reset_status=options.reset_status,
+        due_date_shift_days=options.due_date_shift_days,
+        clear_assignees=options.clear_assignees,
     )
-    project = result.scalar_one_or_none()
+    response = ProjectDuplicateResponse(**ProjectResponse.model_validate(copy).model_dump(), tasks_copied=tasks_copied)
+    record_event(db, current_user.id, "project.created", copy.id, response.model_dump_json())
+    await record_task_events(db, "task.created", Task.project_id == copy.id, columns=("rank",))
+    return response
+
+
+async def submit_project_job(db: AsyncSession, kind: str, project: Project) -> JSONResponse:
+    if not job_queue.has_capacity():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is full, please retry later",
+            headers={"Retry-After": "5"},
+        )
+    job = await job_queue.submit(db, kind, owner_id=project.owner_id, project_id=project.id)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=JobResponse.model_validate(job).model_dump(mode="json"),
+    )
+
+
+@router.delete(
+    "/{project_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={202: {"model": JobResponse, "description": "Large project, deleted in the background"}},
+)
+async def delete_project(
+    project_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    project = await get_owned_project(db, project_id, current_user.id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found",
         )
     
+    # Large projects are deleted in batches by a background job
+    if await count_project_tasks(db, project.id) > get_settings().job_inline_delete_limit:
+        return await submit_project_job(db, "delete_project", project)
+
+    await db.execute(delete(Task).where(Task.project_id == project.id))
+    await db.execute(delete(TaskTombstone).where(TaskTombstone.project_id == project.id))
+    await db.execute(delete(ArchivedTask).where(ArchivedTask.project_id == project.id))
     await db.delete(project)
-    return None
\ No newline at end of file
+    record_event(db, current_user.id, "project.deleted", project.id, json.dumps({"id": project.id}))
+    return None
+
+
+@router.post("/{project_id}/export", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def export_project(
+    project_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    project = await get_owned_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found",
+        )
+    return await submit_project_job(db, "export_project", project)
+
+
+@router.post("/{project_id}/stats", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def compute_project_stats(
+    project_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    project = await get_owned_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found",
+        )
+    return await submit_project_job(db, "project_stats", project)
\ No newline at end of file
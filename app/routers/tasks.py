@@ -1,20 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status, Query
+from fastapi.exceptions import RequestValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import String, cast, select, func, insert, literal, update, union_all
+from app.config import get_settings
 from app.database import get_db
-from app.dependencies import get_current_active_user
+from app.dependencies import get_current_active_user, field_selector
+from app.filters import FilterError, FilterSet, InFilter, RangeFilter, OverdueFilter
 from app.models.user import User
 from app.models.project import Project
-from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.task import Task, TaskStatus, TaskPriority, TaskTombstone, ArchivedTask
+from app.queries import get_owned_project, get_owned_tasks, get_project_task, get_archived_task, user_exists
 from app.schemas.task import (
     TaskCreate,
     TaskUpdate,
+    TaskFilter,
+    TaskBulkMove,
+    TaskBulkUpdate,
+    TaskBulkResponse,
+    TaskMove,
+    TaskMultiGet,
+    TaskMultiGetResponse,
     TaskResponse,
     TaskListResponse,
+    TaskChange,
+    TASK_FIELDS,
+    TASK_LIST_FIELDS,
+    TaskChangesResponse,
 )
+from app.services.auth import user_exists_on_other_shard
+from app.services.changes import (
+    next_change_seq,
+    record_task_deleted,
+    fetch_changes,
+    parse_cursor,
+    format_cursor,
+)
+from app.services.events import broadcast_task_event, publish_task_event
+from app.services.idempotency import claim_idempotency_key, store_idempotent_response
+from app.services.outbox import record_task_events
+from app.services.ranking import last_rank, rank_between, rank_fits, rank_for_move, rebalance_ranks_now, schedule_rebalance
+import json
 import math
 
 router = APIRouter(prefix="/projects/{project_id}/tasks", tags=["Tasks"])
+# Endpoints that span projects.
+lookup_router = APIRouter(prefix="/tasks", tags=["Tasks"])
+
+TASK_FILTERS = FilterSet(
+    status=InFilter("status", TaskStatus),
+    priority=InFilter("priority", TaskPriority),
+    assignee_id=InFilter("assignee_id", null_token="unassigned"),
+    due_after=RangeFilter("due_date", "after"),
+    due_before=RangeFilter("due_date", "before"),
+    created_since=RangeFilter("created_at", "after"),
+    overdue=OverdueFilter("due_date", "status", closed=(TaskStatus.DONE,)),
+)
+
+
+def parse_task_filters(location: tuple, **raw) -> dict:
+    # Bad filter values are reported like any other validation error (422).
+    try:
+        return TASK_FILTERS.parse(**raw)
+    except FilterError as exc:
+        raise RequestValidationError([{"loc": (*location, exc.param), "msg": str(exc), "type": "value_error"}])
+
+
+def bulk_conditions(project_id: str, task_filter: TaskFilter) -> list:
+    parsed = parse_task_filters(("body", "filter"), **task_filter.model_dump(exclude={"ids"}))
+    conditions = [Task.project_id == project_id, *TASK_FILTERS.conditions(Task, parsed)]
+    if task_filter.ids is not None:
+        conditions.append(Task.id.in_(task_filter.ids))
+    return conditions
 
 
 async def get_project_or_404(
@@ -22,13 +79,7 @@ async def get_project_or_404(
     current_user: User,
     db: AsyncSession,
 ) -> Project:
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.owner_id == current_user.id,
-        )
-    )
-    project = result.scalar_one_or_none()
+    project = await get_owned_project(db, project_id, current_user.id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -37,26 +88,48 @@ async def get_project_or_404(
     return project
 
 
+async def check_assignee(db: AsyncSession, assignee_id: str) -> None:
+    if await user_exists(db, assignee_id):
+        return
+    # Assignees are rows of the owner's shard; a user elsewhere can't be one.
+    if await user_exists_on_other_shard(assignee_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Assignee is on another shard; tasks can only be assigned to users on the same shard",
+        )
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Assignee not found",
+    )
+
+
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     project_id: str,
     task_data: TaskCreate,
+    request: Request,
+    idempotency_key: str | None = Header(default=None, max_length=255),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
+    if idempotency_key:
+        replay = await claim_idempotency_key(db, request, current_user.id, idempotency_key)
+        if replay is not None:
+            return replay
+    
     await get_project_or_404(project_id, current_user, db)
     
     # Validate assignee exists if provided
     if task_data.assignee_id:
-        result = await db.execute(
-            select(User).where(User.id == task_data.assignee_id)
-        )
-        if not result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Assignee not found",
-            )
+        await check_assignee(db, task_data.assignee_id)
     
+    change_seq = await next_change_seq(db, project_id)
+    rank = rank_between(await last_rank(db, project_id), None)
+    if not rank_fits(rank):
+        # Too long for the column: rebalance now rather than wait for the job.
+        await rebalance_ranks_now(db, project_id)
+        change_seq = await next_change_seq(db, project_id)
+        rank = rank_between(await last_rank(db, project_id), None)
     task = Task(
         title=task_data.title,
         description=task_data.description,
@@ -65,54 +138,91 @@ async def create_task(
         due_date=task_data.due_date,
         project_id=project_id,
         assignee_id=task_data.assignee_id,
+        change_seq=change_seq,
+        rank=rank,
     )
     db.add(task)
     await db.flush()
     await db.refresh(task)
+    response = TaskResponse.model_validate(task)
+    if idempotency_key:
+        await store_idempotent_response(db, current_user.id, idempotency_key, status.HTTP_201_CREATED, response)
+    publish_task_event(db, "task.created", project_id, response.model_dump_json(), current_user.id)
     return task
 
 
-@router.get("", response_model=TaskListResponse)
+@router.get("", response_model=TaskListResponse, response_model_exclude_unset=True)
 async def list_tasks(
     project_id: str,
     page: int = Query(default=1, ge=1, description="Page number"),
     per_page: int = Query(default=10, ge=1, le=100, description="Items per page"),
-    status: TaskStatus | None = Query(default=None),
-    priority: TaskPriority | None = Query(default=None),
-    sort_by: str = Query(default="created_at", pattern="^(created_at|due_date|priority)$"),
+    status: str | None = Query(default=None, description="Comma-separated statuses, e.g. todo,in_progress"),
+    priority: str | None = Query(default=None, description="Comma-separated priorities"),
+    assignee_id: str | None = Query(default=None, description="Comma-separated user ids; 'unassigned' for none"),
+    due_after: datetime | None = Query(default=None, description="Due at or after this time"),
+    due_before: datetime | None = Query(default=None, description="Due before this time"),
+    overdue: bool | None = Query(default=None, description="Past due and not done"),
+    created_since: datetime | None = Query(default=None, description="Created at or after this time"),
+    sort_by: str = Query(default="created_at", pattern="^(created_at|due_date|priority|rank)$"),
     order: str = Query(default="desc", pattern="^(asc|desc)$"),
+    fields: tuple[str, ...] = Depends(field_selector(TASK_FIELDS, TASK_LIST_FIELDS)),
+    include_archived: bool = Query(default=False, description="Include archived DONE tasks"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     await get_project_or_404(project_id, current_user, db)
     
-    # Base query
-    base_query = select(Task).where(Task.project_id == project_id)
-    
     # Apply filters
-    if status:
-        base_query = base_query.where(Task.status == status)
-    if priority:
-        base_query = base_query.where(Task.priority == priority)
+    parsed = parse_task_filters(
+        ("query",),
+        status=status,
+        priority=priority,
+        assignee_id=assignee_id,
+        due_after=due_after,
+        due_before=due_before,
+        overdue=overdue,
+        created_since=created_since,
+    )
+    now = datetime.now(timezone.utc)
+
+    def filters(model):
+        return [model.project_id == project_id, *TASK_FILTERS.conditions(model, parsed, now)]
+    
+    sources = [Task, ArchivedTask] if include_archived else [Task]
     
     # Get total count
-    count_query = select(func.count()).select_from(base_query.subquery())
-    count_result = await db.execute(count_query)
-    total = count_result.scalar()
+    total = 0
+    for model in sources:
+        count_result = await db.execute(select(func.count()).select_from(model).where(*filters(model)))
+        total += count_result.scalar()
+    
+    # Select only the requested columns; rows are serialized without building ORM objects
+    if include_archived:
+        # Sort and page over both tables together.
+        columns = tuple(dict.fromkeys((*fields, sort_by, "id")))
+        combined = union_all(
+            *(select(*(getattr(model, name) for name in columns)).where(*filters(model)) for model in sources)
+        ).subquery()
+        base_query = select(*(combined.c[name] for name in fields))
+        sort_column, id_column = combined.c[sort_by], combined.c.id
+    else:
+        base_query = select(*(getattr(Task, name) for name in fields)).where(*filters(Task))
+        sort_column, id_column = getattr(Task, sort_by), Task.id
     
     # Apply sorting
-    sort_column = getattr(Task, sort_by)
     if order == "desc":
         base_query = base_query.order_by(sort_column.desc())
     else:
         base_query = base_query.order_by(sort_column.asc())
+    # Ties (same rank, due date, priority) are broken by id so pages are stable.
+    base_query = base_query.order_by(id_column)
     
     # Apply pagination
     offset = (page - 1) * per_page
     base_query = base_query.offset(offset).limit(per_page)
     
     result = await db.execute(base_query)
-    tasks = result.scalars().all()
+    tasks = [dict(row) for row in result.mappings()]
     
     return TaskListResponse(
         tasks=tasks,
@@ -123,6 +233,155 @@ async def list_tasks(
     )
 
 
+@router.get("/changes", response_model=TaskChangesResponse)
+async def list_task_changes(
+    project_id: str,
+    since: str = Query(default="0", description="Cursor from a previous sync, 0 for a full sync"),
+    limit: int = Query(default=500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    project = await get_project_or_404(project_id, current_user, db)
+
+    cursor = parse_cursor(since)
+    if cursor is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    since_seq, since_id = cursor
+    if 0 < since_seq < project.min_change_seq:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor expired, full resync required",
+        )
+
+    changes = await fetch_changes(db, project_id, since_seq, since_id, limit + 1)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    return TaskChangesResponse(
+        changes=[
+            TaskChange(
+                op="upsert" if task is not None else "delete",
+                seq=seq,
+                task_id=task_id,
+                task=task,
+            )
+            for seq, task_id, task in changes
+        ],
+        cursor=format_cursor(*changes[-1][:2]) if changes else since,
+        has_more=has_more,
+    )
+
+
+@router.post("/bulk-move", response_model=TaskBulkResponse)
+async def bulk_move_tasks(
+    project_id: str,
+    move: TaskBulkMove,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    target_id = move.target_project_id
+    if target_id == project_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Source and target project are the same",
+        )
+    result = await db.execute(
+        select(func.count())
+        .select_from(Project)
+        .where(Project.id.in_([project_id, target_id]), Project.owner_id == current_user.id)
+    )
+    if result.scalar() != 2:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found",
+        )
+    conditions = bulk_conditions(project_id, move.filter)
+
+    # Both project rows are locked, always in the same order so two opposite
+    # moves cannot deadlock. Every moved task gets one new sequence in the
+    # target and a tombstone in the source, which delta sync sees as a delete.
+    seqs = {pid: await next_change_seq(db, pid) for pid in sorted((project_id, target_id))}
+    await db.execute(
+        insert(TaskTombstone).from_select(
+            ["project_id", "task_id", "change_seq"],
+            select(literal(project_id), Task.id, literal(seqs[project_id])).where(*conditions),
+        )
+    )
+    # Moved tasks go to the end of the target board in their old order. The
+    # n-th gets a key after the target's last rank followed by 10n + 5 in
+    # decimal, padded to one width: fresh ranks that sort in order, leave room
+    # between neighbours and don't grow with the old ones.
+    result = await db.execute(select(func.count()).select_from(Task).where(*conditions))
+    padding = 10 ** len(str(10 * result.scalar() + 5))
+    prefix = rank_between(await last_rank(db, target_id), None)
+    if not rank_fits(prefix + str(padding)):
+        await rebalance_ranks_now(db, target_id)
+        prefix = rank_between(await last_rank(db, target_id), None)
+    moved = (
+        select(Task.id, func.row_number().over(order_by=(Task.rank, Task.id)).label("position"))
+        .where(*conditions)
+        .subquery()
+    )
+    position = cast(padding + moved.c.position * 10 + 5, String)
+    result = await db.execute(
+        update(Task)
+        .where(Task.id == moved.c.id)
+        .values(project_id=target_id, rank=literal(prefix) + position, change_seq=seqs[target_id])
+        .execution_options(synchronize_session=False)
+    )
+    affected = result.rowcount
+    if affected:
+        if len(prefix) + len(str(padding)) > get_settings().rank_rebalance_length:
+            await schedule_rebalance(db, target_id, current_user.id)
+        # The moved tasks are exactly the target's tasks at this sequence.
+        await record_task_events(
+            db,
+            "task.moved",
+            Task.project_id == target_id,
+            Task.change_seq == seqs[target_id],
+            columns=("rank",),
+            data={"from_project_id": project_id},
+        )
+        data = json.dumps({"affected": affected})
+        broadcast_task_event(db, "tasks.bulk_updated", project_id, data)
+        broadcast_task_event(db, "tasks.bulk_updated", target_id, data)
+    return TaskBulkResponse(affected=affected)
+
+
+@router.post("/bulk-update", response_model=TaskBulkResponse)
+async def bulk_update_tasks(
+    project_id: str,
+    changes: TaskBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    await get_project_or_404(project_id, current_user, db)
+    conditions = bulk_conditions(project_id, changes.filter)
+
+    values = changes.model_dump(include={"status", "priority"}, exclude_none=True)
+    seq = await next_change_seq(db, project_id)
+    result = await db.execute(
+        update(Task)
+        .where(*conditions)
+        .values(**values, change_seq=seq)
+        .execution_options(synchronize_session=False)
+    )
+    affected = result.rowcount
+    if affected:
+        await record_task_events(
+            db,
+            "task.updated",
+            Task.project_id == project_id,
+            Task.change_seq == seq,
+            data=changes.model_dump(mode="json", include={"status", "priority"}, exclude_none=True),
+        )
+        broadcast_task_event(db, "tasks.bulk_updated", project_id, json.dumps({"affected": affected}))
+    return TaskBulkResponse(affected=affected)
+
+
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     project_id: str,
@@ -132,13 +391,8 @@ async def get_task(
 ):
     await get_project_or_404(project_id, current_user, db)
     
-    result = await db.execute(
-        select(Task).where(
-            Task.id == task_id,
-            Task.project_id == project_id,
-        )
-    )
-    task = result.scalar_one_or_none()
+    # Archived tasks are still readable, just not editable.
+    task = await get_project_task(db, project_id, task_id) or await get_archived_task(db, project_id, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -157,13 +411,7 @@ async def update_task(
 ):
     await get_project_or_404(project_id, current_user, db)
     
-    result = await db.execute(
-        select(Task).where(
-            Task.id == task_id,
-            Task.project_id == project_id,
-        )
-    )
-    task = result.scalar_one_or_none()
+    task = await get_project_task(db, project_id, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -172,21 +420,65 @@ async def update_task(
     
     # Validate assignee exists if provided
     if task_data.assignee_id:
-        assignee_result = await db.execute(
-            select(User).where(User.id == task_data.assignee_id)
-        )
-        if not assignee_result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Assignee not found",
-            )
+        await check_assignee(db, task_data.assignee_id)
     
     update_data = task_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(task, field, value)
+    task.change_seq = await next_change_seq(db, project_id)
+    
+    await db.flush()
+    await db.refresh(task)
+    publish_task_event(db, "task.updated", project_id, TaskResponse.model_validate(task).model_dump_json(), current_user.id)
+    return task
+
+
+@router.post("/{task_id}/move", response_model=TaskResponse)
+async def move_task(
+    project_id: str,
+    task_id: str,
+    move: TaskMove,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    await get_project_or_404(project_id, current_user, db)
+    
+    task = await get_project_task(db, project_id, task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found",
+        )
+    
+    # Taking the sequence first locks the project row, so the neighbours'
+    # ranks cannot change (or be rebalanced) before this move commits.
+    task.change_seq = await next_change_seq(db, project_id)
+    try:
+        rank = await rank_for_move(db, project_id, task.id, move.after_id, move.before_id)
+        if not rank_fits(rank):
+            # Too long for the column: rebalance now rather than wait for the job.
+            await rebalance_ranks_now(db, project_id)
+            task.change_seq = await next_change_seq(db, project_id)
+            rank = await rank_for_move(db, project_id, task.id, move.after_id, move.before_id)
+        task.rank = rank
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Neighbour task not found",
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        )
+    if move.status is not None:
+        task.status = move.status
     
     await db.flush()
     await db.refresh(task)
+    if len(task.rank) > get_settings().rank_rebalance_length:
+        await schedule_rebalance(db, project_id, current_user.id)
+    publish_task_event(db, "task.updated", project_id, TaskResponse.model_validate(task).model_dump_json(), current_user.id)
     return task
 
 
@@ -199,13 +491,7 @@ async def delete_task(
 ):
     await get_project_or_404(project_id, current_user, db)
     
-    result = await db.execute(
-        select(Task).where(
-            Task.id == task_id,
-            Task.project_id == project_id,
-        )
-    )
-    task = result.scalar_one_or_none()
+    task = await get_project_task(db, project_id, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -213,4 +499,22 @@ async def delete_task(
         )
     
     await db.delete(task)
-    return None
\ No newline at end of file
+    await record_task_deleted(db, project_id, task.id)
+    publish_task_event(db, "task.deleted", project_id, json.dumps({"id": task.id}), current_user.id)
+    return None
+
+
+@lookup_router.post("/multi-get", response_model=TaskMultiGetResponse)
+async def multi_get_tasks(
+    lookup: TaskMultiGet,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    # One query for all ids; ownership is checked in the same join, so tasks in
+    # other users' projects look the same as ids that do not exist.
+    task_ids = list(dict.fromkeys(lookup.ids))
+    found = {task["id"]: task for task in await get_owned_tasks(db, current_user.id, task_ids)}
+    return TaskMultiGetResponse(
+        tasks=[found[task_id] for task_id in task_ids if task_id in found],
+        missing=[task_id for task_id in task_ids if task_id not in found],
+    )
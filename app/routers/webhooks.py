@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from app.database import get_db
+from app.dependencies import get_current_active_user
+from app.models.user import User
+from app.models.webhook import WebhookEndpoint, WebhookDelivery
+from app.schemas.webhook import WebhookCreate, WebhookResponse, WebhookCreatedResponse
+from app.services.webhooks import check_url_target
+import secrets
+
+router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+
+
+@router.post("", response_model=WebhookCreatedResponse, status_code=status.HTTP_201_CREATED)
+async def create_webhook(
+    webhook_data: WebhookCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    refused = await check_url_target(webhook_data.url)
+    if refused:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=refused,
+        )
+    endpoint = WebhookEndpoint(owner_id=current_user.id, url=webhook_data.url, secret=secrets.token_hex(32))
+    db.add(endpoint)
+    await db.flush()
+    await db.refresh(endpoint)
+    return endpoint
+
+
+@router.get("", response_model=list[WebhookResponse])
+async def list_webhooks(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    result = await db.execute(
+        select(WebhookEndpoint)
+        .where(WebhookEndpoint.owner_id == current_user.id)
+        .order_by(WebhookEndpoint.created_at)
+    )
+    return result.scalars().all()
+
+
+@router.delete("/{webhook_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_webhook(
+    webhook_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    endpoint = await db.get(WebhookEndpoint, webhook_id)
+    if endpoint is None or endpoint.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook not found",
+        )
+    # Undelivered events for it are dropped.
+    await db.execute(delete(WebhookDelivery).where(WebhookDelivery.endpoint_id == endpoint.id))
+    await db.delete(endpoint)
+    return None
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Literal
+
+
+# Request schemas
+class BatchItem(BaseModel):
+    id: str | None = None
+    method: Literal["GET", "POST", "PUT", "DELETE"] = "GET"
+    path: str = Field(min_length=1, description="Path with optional query string, e.g. /projects?page=2")
+    body: Any = None
+
+    @field_validator("path")
+    @classmethod
+    def check_path(cls, v):
+        route = v.split("?", 1)[0]
+        if not route.startswith("/"):
+            raise ValueError("path must start with /")
+        if route.startswith("/batch") or route.rstrip("/").endswith("/events"):
+            raise ValueError("batch and event stream endpoints cannot be batched")
+        return v
+
+
+class BatchRequest(BaseModel):
+    requests: list[BatchItem] = Field(min_length=1)
+    concurrent: bool = False
+
+
+# Response schemas
+class BatchResult(BaseModel):
+    id: str | None
+    status: int
+    body: Any
+
+
+class BatchResponse(BaseModel):
+    responses: list[BatchResult]
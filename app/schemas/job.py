@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from app.models.job import JobStatus
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    progress: int
+    project_id: str | None
+    result: dict | None
+    error: str | None
+    created_at: datetime
+    updated_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
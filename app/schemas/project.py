@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from app.schemas.common import PaginatedResponse
+from app.schemas.task import TaskFieldsResponse
 
 
 # Request schemas
@@ -14,6 +15,14 @@ class ProjectUpdate(BaseModel):
     description: str | None = None
 
 
+class ProjectDuplicate(BaseModel):
+    # Defaults to "<name> (copy)".
+    name: str | None = Field(default=None, min_length=1, max_length=100)
+    reset_status: bool = Field(default=False, description="Set every copied task to todo")
+    due_date_shift_days: int = Field(default=0, ge=-3650, le=3650, description="Move due dates by this many days")
+    clear_assignees: bool = False
+
+
 # Response schemas
 class ProjectResponse(BaseModel):
     id: str
@@ -27,5 +36,24 @@ class ProjectResponse(BaseModel):
         from_attributes = True
 
 
+class ProjectDuplicateResponse(ProjectResponse):
+    tasks_copied: int
+
+
+class ProjectFieldsResponse(BaseModel):
+    id: str
+    name: str | None = None
+    description: str | None = None
+    owner_id: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    # Only present with ``include=tasks_preview``.
+    tasks_preview: list[TaskFieldsResponse] | None = None
+
+
+PROJECT_FIELDS = tuple(ProjectResponse.model_fields)
+PROJECT_LIST_FIELDS = tuple(name for name in PROJECT_FIELDS if name != "description")
+
+
 class ProjectListResponse(PaginatedResponse):
-    projects: list[ProjectResponse]
\ No newline at end of file
+    projects: list[ProjectFieldsResponse]
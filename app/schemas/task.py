@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Literal
 from datetime import datetime
 from app.models.task import TaskStatus, TaskPriority
 from app.schemas.common import PaginatedResponse
@@ -36,6 +37,47 @@ class TaskUpdate(BaseModel):
         return v
 
 
+class TaskMultiGet(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=500)
+
+
+# The list filters of GET /projects/{id}/tasks, as a request body, plus
+# explicit ids. An empty filter selects every task in the project.
+class TaskFilter(BaseModel):
+    ids: list[str] | None = Field(default=None, min_length=1, max_length=5000)
+    status: str | None = None
+    priority: str | None = None
+    assignee_id: str | None = None
+    due_after: datetime | None = None
+    due_before: datetime | None = None
+    overdue: bool | None = None
+    created_since: datetime | None = None
+
+
+class TaskBulkMove(BaseModel):
+    target_project_id: str
+    filter: TaskFilter = Field(default_factory=TaskFilter)
+
+
+class TaskBulkUpdate(BaseModel):
+    filter: TaskFilter = Field(default_factory=TaskFilter)
+    status: TaskStatus | None = None
+    priority: TaskPriority | None = None
+
+    @model_validator(mode="after")
+    def check_changes(self):
+        if self.status is None and self.priority is None:
+            raise ValueError("Set status and/or priority")
+        return self
+
+
+class TaskMove(BaseModel):
+    # Neighbours as the client sees them; leave one out to move to the start or end.
+    after_id: str | None = None
+    before_id: str | None = None
+    status: TaskStatus | None = None
+
+
 # Response schemas
 class TaskResponse(BaseModel):
     id: str
@@ -46,6 +88,7 @@ class TaskResponse(BaseModel):
     due_date: datetime | None
     project_id: str
     assignee_id: str | None
+    rank: str
     created_at: datetime
     updated_at: datetime
 
@@ -53,5 +96,51 @@ class TaskResponse(BaseModel):
         from_attributes = True
 
 
+# List items carry only the fields the client asked for (see ``fields=``);
+# unset fields are dropped from the response.
+class TaskFieldsResponse(BaseModel):
+    id: str
+    title: str | None = None
+    description: str | None = None
+    status: TaskStatus | None = None
+    priority: TaskPriority | None = None
+    due_date: datetime | None = None
+    project_id: str | None = None
+    assignee_id: str | None = None
+    rank: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+# Descriptions can be large, so lists leave them out unless requested.
+TASK_LIST_FIELDS = tuple(name for name in TASK_FIELDS if name != "description")
+# Tasks embedded in project listings with ``include=tasks_preview``.
+TASK_PREVIEW_FIELDS = ("id", "title", "status", "priority", "due_date", "assignee_id", "rank")
+
+
 class TaskListResponse(PaginatedResponse):
-    tasks: list[TaskResponse]
\ No newline at end of file
+    tasks: list[TaskFieldsResponse]
+
+
+class TaskBulkResponse(BaseModel):
+    affected: int
+
+
+class TaskMultiGetResponse(BaseModel):
+    tasks: list[TaskResponse]
+    # Requested ids that do not exist or belong to another user's project.
+    missing: list[str]
+
+
+class TaskChange(BaseModel):
+    op: Literal["upsert", "delete"]
+    seq: int
+    task_id: str
+    task: TaskResponse | None = None
+
+
+class TaskChangesResponse(BaseModel):
+    changes: list[TaskChange]
+    cursor: str
+    has_more: bool
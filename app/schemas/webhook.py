@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from urllib.parse import urlsplit
+
+
+# Request schemas
+class WebhookCreate(BaseModel):
+    url: str = Field(min_length=1, max_length=2000)
+
+    @field_validator("url")
+    @classmethod
+    def check_url(cls, v):
+        parts = urlsplit(v)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError("url must be an absolute http(s) URL")
+        return v
+
+
+# Response schemas
+class WebhookResponse(BaseModel):
+    id: str
+    url: str
+    is_active: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class WebhookCreatedResponse(WebhookResponse):
+    # Only returned once; used to check X-Webhook-Signature.
+    secret: str
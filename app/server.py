@@ -0,0 +1,58 @@
+import importlib.util
+import logging
+import uvicorn
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def worker_count(configured: int | None = None, shared_rate_limits: bool = False) -> int:
+    # One worker unless asked for more. The event broker (SSE and its replay
+    # buffer), idempotency coalescing and the in-memory rate limiter all live
+    # in one process, so with several workers live events only reach clients
+    # on the same worker, and in-memory limits would be multiplied by the
+    # worker count. More workers therefore need Redis-backed rate limits.
+    workers = configured or 1
+    if workers > 1 and not shared_rate_limits:
+        raise SystemExit("WEB_CONCURRENCY > 1 requires RATE_LIMIT_REDIS_URL (shared rate limits)")
+    return workers
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def main() -> None:
+    settings = get_settings()
+    workers = worker_count(settings.web_concurrency, bool(settings.rate_limit_redis_url))
+
+    # Import the app once up front so a broken import or bad settings fails
+    # here instead of in every worker.
+    from app.main import app
+
+    if workers > 1:
+        logger.warning("Running %d workers: live events and their replay are per worker", workers)
+    logger.info("Starting %d worker(s) with %s/%s", workers, event_loop(), http_protocol())
+    uvicorn.run(
+        "app.main:app" if workers > 1 else app,
+        host=settings.host,
+        port=settings.port,
+        workers=workers,
+        loop=event_loop(),
+        http=http_protocol(),
+        proxy_headers=True,
+        # SIGTERM stops accepting connections and lets in-flight requests
+        # finish for up to this long before the lifespan shutdown runs.
+        timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+        access_log=False,
+        # Leave uvicorn's own loggers to the app's queue-based setup.
+        log_config=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+from datetime import datetime
+from itertools import groupby
+from sqlalchemy import select, insert, delete, literal
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from app.models.task import Task, TaskStatus, ArchivedTask, TaskTombstone, TASK_STATUS_ORDINALS
+from app.services.changes import next_change_seq
+from app.services.outbox import record_task_events
+
+TASK_COLUMNS = [column.name for column in Task.__table__.columns]
+
+
+async def archive_done_tasks(session_factory, older_than: datetime, batch_size: int) -> int:
+    # Moves DONE tasks last touched before ``older_than`` into archived_tasks.
+    # Each batch is one transaction, so readers always find a task in exactly
+    # one of the two tables and an interrupted run simply resumes. To delta
+    # sync an archived task is a delete, so each batch leaves tombstones, and
+    # webhooks get a task.archived event per task.
+    archived = 0
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(Task.id, Task.project_id)
+                .where(Task.status == TaskStatus.DONE, Task.updated_at < older_than)
+                .order_by(Task.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            task_ids = [row.id for row in rows]
+            # Projects in a fixed order, so concurrent runs take the row locks alike.
+            by_project = sorted(rows, key=lambda row: row.project_id)
+            for project_id, project_rows in groupby(by_project, key=lambda row: row.project_id):
+                seq = await next_change_seq(session, project_id)
+                await session.execute(
+                    insert(TaskTombstone).from_select(
+                        ["project_id", "task_id", "change_seq"],
+                        select(Task.project_id, Task.id, literal(seq)).where(
+                            Task.id.in_([row.id for row in project_rows])
+                        ),
+                    )
+                )
+            await record_task_events(session, "task.archived", Task.id.in_(task_ids))
+            await session.execute(
+                insert(ArchivedTask).from_select(
+                    TASK_COLUMNS,
+                    select(*(getattr(Task, name) for name in TASK_COLUMNS)).where(Task.id.in_(task_ids)),
+                )
+            )
+            await session.execute(delete(Task).where(Task.id.in_(task_ids)))
+            await session.commit()
+        archived += len(task_ids)
+    return archived
+
+
+def partition_statements(by: str, years: range | None = None) -> list[str]:
+    # Postgres DDL that rebuilds ``tasks`` as a declaratively partitioned table,
+    # as an alternative to the archive table: by status (open / done) or by
+    # created_at year. The primary key has to include the partition key. It
+    # runs in one transaction and holds an exclusive lock while rows are copied,
+    # so it is meant for a maintenance window.
+    dialect = postgresql.dialect()
+    statements = ["CREATE TABLE tasks_partitioned (LIKE tasks INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"]
+    if by == "status":
+        done = dict(TASK_STATUS_ORDINALS)[TaskStatus.DONE]
+        open_values = ", ".join(str(ordinal) for member, ordinal in TASK_STATUS_ORDINALS if member != TaskStatus.DONE)
+        statements[0] += " PARTITION BY LIST (status)"
+        statements += [
+            "ALTER TABLE tasks_partitioned ADD PRIMARY KEY (id, status)",
+            f"CREATE TABLE tasks_open PARTITION OF tasks_partitioned FOR VALUES IN ({open_values})",
+            f"CREATE TABLE tasks_done PARTITION OF tasks_partitioned FOR VALUES IN ({done})",
+        ]
+    elif by == "created_at":
+        statements[0] += " PARTITION BY RANGE (created_at)"
+        statements.append("ALTER TABLE tasks_partitioned ADD PRIMARY KEY (id, created_at)")
+        for year in years or ():
+            statements.append(
+                f"CREATE TABLE tasks_{year} PARTITION OF tasks_partitioned "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+        statements.append("CREATE TABLE tasks_default PARTITION OF tasks_partitioned DEFAULT")
+    else:
+        raise ValueError(f"Unknown partitioning: {by}")
+
+    statements += [
+        "INSERT INTO tasks_partitioned SELECT * FROM tasks",
+        "DROP TABLE tasks",
+        "ALTER TABLE tasks_partitioned RENAME TO tasks",
+        "ALTER TABLE tasks ADD FOREIGN KEY (project_id) REFERENCES projects (id)",
+        "ALTER TABLE tasks ADD FOREIGN KEY (assignee_id) REFERENCES users (id)",
+    ]
+    # Indexes are created on the parent and cascade to every partition.
+    statements += [str(CreateIndex(index).compile(dialect=dialect)) for index in Task.__table__.indexes]
+    return statements
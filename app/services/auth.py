@@ -1,29 +1,69 @@
+import asyncio
+import uuid
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from app import queries
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.utils.security import hash_password, verify_password, create_access_token
+from app.sharding import get_shard_router
+from app.utils.security import hash_password, verify_password, password_needs_update, create_access_token
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
-    result = await db.execute(select(User).where(User.email == email))
-    return result.scalar_one_or_none()
+    # Before login the user's shard is unknown, so every shard is asked.
+    router = get_shard_router()
+    if router is None:
+        return await queries.get_user_by_email(db, email)
+    for name in router.names:
+        async with router.sessionmaker(name)() as session:
+            user = await queries.get_user_by_email(session, email)
+        if user is not None:
+            return user
+    return None
 
 
 async def get_user_by_id(db: AsyncSession, user_id: str) -> User | None:
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+    return await queries.get_user(db, user_id)
 
 
-async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
-    hashed_pw = hash_password(user_data.password)
+def new_user_id(email: str) -> str:
+    # The id decides the shard. Ids stay random, but are drawn until one lands
+    # on the shard the e-mail address hashes to, so every registration of an
+    # address goes to the same shard, where the unique e-mail constraint
+    # settles races between them. Takes about one draw per shard.
+    router = get_shard_router()
+    while True:
+        user_id = str(uuid.uuid4())
+        if router is None or router.shard_for_user(user_id) == router.ring.shard_for(email):
+            return user_id
+
+
+async def user_exists_on_other_shard(user_id: str) -> bool:
+    router = get_shard_router()
+    if router is None:
+        return False
+    async with router.sessionmaker(router.shard_for_user(user_id))() as session:
+        return await queries.user_exists(session, user_id)
+
+
+async def create_user(db: AsyncSession, user_data: UserCreate, user_id: str | None = None) -> User | None:
+    # ``db`` must be the session of the new user's shard (see get_db). Returns
+    # None if the address was registered concurrently. Hashing is deliberately
+    # slow; keep it off the event loop.
+    hashed_pw = await asyncio.to_thread(hash_password, user_data.password)
     user = User(
+        id=user_id or new_user_id(user_data.email),
         email=user_data.email,
         hashed_password=hashed_pw,
         full_name=user_data.full_name,
     )
     db.add(user)
-    await db.flush()
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        return None
     await db.refresh(user)
     return user
 
@@ -32,10 +72,25 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> User
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
         return None
+    if password_needs_update(user.hashed_password):
+        # Made under an older hashing policy; the password is at hand now.
+        await save_password_hash(db, user, await asyncio.to_thread(hash_password, password))
     return user
 
 
+async def save_password_hash(db: AsyncSession, user: User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    router = get_shard_router()
+    if router is None:
+        await db.flush()
+        return
+    # The user was loaded from its shard by get_user_by_email, not through db.
+    async with router.sessionmaker(router.shard_for_user(user.id))() as session:
+        await session.execute(update(User).where(User.id == user.id).values(hashed_password=hashed_password))
+        await session.commit()
+
+
 def create_user_token(user: User) -> str:
-    return create_access_token(data={"sub": user.id})
\ No newline at end of file
+    return create_access_token(data={"sub": user.id})
@@ -0,0 +1,100 @@
+from datetime import datetime
+from sqlalchemy import select, update, delete, insert, func, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.project import Project
+from app.models.task import Task, TaskTombstone
+
+
+async def next_change_seq(db: AsyncSession, project_id: str, count: int = 1) -> int:
+    # The increment takes the project row lock until commit, so sequence order
+    # within a project is commit order, which is what delta sync relies on.
+    # With count > 1 the last of the reserved sequences is returned.
+    result = await db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(change_seq=Project.change_seq + count, updated_at=Project.updated_at)
+        .returning(Project.change_seq)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one()
+
+
+async def record_task_deleted(db: AsyncSession, project_id: str, task_id: str) -> int:
+    seq = await next_change_seq(db, project_id)
+    await db.execute(
+        insert(TaskTombstone).values(project_id=project_id, task_id=task_id, change_seq=seq)
+    )
+    return seq
+
+
+async def fetch_changes(
+    db: AsyncSession,
+    project_id: str,
+    since_seq: int,
+    since_id: str,
+    limit: int,
+) -> list[tuple[int, str, Task | None]]:
+    # Keyset pages over (change_seq, id) in both tables, merged in sequence order.
+    result = await db.execute(
+        select(Task)
+        .where(
+            Task.project_id == project_id,
+            or_(
+                Task.change_seq > since_seq,
+                and_(Task.change_seq == since_seq, Task.id > since_id),
+            ),
+        )
+        .order_by(Task.change_seq, Task.id)
+        .limit(limit)
+    )
+    upserts = [(task.change_seq, task.id, task) for task in result.scalars()]
+
+    result = await db.execute(
+        select(TaskTombstone.change_seq, TaskTombstone.task_id)
+        .where(
+            TaskTombstone.project_id == project_id,
+            or_(
+                TaskTombstone.change_seq > since_seq,
+                and_(TaskTombstone.change_seq == since_seq, TaskTombstone.task_id > since_id),
+            ),
+        )
+        .order_by(TaskTombstone.change_seq, TaskTombstone.task_id)
+        .limit(limit)
+    )
+    deletes = [(seq, task_id, None) for seq, task_id in result.all()]
+
+    return sorted(upserts + deletes, key=lambda change: (change[0], change[1]))[:limit]
+
+
+async def compact_tombstones(db: AsyncSession, older_than: datetime) -> int:
+    # Clients whose cursor predates the compacted range must do a full resync.
+    horizon = (
+        select(func.max(TaskTombstone.change_seq))
+        .where(
+            TaskTombstone.project_id == Project.id,
+            TaskTombstone.deleted_at < older_than,
+        )
+        .scalar_subquery()
+    )
+    affected = select(TaskTombstone.project_id).where(TaskTombstone.deleted_at < older_than)
+    await db.execute(
+        update(Project)
+        .where(Project.id.in_(affected))
+        .values(min_change_seq=horizon, updated_at=Project.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(
+        delete(TaskTombstone).where(TaskTombstone.deleted_at < older_than)
+    )
+    return result.rowcount
+
+
+def parse_cursor(cursor: str) -> tuple[int, str] | None:
+    seq, _, task_id = cursor.partition(":")
+    if not seq.isdigit():
+        return None
+    return int(seq), task_id
+
+
+def format_cursor(seq: int, task_id: str) -> str:
+    return f"{seq}:{task_id}"
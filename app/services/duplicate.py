@@ -0,0 +1,92 @@
+from sqlalchemy import DateTime, Float, String, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from app.models.project import Project
+from app.models.task import Task, TaskStatus
+from app.services.changes import next_change_seq
+
+
+# Task ids are made in Python on insert; a copy done as INSERT ... SELECT has
+# to make them in the database instead.
+class new_uuid(FunctionElement):
+    type = String(36)
+    name = "new_uuid"
+    inherit_cache = True
+
+
+@compiles(new_uuid)
+def _new_uuid(element, compiler, **kw):
+    return "CAST(gen_random_uuid() AS VARCHAR)"
+
+
+@compiles(new_uuid, "sqlite")
+def _new_uuid_sqlite(element, compiler, **kw):
+    return (
+        "lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-4' || substr(hex(randomblob(2)), 2)"
+        " || '-' || substr('89ab', 1 + (abs(random()) % 4), 1) || substr(hex(randomblob(2)), 2)"
+        " || '-' || hex(randomblob(6)))"
+    )
+
+
+class shift_datetime(FunctionElement):
+    type = DateTime(timezone=True)
+    name = "shift_datetime"
+    inherit_cache = True
+
+
+@compiles(shift_datetime)
+def _shift_datetime(element, compiler, **kw):
+    value, seconds = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"({value} + make_interval(secs => {seconds}))"
+
+
+@compiles(shift_datetime, "sqlite")
+def _shift_datetime_sqlite(element, compiler, **kw):
+    # Datetimes are stored as text; keep the fractional seconds as they were.
+    value, seconds = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"(strftime('%Y-%m-%d %H:%M:%S', {value}, printf('%+d seconds', {seconds})) || substr({value}, 20))"
+
+
+async def copy_project(
+    db: AsyncSession,
+    source: Project,
+    name: str,
+    reset_status: bool = False,
+    due_date_shift_days: int = 0,
+    clear_assignees: bool = False,
+) -> tuple[Project, int]:
+    # Copies the project and all of its live tasks (archived ones stay behind)
+    # with a single INSERT ... SELECT, so the size of the template doesn't
+    # change the number of round trips. Ranks are copied, so the board order
+    # is kept. Returns the new project and the number of tasks copied.
+    project = Project(name=name, description=source.description, owner_id=source.owner_id)
+    db.add(project)
+    await db.flush()
+    # One change sequence for the whole copy; delta sync pages by (seq, id).
+    seq = await next_change_seq(db, project.id)
+
+    columns = {
+        "id": new_uuid(),
+        "title": Task.title,
+        "description": Task.description,
+        "status": literal(TaskStatus.TODO, Task.status.type) if reset_status else Task.status,
+        "priority": Task.priority,
+        "due_date": (
+            shift_datetime(Task.due_date, literal(due_date_shift_days * 86400, Float))
+            if due_date_shift_days
+            else Task.due_date
+        ),
+        "project_id": literal(project.id, String),
+        "assignee_id": literal(None, String) if clear_assignees else Task.assignee_id,
+        "change_seq": literal(seq),
+        "rank": Task.rank,
+    }
+    result = await db.execute(
+        insert(Task).from_select(
+            list(columns),
+            select(*(value.label(name) for name, value in columns.items())).where(Task.project_id == source.id),
+        )
+    )
+    await db.refresh(project)
+    return project, result.rowcount
@@ -0,0 +1,125 @@
+import asyncio
+import itertools
+import uuid
+from collections import deque
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import run_after_commit
+from app.services.outbox import record_event
+
+RESET_FRAME = "event: reset\ndata: {}\n\n"
+
+
+class Subscription:
+    def __init__(self, topic: "Topic", maxsize: int):
+        self.topic = topic
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=maxsize)
+        self.backlog: list[str] = []
+
+
+class Topic:
+    def __init__(self, buffer_size: int, evicted_up_to: int = 0):
+        self.buffer: deque[tuple[int, str]] = deque(maxlen=buffer_size)
+        self.evicted_up_to = evicted_up_to
+        self.subscribers: set[Subscription] = set()
+
+
+# Fans task changes out to SSE connections in this process. Frames are
+# formatted once at publish time and shared by every subscriber; a subscriber
+# whose queue fills up is disconnected and resumes from the ring buffer.
+# Event ids are "<epoch>-<n>": the counter is per process, so an id from
+# another process (or from before a restart) is recognised by its epoch and
+# answered with a reset rather than matched against the wrong counter.
+class EventBroker:
+    def __init__(self, buffer_size: int | None = None, queue_size: int | None = None, max_topics: int = 10_000):
+        # Unset sizes are read from settings on first use.
+        self._buffer_size = buffer_size
+        self._queue_size = queue_size
+        self.max_topics = max_topics
+        self._topics: dict[str, Topic] = {}
+        self._ids = itertools.count(1)
+        self.last_id = 0
+        self.epoch = uuid.uuid4().hex[:12]
+
+    @property
+    def buffer_size(self) -> int:
+        return self._buffer_size or get_settings().events_buffer_size
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue_size or get_settings().events_queue_size
+
+    def _topic(self, key: str) -> Topic:
+        topic = self._topics.get(key)
+        if topic is None:
+            if len(self._topics) >= self.max_topics:
+                idle = [k for k, t in self._topics.items() if not t.subscribers]
+                for stale in idle[: max(1, len(idle) // 4)]:
+                    del self._topics[stale]
+            # The key may have had a topic that was evicted, so nothing before
+            # this point can be replayed from it.
+            topic = self._topics[key] = Topic(self.buffer_size, self.last_id)
+        return topic
+
+    def format_id(self, event_id: int) -> str:
+        return f"{self.epoch}-{event_id}"
+
+    def _parse_id(self, value: str) -> int | None:
+        epoch, _, event_id = value.rpartition("-")
+        if epoch != self.epoch or not event_id.isdigit():
+            return None
+        return int(event_id)
+
+    def publish(self, key: str, event_type: str, data: str) -> str:
+        topic = self._topic(key)
+        event_id = self.last_id = next(self._ids)
+        frame = f"id: {self.format_id(event_id)}\nevent: {event_type}\ndata: {data}\n\n"
+        if len(topic.buffer) == topic.buffer.maxlen:
+            topic.evicted_up_to = topic.buffer[0][0]
+        topic.buffer.append((event_id, frame))
+        for subscription in list(topic.subscribers):
+            try:
+                subscription.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+        return self.format_id(event_id)
+
+    def _drop(self, subscription: Subscription) -> None:
+        subscription.topic.subscribers.discard(subscription)
+        # Make room for the end-of-stream marker; the client reconnects with
+        # Last-Event-ID and catches up from the ring buffer.
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def subscribe(self, key: str, last_event_id: str | None = None) -> Subscription:
+        topic = self._topic(key)
+        subscription = Subscription(topic, self.queue_size)
+        if last_event_id is not None:
+            last_seen = self._parse_id(last_event_id)
+            if last_seen is None or last_seen < topic.evicted_up_to or last_seen > self.last_id:
+                # Missed events are gone, or the id came from another process.
+                subscription.backlog.append(RESET_FRAME)
+            else:
+                subscription.backlog.extend(
+                    frame for event_id, frame in topic.buffer if event_id > last_seen
+                )
+        topic.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.topic.subscribers.discard(subscription)
+
+
+broker = EventBroker()
+
+
+def publish_task_event(db: AsyncSession, event_type: str, project_id: str, data: str, owner_id: str) -> None:
+    # The outbox row is part of the transaction itself and feeds webhooks.
+    record_event(db, owner_id, event_type, project_id, data)
+    broadcast_task_event(db, event_type, project_id, data)
+
+
+def broadcast_task_event(db: AsyncSession, event_type: str, project_id: str, data: str) -> None:
+    # Published only once the change is committed, so clients never see rolled-back writes.
+    run_after_commit(db, lambda: broker.publish(project_id, event_type, data))
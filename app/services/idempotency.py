@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.config import get_settings
+from app.database import run_after_commit, run_after_rollback
+from app.models.idempotency import IdempotencyKey
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: dict
+    expires_at: datetime
+
+
+# Completed responses by (owner_id, key), so most replays skip the database.
+class ResponseCache:
+    def __init__(self, maxsize: int | None = None):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, str], StoredResponse] = OrderedDict()
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize or get_settings().idempotency_cache_size
+
+    def get(self, cache_key: tuple[str, str], now: datetime) -> StoredResponse | None:
+        stored = self._entries.get(cache_key)
+        if stored is None:
+            return None
+        if stored.expires_at <= now:
+            del self._entries[cache_key]
+            return None
+        self._entries.move_to_end(cache_key)
+        return stored
+
+    def put(self, cache_key: tuple[str, str], stored: StoredResponse) -> None:
+        self._entries[cache_key] = stored
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+response_cache = ResponseCache()
+# Keys currently being executed in this process; duplicates wait on the event.
+_in_flight: dict[tuple[str, str], asyncio.Event] = {}
+stats = {"executed": 0, "replayed": 0, "coalesced": 0}
+
+metrics.register("idempotency", lambda: {**stats, "cached": len(response_cache._entries)})
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+async def request_fingerprint(request: Request) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.url.path.encode())
+    digest.update(await request.body())
+    return digest.hexdigest()
+
+
+def replay_response(stored: StoredResponse, fingerprint: str) -> JSONResponse:
+    if stored.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    stats["replayed"] += 1
+    return JSONResponse(
+        status_code=stored.status_code,
+        content=stored.body,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def claim_idempotency_key(
+    db: AsyncSession,
+    request: Request,
+    owner_id: str,
+    key: str,
+) -> JSONResponse | None:
+    # Returns the stored response for a replay. Otherwise the key is claimed for
+    # this request and None is returned; the caller runs the handler and then
+    # calls store_idempotent_response in the same transaction.
+    fingerprint = await request_fingerprint(request)
+    cache_key = (owner_id, key)
+    while True:
+        now = datetime.now(timezone.utc)
+        stored = response_cache.get(cache_key, now)
+        if stored is not None:
+            return replay_response(stored, fingerprint)
+        pending = _in_flight.get(cache_key)
+        if pending is None:
+            break
+        # Coalesce onto the request already running; if it fails we run ourselves.
+        stats["coalesced"] += 1
+        await pending.wait()
+
+    record = await db.get(IdempotencyKey, cache_key)
+    if record is not None:
+        if _aware(record.expires_at) > now and record.status_code is not None:
+            stored = StoredResponse(record.fingerprint, record.status_code, record.response_body, _aware(record.expires_at))
+            response_cache.put(cache_key, stored)
+            return replay_response(stored, fingerprint)
+        await db.delete(record)
+        await db.flush()
+
+    expires_at = now + timedelta(hours=get_settings().idempotency_ttl_hours)
+    record = IdempotencyKey(owner_id=owner_id, key=key, fingerprint=fingerprint, expires_at=expires_at)
+    db.add(record)
+    try:
+        # Another process holding the same key blocks this insert until it commits.
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        record = await db.get(IdempotencyKey, cache_key, populate_existing=True)
+        if record is None or record.status_code is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is in progress",
+            )
+        stored = StoredResponse(record.fingerprint, record.status_code, record.response_body, _aware(record.expires_at))
+        return replay_response(stored, fingerprint)
+
+    done = asyncio.Event()
+    _in_flight[cache_key] = done
+
+    def on_commit():
+        if record.status_code is not None:
+            response_cache.put(
+                cache_key,
+                StoredResponse(fingerprint, record.status_code, record.response_body, expires_at),
+            )
+        release()
+
+    def release():
+        if _in_flight.get(cache_key) is done:
+            del _in_flight[cache_key]
+        done.set()
+
+    run_after_commit(db, on_commit)
+    run_after_rollback(db, release)
+    return None
+
+
+async def store_idempotent_response(
+    db: AsyncSession,
+    owner_id: str,
+    key: str,
+    status_code: int,
+    body: BaseModel,
+) -> None:
+    record = await db.get(IdempotencyKey, (owner_id, key))
+    record.status_code = status_code
+    record.response_body = body.model_dump(mode="json")
+    await db.flush()
+    stats["executed"] += 1
+
+
+async def purge_expired_keys(db: AsyncSession, now: datetime) -> int:
+    result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    return result.rowcount
@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import run_after_commit
+from app.sharding import sessions_for_user, all_sessionmakers
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job_handler(kind: str):
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    def __init__(self, job: Job, session_factory):
+        self.job_id = job.id
+        self.owner_id = job.owner_id
+        self.project_id = job.project_id
+        self.params = job.params or {}
+        self.session_factory = session_factory
+
+    async def report_progress(self, done: int, total: int) -> None:
+        # One round trip both records progress and picks up cancellation requests.
+        progress = 100 if total <= 0 else min(99, done * 100 // total)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values(progress=progress)
+                .returning(Job.cancel_requested)
+            )
+            cancel_requested = result.scalar_one()
+            await session.commit()
+        if cancel_requested:
+            raise JobCancelled()
+
+
+class JobQueue:
+    def __init__(self, workers: int | None = None, maxsize: int | None = None, session_factory=None):
+        # Unset values come from settings (and the app's engine) when the queue first starts.
+        self.workers = workers
+        self.maxsize = maxsize
+        self.session_factory = session_factory
+        # Every process runs a queue; a job is run by whichever claims it first
+        # and stays claimed while its lease is renewed.
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._pending: set[str] = set()
+
+    def sessions(self, owner_id: str | None = None):
+        # Jobs live on their owner's shard.
+        return self.session_factory or sessions_for_user(owner_id)
+
+    def all_sessions(self) -> list:
+        return [self.session_factory] if self.session_factory else all_sessionmakers()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def has_capacity(self) -> bool:
+        return self._queue is None or not self._queue.full()
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        settings = get_settings()
+        self._queue = asyncio.Queue(maxsize=self.maxsize or settings.job_queue_size)
+        workers = self.workers or settings.job_workers
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    async def start(self) -> None:
+        self._ensure_started()
+        await self.resume()
+        self._tasks.append(asyncio.create_task(self._resume_periodically()))
+
+    async def resume(self) -> None:
+        # Picks up queued jobs and running jobs whose lease has expired (their
+        # process died). Handlers are written to be restartable, so a job
+        # interrupted mid-run simply runs again.
+        now = datetime.now(timezone.utc)
+        for sessions in self.all_sessions():
+            async with sessions() as session:
+                result = await session.execute(
+                    select(Job.id, Job.owner_id)
+                    .where(
+                        or_(
+                            Job.status == JobStatus.QUEUED,
+                            and_(
+                                Job.status == JobStatus.RUNNING,
+                                or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now),
+                            ),
+                        )
+                    )
+                    .order_by(Job.created_at)
+                )
+                for job_id, owner_id in result.all():
+                    self.enqueue(job_id, owner_id)
+
+    async def _resume_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(get_settings().job_lease_seconds)
+            try:
+                await self.resume()
+            except Exception:
+                logger.exception("Resuming jobs failed")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._pending.clear()
+
+    def enqueue(self, job_id: str, owner_id: str | None = None) -> None:
+        self._ensure_started()
+        if job_id in self._pending:
+            return
+        try:
+            self._queue.put_nowait((job_id, owner_id))
+        except asyncio.QueueFull:
+            # The job stays QUEUED in the database and is picked up by the next resume().
+            logger.warning("Job queue full, job %s deferred", job_id)
+        else:
+            self._pending.add(job_id)
+
+    async def submit(
+        self,
+        db: AsyncSession,
+        kind: str,
+        owner_id: str,
+        project_id: str | None = None,
+        params: dict | None = None,
+    ) -> Job:
+        if kind not in _handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(kind=kind, owner_id=owner_id, project_id=project_id, params=params or {})
+        db.add(job)
+        await db.flush()
+        await db.refresh(job)
+        # Workers use their own sessions, so the row must be committed before they look.
+        run_after_commit(db, lambda: self.enqueue(job.id, owner_id))
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, owner_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                await self._run(job_id, self.sessions(owner_id))
+            except Exception:
+                logger.exception("Job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _set_state(self, sessions, job_id: str, **values) -> None:
+        # Only while we still hold the job; a job whose lease lapsed belongs
+        # to whoever claimed it next.
+        async with sessions() as session:
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.lease_owner == self.holder)
+                .values(**values, lease_expires_at=None)
+            )
+            await session.commit()
+
+    async def _claim(self, sessions, job_id: str) -> Job | None:
+        # A single UPDATE, so two processes can never both claim the job.
+        now = datetime.now(timezone.utc)
+        async with sessions() as session:
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatus.QUEUED, Job.cancel_requested.is_(True))
+                .values(status=JobStatus.CANCELLED, finished_at=now)
+            )
+            result = await session.execute(
+                update(Job)
+                .where(
+                    Job.id == job_id,
+                    Job.cancel_requested.is_(False),
+                    or_(
+                        Job.status == JobStatus.QUEUED,
+                        and_(
+                            Job.status == JobStatus.RUNNING,
+                            or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now),
+                        ),
+                    ),
+                )
+                .values(
+                    status=JobStatus.RUNNING,
+                    started_at=now,
+                    lease_owner=self.holder,
+                    lease_expires_at=now + timedelta(seconds=get_settings().job_lease_seconds),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            if result.rowcount != 1:
+                return None
+            return await session.get(Job, job_id)
+
+    async def _heartbeat(self, sessions, job_id: str) -> None:
+        lease = get_settings().job_lease_seconds
+        while True:
+            await asyncio.sleep(lease / 3)
+            try:
+                async with sessions() as session:
+                    result = await session.execute(
+                        update(Job)
+                        .where(Job.id == job_id, Job.lease_owner == self.holder, Job.status == JobStatus.RUNNING)
+                        .values(lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=lease))
+                    )
+                    await session.commit()
+                if result.rowcount == 0:
+                    logger.warning("Lost the lease on job %s", job_id)
+                    return
+            except Exception:
+                logger.exception("Could not renew the lease on job %s", job_id)
+
+    async def _run(self, job_id: str, sessions) -> None:
+        job = await self._claim(sessions, job_id)
+        if job is None:
+            return
+        context = JobContext(job, sessions)
+
+        handler = _handlers[job.kind]
+        heartbeat = asyncio.create_task(self._heartbeat(sessions, job_id))
+        try:
+            result = await handler(context)
+        except JobCancelled:
+            await self._set_state(sessions, job_id, status=JobStatus.CANCELLED, finished_at=datetime.now(timezone.utc))
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job_id, job.kind)
+            await self._set_state(
+                sessions,
+                job_id,
+                status=JobStatus.FAILED,
+                error=str(exc),
+                finished_at=datetime.now(timezone.utc),
+            )
+        else:
+            await self._set_state(
+                sessions,
+                job_id,
+                status=JobStatus.SUCCEEDED,
+                progress=100,
+                result=result,
+                finished_at=datetime.now(timezone.utc),
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def join(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+
+job_queue = JobQueue()
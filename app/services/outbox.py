@@ -0,0 +1,40 @@
+import json
+from sqlalchemy import insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.project import Project
+from app.models.task import Task
+from app.models.webhook import OutboxEvent
+
+
+def record_event(db: AsyncSession, owner_id: str, event_type: str, project_id: str | None, data: str) -> None:
+    # Added to the caller's session, so the event commits (or rolls back)
+    # together with the change it describes. ``data`` is a JSON document.
+    db.add(OutboxEvent(owner_id=owner_id, project_id=project_id, event_type=event_type, payload=data))
+
+
+async def record_task_events(
+    db: AsyncSession,
+    event_type: str,
+    *conditions,
+    columns: tuple[str, ...] = (),
+    data: dict | None = None,
+) -> int:
+    # One event per task matching ``conditions``, written with an INSERT ...
+    # SELECT so bulk changes never load the tasks. The payload holds the
+    # task's id and project_id, the given string ``columns`` as stored, and
+    # ``data``, which is the same for every task. Ids and ranks need no JSON
+    # escaping, so the document is put together in SQL.
+    payload = literal('{"id": "') + Task.id + literal('", "project_id": "') + Task.project_id
+    for name in columns:
+        payload = payload + literal(f'", "{name}": "') + getattr(Task, name)
+    extra = json.dumps(data or {})[1:-1]
+    payload = payload + literal('"' + (f", {extra}" if extra else "") + "}")
+    result = await db.execute(
+        insert(OutboxEvent).from_select(
+            ["owner_id", "project_id", "event_type", "payload"],
+            select(Project.owner_id, Task.project_id, literal(event_type), payload)
+            .join(Project, Project.id == Task.project_id)
+            .where(*conditions),
+        )
+    )
+    return result.rowcount
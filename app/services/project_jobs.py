@@ -0,0 +1,121 @@
+import json
+from sqlalchemy import select, delete, func
+from app.config import get_settings
+from app.models.project import Project
+from app.models.task import Task, TaskStatus, TaskTombstone, ArchivedTask
+from app.schemas.project import ProjectResponse
+from app.schemas.task import TaskResponse
+from app.services.jobs import JobContext, job_handler
+from app.services.outbox import record_event
+from app.services.ranking import rebalance_ranks_now
+
+
+async def count_project_tasks(session, project_id: str) -> int:
+    result = await session.execute(
+        select(func.count()).select_from(Task).where(Task.project_id == project_id)
+    )
+    return result.scalar()
+
+
+@job_handler("delete_project")
+async def delete_project(job: JobContext) -> dict:
+    batch_size = get_settings().job_batch_size
+    async with job.session_factory() as session:
+        total = await count_project_tasks(session, job.project_id)
+
+    # Each batch commits on its own, so a restarted job continues where it stopped.
+    deleted = 0
+    while True:
+        async with job.session_factory() as session:
+            batch = select(Task.id).where(Task.project_id == job.project_id).limit(batch_size)
+            result = await session.execute(delete(Task).where(Task.id.in_(batch)))
+            await session.commit()
+        if result.rowcount == 0:
+            break
+        deleted += result.rowcount
+        await job.report_progress(deleted, total)
+
+    async with job.session_factory() as session:
+        await session.execute(delete(TaskTombstone).where(TaskTombstone.project_id == job.project_id))
+        await session.execute(delete(ArchivedTask).where(ArchivedTask.project_id == job.project_id))
+        await session.execute(delete(Project).where(Project.id == job.project_id))
+        record_event(session, job.owner_id, "project.deleted", job.project_id, json.dumps({"id": job.project_id}))
+        await session.commit()
+    return {"deleted_tasks": deleted}
+
+
+@job_handler("export_project")
+async def export_project(job: JobContext) -> dict:
+    batch_size = get_settings().job_batch_size
+    async with job.session_factory() as session:
+        project = await session.get(Project, job.project_id)
+        if project is None:
+            raise ValueError("Project not found")
+        exported = {
+            "project": ProjectResponse.model_validate(project).model_dump(mode="json"),
+            "tasks": [],
+        }
+        total = await count_project_tasks(session, job.project_id)
+
+    last_id = ""
+    while True:
+        async with job.session_factory() as session:
+            result = await session.execute(
+                select(Task)
+                .where(Task.project_id == job.project_id, Task.id > last_id)
+                .order_by(Task.id)
+                .limit(batch_size)
+            )
+            tasks = result.scalars().all()
+        if not tasks:
+            break
+        exported["tasks"].extend(
+            TaskResponse.model_validate(task).model_dump(mode="json") for task in tasks
+        )
+        last_id = tasks[-1].id
+        await job.report_progress(len(exported["tasks"]), total)
+    return exported
+
+
+@job_handler("project_stats")
+async def project_stats(job: JobContext) -> dict:
+    async with job.session_factory() as session:
+        result = await session.execute(
+            select(Task.status, Task.priority, func.count())
+            .where(Task.project_id == job.project_id)
+            .group_by(Task.status, Task.priority)
+        )
+        rows = result.all()
+        overdue_result = await session.execute(
+            select(func.count())
+            .select_from(Task)
+            .where(
+                Task.project_id == job.project_id,
+                Task.status != TaskStatus.DONE,
+                Task.due_date < func.now(),
+            )
+        )
+        overdue = overdue_result.scalar()
+
+    by_status: dict[str, int] = {}
+    by_priority: dict[str, int] = {}
+    for task_status, priority, count in rows:
+        by_status[task_status.value] = by_status.get(task_status.value, 0) + count
+        by_priority[priority.value] = by_priority.get(priority.value, 0) + count
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "overdue": overdue,
+    }
+
+
+@job_handler("rebalance_ranks")
+async def rebalance_ranks(job: JobContext) -> dict:
+    async with job.session_factory() as session:
+        # Creates and moves lock the project row too, so ranks cannot change
+        # between reading the order and rewriting it.
+        await session.execute(select(Project.id).where(Project.id == job.project_id).with_for_update())
+        rebalanced = await rebalance_ranks_now(session, job.project_id)
+        await session.commit()
+    return {"rebalanced_tasks": rebalanced}
@@ -0,0 +1,164 @@
+import math
+from sqlalchemy import select, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.models.job import Job, JobStatus
+from app.models.task import Task
+from app.services.changes import next_change_seq
+from app.services.events import broadcast_task_event
+from app.services.jobs import job_queue
+from app.services.outbox import record_task_events
+
+# Ranks are base-36 fractions written as digit strings ("i" is 0.5) and compared
+# as plain strings, so placing a task between two others only needs a key that
+# sorts between theirs. Lowercase alphanumerics order the same under the C and
+# the usual locale collations. Keys never end in "0", so there is always room
+# below any key.
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+# Appending and prepending step by one unit in this digit, so a list can grow
+# at either end about 36**5 times before its keys get longer.
+STEP_WIDTH = 6
+# Longest key the rank column holds.
+RANK_MAX_LENGTH = Task.__table__.c.rank.type.length
+
+
+def _midpoint(low: str, high: str | None) -> str:
+    if high is not None:
+        # Keep the common prefix and split the remainder.
+        n = 0
+        while n < len(high) and (low[n] if n < len(low) else "0") == high[n]:
+            n += 1
+        if n > 0:
+            return high[:n] + _midpoint(low[n:], high[n:])
+    digit_low = DIGITS.index(low[0]) if low else 0
+    digit_high = DIGITS.index(high[0]) if high else BASE
+    if digit_high - digit_low > 1:
+        return DIGITS[(digit_low + digit_high) // 2]
+    if high is not None and len(high) > 1:
+        return high[:1]
+    return DIGITS[digit_low] + _midpoint(low[1:], None)
+
+
+def _step(key: str, delta: int) -> str | None:
+    digits = [DIGITS.index(c) for c in key.ljust(STEP_WIDTH, "0")]
+    i = len(digits) - 1
+    digits[i] += delta
+    while 0 < i and not 0 <= digits[i] < BASE:
+        digits[i] -= delta * BASE
+        i -= 1
+        digits[i] += delta
+    if not 0 <= digits[0] < BASE:
+        return None
+    stepped = "".join(DIGITS[d] for d in digits).rstrip("0")
+    return stepped or None
+
+
+def rank_between(low: str | None, high: str | None) -> str:
+    # A key strictly between two ranks; None means the start or end of the list.
+    if high is not None and (low or "") >= high:
+        raise ValueError(f"Rank {low!r} does not sort before {high!r}")
+    if low and high is None:
+        return _step(low, 1) or low + DIGITS[BASE // 2]
+    if high and low is None:
+        return _step(high, -1) or _midpoint("", high)
+    return _midpoint(low or "", high)
+
+
+def spaced_ranks(count: int) -> list[str]:
+    # ``count`` evenly spaced keys of equal length, used when rebalancing.
+    width = max(1, math.ceil(math.log(count + 1, BASE)) + 1)
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * step
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
+
+
+async def last_rank(db: AsyncSession, project_id: str) -> str | None:
+    result = await db.execute(select(func.max(Task.rank)).where(Task.project_id == project_id))
+    return result.scalar()
+
+
+async def rank_for_move(
+    db: AsyncSession,
+    project_id: str,
+    task_id: str,
+    after_id: str | None,
+    before_id: str | None,
+) -> str:
+    # New rank for a task placed after ``after_id`` and before ``before_id``.
+    # A missing side is filled in with the neighbour the task ends up next to.
+    neighbour_ids = [i for i in (after_id, before_id) if i is not None]
+    if task_id in neighbour_ids:
+        raise ValueError("A task cannot be moved next to itself")
+    ranks = {}
+    if neighbour_ids:
+        result = await db.execute(
+            select(Task.id, Task.rank).where(Task.project_id == project_id, Task.id.in_(neighbour_ids))
+        )
+        ranks = dict(result.all())
+        if len(ranks) < len(neighbour_ids):
+            raise LookupError("Neighbour task not found")
+
+    others = (Task.project_id == project_id, Task.id != task_id)
+    low = ranks.get(after_id)
+    high = ranks.get(before_id)
+    if after_id is not None and before_id is None:
+        result = await db.execute(select(func.min(Task.rank)).where(*others, Task.rank > low))
+        high = result.scalar()
+    elif before_id is not None and after_id is None:
+        result = await db.execute(select(func.max(Task.rank)).where(*others, Task.rank < high))
+        low = result.scalar()
+    elif after_id is None and before_id is None:
+        result = await db.execute(select(func.max(Task.rank)).where(*others))
+        low = result.scalar()
+    return rank_between(low, high)
+
+
+def rank_fits(rank: str) -> bool:
+    return len(rank) <= RANK_MAX_LENGTH
+
+
+async def rebalance_ranks_now(db: AsyncSession, project_id: str) -> int:
+    # Rewrites every rank of the project with evenly spaced keys, keeping the
+    # order. The caller must hold the project row lock (next_change_seq takes
+    # it). Used by the rebalance job, and inline when a key would not fit.
+    result = await db.execute(select(Task.id).where(Task.project_id == project_id).order_by(Task.rank, Task.id))
+    task_ids = result.scalars().all()
+    if not task_ids:
+        return 0
+    # Every task gets a new change sequence so delta sync clients pick up the new ranks.
+    first_seq = await next_change_seq(db, project_id, count=len(task_ids)) - len(task_ids) + 1
+    ranks = spaced_ranks(len(task_ids))
+    batch_size = get_settings().job_batch_size
+    for start in range(0, len(task_ids), batch_size):
+        await db.execute(
+            update(Task),
+            [
+                {"id": task_ids[i], "rank": ranks[i], "change_seq": first_seq + i}
+                for i in range(start, min(start + batch_size, len(task_ids)))
+            ],
+        )
+    await record_task_events(db, "task.updated", Task.project_id == project_id, columns=("rank",))
+    broadcast_task_event(db, "tasks.rebalanced", project_id, "{}")
+    return len(task_ids)
+
+
+async def schedule_rebalance(db: AsyncSession, project_id: str, owner_id: str) -> None:
+    result = await db.execute(
+        select(Job.id)
+        .where(
+            Job.kind == "rebalance_ranks",
+            Job.project_id == project_id,
+            Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+        )
+        .limit(1)
+    )
+    if result.first() is None and job_queue.has_capacity():
+        await job_queue.submit(db, "rebalance_ranks", owner_id, project_id)
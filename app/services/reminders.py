@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, insert, exists, case, or_, and_, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import run_after_commit
+from app.sharding import all_sessionmakers
+from app.models.reminder import TaskReminder, SchedulerLease
+from app.models.task import Task, OPEN_TASK_CONDITION
+from app.services.events import broker
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "task_reminders"
+
+
+async def acquire_lease(session: AsyncSession, name: str, holder: str, seconds: int, now: datetime) -> bool:
+    # Renews our own lease or takes over an expired one; whoever holds the
+    # lease is the only process scanning.
+    expires_at = now + timedelta(seconds=seconds)
+    result = await session.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+        )
+        .values(holder=holder, expires_at=expires_at)
+    )
+    if result.rowcount == 0:
+        if await session.get(SchedulerLease, name) is not None:
+            await session.rollback()
+            return False
+        session.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at))
+        try:
+            await session.flush()
+        except IntegrityError:
+            await session.rollback()
+            return False
+    await session.commit()
+    return True
+
+
+async def release_lease(session: AsyncSession, name: str, holder: str) -> None:
+    await session.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+        .values(expires_at=datetime.now(timezone.utc))
+    )
+    await session.commit()
+
+
+async def scan_due_tasks(session_factory, holder: str, now: datetime | None = None) -> int | None:
+    # One pass over open tasks due in [now - lookback, now + window] that have
+    # no reminder yet. Returns the number of reminders created, or None when
+    # another process holds the lease.
+    settings = get_settings()
+    now = now or datetime.now(timezone.utc)
+    async with session_factory() as session:
+        if not await acquire_lease(session, LEASE_NAME, holder, settings.reminder_lease_seconds, now):
+            return None
+
+    start = now - timedelta(hours=settings.reminder_overdue_lookback_hours)
+    end = now + timedelta(hours=settings.reminder_window_hours)
+    kind = case((Task.due_date <= now, "overdue"), else_="upcoming")
+    reminded = exists().where(
+        TaskReminder.task_id == Task.id,
+        TaskReminder.due_date == Task.due_date,
+        TaskReminder.kind == kind,
+    )
+
+    created = 0
+    last_due, last_id = start, ""
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(Task.id, Task.project_id, Task.due_date, kind.label("kind"))
+                .where(
+                    text(OPEN_TASK_CONDITION),
+                    Task.due_date <= end,
+                    or_(
+                        Task.due_date > last_due,
+                        and_(Task.due_date == last_due, Task.id > last_id),
+                    ),
+                    ~reminded,
+                )
+                .order_by(Task.due_date, Task.id)
+                .limit(settings.reminder_batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            last_due, last_id = rows[-1].due_date, rows[-1].id
+
+            reminders = [
+                {"task_id": row.id, "project_id": row.project_id, "kind": row.kind, "due_date": row.due_date}
+                for row in rows
+            ]
+            await session.execute(insert(TaskReminder), reminders)
+            run_after_commit(session, lambda reminders=reminders: publish_reminders(reminders))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another scanner got there first (our lease must have lapsed).
+                logger.warning("Reminder batch already processed, skipping")
+                await session.rollback()
+            else:
+                created += len(reminders)
+
+        # Each batch extends the lease, so a long scan is not taken over midway.
+        async with session_factory() as session:
+            if not await acquire_lease(session, LEASE_NAME, holder, settings.reminder_lease_seconds, datetime.now(timezone.utc)):
+                logger.warning("Lost the reminder lease, stopping scan")
+                break
+    return created
+
+
+def publish_reminders(reminders: list[dict]) -> None:
+    for reminder in reminders:
+        data = json.dumps({
+            "id": reminder["task_id"],
+            "kind": reminder["kind"],
+            "due_date": reminder["due_date"].isoformat(),
+        })
+        broker.publish(reminder["project_id"], "task.reminder", data)
+
+
+class ReminderScheduler:
+    def __init__(self, session_factory=None, interval: float | None = None):
+        # Unset values come from settings (and the app's engine) on start.
+        self.session_factory = session_factory
+        self.interval = interval
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: asyncio.Task | None = None
+
+    def all_sessions(self) -> list:
+        # Each shard is scanned under its own lease.
+        return [self.session_factory] if self.session_factory else all_sessionmakers()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        for sessions in self.all_sessions():
+            try:
+                async with sessions() as session:
+                    await release_lease(session, LEASE_NAME, self.holder)
+            except Exception:
+                logger.exception("Could not release the reminder lease")
+
+    async def _run(self) -> None:
+        interval = self.interval or get_settings().reminder_interval_seconds
+        while True:
+            for sessions in self.all_sessions():
+                try:
+                    created = await scan_due_tasks(sessions, self.holder)
+                    if created:
+                        logger.info("Created %d task reminders", created)
+                except Exception:
+                    logger.exception("Reminder scan failed")
+            await asyncio.sleep(interval)
+
+
+reminder_scheduler = ReminderScheduler()
@@ -0,0 +1,315 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+import httpx
+from sqlalchemy import select, insert, delete, update
+from app import metrics
+from app.config import get_settings
+from app.models.webhook import OutboxEvent, WebhookEndpoint, WebhookDelivery
+from app.services.reminders import acquire_lease, release_lease
+from app.sharding import all_sessionmakers
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "webhooks"
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+SIGNATURE_HEADER = "X-Webhook-Signature"
+
+stats = {"events": 0, "requests": 0, "delivered": 0, "retried": 0, "failed": 0}
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    # HMAC-SHA256 of "<timestamp>.<body>" under the endpoint's secret.
+    # Receivers recompute it and should reject stale timestamps.
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+async def resolve_url_target(url: str) -> tuple[str | None, str | None]:
+    # Webhook URLs come from users, so the dispatcher must not be usable to
+    # reach the app's own network: every address the host resolves to has to
+    # be public, unless the host is in WEBHOOK_ALLOWED_HOSTS. Checked when an
+    # endpoint is registered and again before each delivery, since DNS can
+    # change in between. Returns the address to connect to (so the request
+    # can't be sent to a different one resolved later) and why the URL is
+    # refused, or None.
+    parts = urlsplit(url)
+    host = parts.hostname
+    if not host:
+        return None, "URL has no host"
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, ValueError):
+        return None, f"Cannot resolve {host}"
+    allowed = {name.strip().lower() for name in get_settings().webhook_allowed_hosts.split(",") if name.strip()}
+    addresses = [sockaddr[0].split("%")[0] for *_, sockaddr in infos]
+    if host.lower() in allowed:
+        return addresses[0], None
+    for value in addresses:
+        address = ipaddress.ip_address(value)
+        if getattr(address, "ipv4_mapped", None):
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            return None, f"{host} resolves to a non-public address"
+    return addresses[0], None
+
+
+async def check_url_target(url: str) -> str | None:
+    _, refused = await resolve_url_target(url)
+    return refused
+
+
+def retry_delay(attempts: int) -> float:
+    # Exponential backoff, jittered so endpoints that failed together are
+    # not all retried in the same pass.
+    settings = get_settings()
+    backoff = min(settings.webhook_retry_max_seconds, settings.webhook_retry_base_seconds * 2 ** (attempts - 1))
+    return backoff * random.uniform(0.5, 1.0)
+
+
+async def fan_out(session_factory, batch_size: int) -> int:
+    # Turns outbox events into one delivery per active endpoint of the
+    # event's owner, then deletes them from the outbox. Events are picked by
+    # id rather than behind a cursor, so a transaction that commits late with
+    # a lower id is not skipped. Returns the number of events processed.
+    processed = 0
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(select(OutboxEvent.id).order_by(OutboxEvent.id).limit(batch_size))
+            event_ids = result.scalars().all()
+            if not event_ids:
+                break
+            await session.execute(
+                insert(WebhookDelivery).from_select(
+                    ["endpoint_id", "event_id", "event_type", "project_id", "payload", "created_at"],
+                    select(
+                        WebhookEndpoint.id,
+                        OutboxEvent.id,
+                        OutboxEvent.event_type,
+                        OutboxEvent.project_id,
+                        OutboxEvent.payload,
+                        OutboxEvent.created_at,
+                    )
+                    .join(WebhookEndpoint, WebhookEndpoint.owner_id == OutboxEvent.owner_id)
+                    .where(OutboxEvent.id.in_(event_ids), WebhookEndpoint.is_active.is_(True))
+                    .order_by(OutboxEvent.id),
+                )
+            )
+            await session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(event_ids)))
+            await session.commit()
+        processed += len(event_ids)
+        stats["events"] += len(event_ids)
+    return processed
+
+
+def event_body(rows) -> bytes:
+    return json.dumps({
+        "events": [
+            {
+                "id": row.event_id,
+                "type": row.event_type,
+                "project_id": row.project_id,
+                "created_at": row.created_at.isoformat(),
+                "data": json.loads(row.payload),
+            }
+            for row in rows
+        ]
+    }).encode()
+
+
+async def post_batch(client: httpx.AsyncClient, url: str, secret: str, rows, address: str | None = None) -> str | None:
+    # Returns None once the endpoint accepted the batch (any 2xx), the error
+    # otherwise. With ``address``, connects there instead of resolving the
+    # host again, sending the original Host header and TLS server name.
+    body = event_body(rows)
+    timestamp = int(time.time())
+    headers = {
+        "Content-Type": "application/json",
+        TIMESTAMP_HEADER: str(timestamp),
+        SIGNATURE_HEADER: sign_payload(secret, timestamp, body),
+    }
+    target = httpx.URL(url)
+    extensions = {}
+    if address is not None:
+        headers["Host"] = target.netloc.decode("ascii")
+        extensions["sni_hostname"] = target.host
+        target = target.copy_with(host=address)
+    stats["requests"] += 1
+    try:
+        # Redirects are not followed: they could lead past check_url_target.
+        request = client.build_request("POST", target, content=body, headers=headers, extensions=extensions)
+        response = await client.send(request, follow_redirects=False)
+    except httpx.HTTPError as exc:
+        return f"{type(exc).__name__}: {exc}"
+    if response.is_success:
+        return None
+    return f"HTTP {response.status_code}"
+
+
+async def deliver_due(session_factory, client: httpx.AsyncClient, now: datetime | None = None) -> int:
+    # Sends up to WEBHOOK_CLAIM_SIZE due deliveries, WEBHOOK_BATCH_SIZE
+    # events per POST. At most WEBHOOK_WORKERS requests are in flight, and
+    # at most WEBHOOK_ENDPOINT_CONCURRENCY to any one endpoint. Returns the
+    # number of deliveries looked at.
+    settings = get_settings()
+    now = now or datetime.now(timezone.utc)
+    async with session_factory() as session:
+        result = await session.execute(
+            select(
+                WebhookDelivery.id,
+                WebhookDelivery.endpoint_id,
+                WebhookDelivery.event_id,
+                WebhookDelivery.event_type,
+                WebhookDelivery.project_id,
+                WebhookDelivery.payload,
+                WebhookDelivery.created_at,
+                WebhookDelivery.attempts,
+                WebhookEndpoint.url,
+                WebhookEndpoint.secret,
+            )
+            .join(WebhookEndpoint, WebhookEndpoint.id == WebhookDelivery.endpoint_id)
+            .where(WebhookDelivery.failed_at.is_(None), WebhookDelivery.next_attempt_at <= now)
+            .order_by(WebhookDelivery.next_attempt_at, WebhookDelivery.id)
+            .limit(settings.webhook_claim_size)
+        )
+        rows = result.all()
+    if not rows:
+        return 0
+
+    by_endpoint: dict[str, list] = {}
+    for row in rows:
+        by_endpoint.setdefault(row.endpoint_id, []).append(row)
+    batches = [
+        endpoint_rows[start:start + settings.webhook_batch_size]
+        for endpoint_rows in by_endpoint.values()
+        for start in range(0, len(endpoint_rows), settings.webhook_batch_size)
+    ]
+    workers = asyncio.Semaphore(settings.webhook_workers)
+    endpoint_limits = {
+        endpoint_id: asyncio.Semaphore(settings.webhook_endpoint_concurrency) for endpoint_id in by_endpoint
+    }
+    targets = dict(zip(
+        by_endpoint,
+        await asyncio.gather(*(resolve_url_target(rows[0].url) for rows in by_endpoint.values())),
+    ))
+
+    async def send(batch):
+        address, refused = targets[batch[0].endpoint_id]
+        if refused:
+            return batch, refused
+        async with endpoint_limits[batch[0].endpoint_id], workers:
+            return batch, await post_batch(client, batch[0].url, batch[0].secret, batch, address)
+
+    outcomes = await asyncio.gather(*(send(batch) for batch in batches))
+
+    finished = datetime.now(timezone.utc)
+    delivered, retries = [], []
+    for batch, error in outcomes:
+        if error is None:
+            delivered += [row.id for row in batch]
+            continue
+        logger.warning("Webhook delivery to %s failed: %s", batch[0].url, error)
+        for row in batch:
+            attempts = row.attempts + 1
+            gave_up = attempts >= settings.webhook_max_attempts
+            retries.append({
+                "id": row.id,
+                "attempts": attempts,
+                "last_error": error[:1000],
+                "next_attempt_at": finished + timedelta(seconds=retry_delay(attempts)),
+                "failed_at": finished if gave_up else None,
+            })
+            stats["failed" if gave_up else "retried"] += 1
+    stats["delivered"] += len(delivered)
+
+    async with session_factory() as session:
+        if delivered:
+            await session.execute(delete(WebhookDelivery).where(WebhookDelivery.id.in_(delivered)))
+        if retries:
+            await session.execute(update(WebhookDelivery), retries)
+        await session.commit()
+    return len(rows)
+
+
+async def dispatch_webhooks(session_factory, client: httpx.AsyncClient, holder: str) -> int | None:
+    # One pass: fan out the outbox, then deliver everything that is due.
+    # Returns the number of deliveries attempted, or None when another
+    # process holds the lease.
+    settings = get_settings()
+    async with session_factory() as session:
+        if not await acquire_lease(session, LEASE_NAME, holder, settings.webhook_lease_seconds, datetime.now(timezone.utc)):
+            return None
+
+    await fan_out(session_factory, settings.webhook_claim_size)
+    attempted = 0
+    while True:
+        claimed = await deliver_due(session_factory, client)
+        attempted += claimed
+        if claimed < settings.webhook_claim_size:
+            break
+        async with session_factory() as session:
+            if not await acquire_lease(session, LEASE_NAME, holder, settings.webhook_lease_seconds, datetime.now(timezone.utc)):
+                logger.warning("Lost the webhook lease, stopping dispatch")
+                break
+    return attempted
+
+
+class WebhookDispatcher:
+    def __init__(self, session_factory=None, interval: float | None = None, transport: httpx.AsyncBaseTransport | None = None):
+        # Unset values come from settings (and the app's engine) on start.
+        self.session_factory = session_factory
+        self.interval = interval
+        self.transport = transport
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: asyncio.Task | None = None
+
+    def all_sessions(self) -> list:
+        # Each shard has its own outbox and lease.
+        return [self.session_factory] if self.session_factory else all_sessionmakers()
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=self.transport, timeout=get_settings().webhook_timeout_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        for sessions in self.all_sessions():
+            try:
+                async with sessions() as session:
+                    await release_lease(session, LEASE_NAME, self.holder)
+            except Exception:
+                logger.exception("Could not release the webhook lease")
+
+    async def _run(self) -> None:
+        interval = self.interval or get_settings().webhook_interval_seconds
+        async with self.client() as client:
+            while True:
+                for sessions in self.all_sessions():
+                    try:
+                        await dispatch_webhooks(sessions, client, self.holder)
+                    except Exception:
+                        logger.exception("Webhook dispatch failed")
+                await asyncio.sleep(interval)
+
+
+webhook_dispatcher = WebhookDispatcher()
+
+metrics.register("webhooks", lambda: dict(stats))
@@ -0,0 +1,226 @@
+import bisect
+import hashlib
+import logging
+from functools import lru_cache
+from sqlalchemy import Integer, select, insert, delete, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from app.config import get_settings
+from app.database import create_engine_for_url, create_sessionmaker, get_engine, get_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Points per shard on the ring; more points give a more even split.
+RING_REPLICAS = 128
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    # Consistent hashing: adding a shard only moves the users that land on the
+    # new shard's points, about 1/N of them, and never between old shards.
+    def __init__(self, names: list[str], replicas: int = RING_REPLICAS):
+        if not names:
+            raise ValueError("A hash ring needs at least one shard")
+        points = sorted((_hash(f"{name}#{i}"), name) for name in names for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def shard_for(self, key: str) -> str:
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._names[i]
+
+
+def parse_shards(value: str) -> dict[str, str]:
+    # "a=postgresql+asyncpg://...,b=postgresql+asyncpg://..." in ring order.
+    # Users are placed by shard name, so a shard's URL can change without
+    # moving anyone.
+    shards = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, url = entry.partition("=")
+        if not sep or not name.strip() or not url.strip():
+            raise ValueError(f"Shard must be given as name=url: {entry!r}")
+        shards[name.strip()] = url.strip()
+    return shards
+
+
+class ShardRouter:
+    def __init__(self, urls: dict[str, str]):
+        self.urls = urls
+        self.ring = HashRing(list(urls))
+        self._engines: dict[str, AsyncEngine] = {}
+        self._sessionmakers: dict[str, async_sessionmaker[AsyncSession]] = {}
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.urls)
+
+    def shard_for_user(self, user_id: str) -> str:
+        return self.ring.shard_for(user_id)
+
+    def engine(self, name: str) -> AsyncEngine:
+        if name not in self._engines:
+            self._engines[name] = create_engine_for_url(self.urls[name])
+        return self._engines[name]
+
+    def sessionmaker(self, name: str) -> async_sessionmaker[AsyncSession]:
+        if name not in self._sessionmakers:
+            self._sessionmakers[name] = create_sessionmaker(self.engine(name))
+        return self._sessionmakers[name]
+
+    async def dispose(self) -> None:
+        for engine in self._engines.values():
+            await engine.dispose()
+        self._engines.clear()
+        self._sessionmakers.clear()
+
+
+@lru_cache
+def get_shard_router() -> ShardRouter | None:
+    shards = parse_shards(get_settings().database_shards)
+    return ShardRouter(shards) if shards else None
+
+
+async def dispose_shards() -> None:
+    if get_shard_router.cache_info().currsize:
+        router = get_shard_router()
+        if router is not None:
+            await router.dispose()
+        get_shard_router.cache_clear()
+
+
+def shard_for_user(user_id: str | None) -> str | None:
+    # None means DATABASE_URL.
+    router = get_shard_router()
+    if router is None or user_id is None:
+        return None
+    return router.shard_for_user(user_id)
+
+
+def sessions_for_shard(name: str | None) -> async_sessionmaker[AsyncSession]:
+    if name is None:
+        return get_sessionmaker()
+    return get_shard_router().sessionmaker(name)
+
+
+def sessions_for_user(user_id: str | None) -> async_sessionmaker[AsyncSession]:
+    return sessions_for_shard(shard_for_user(user_id))
+
+
+def all_sessionmakers() -> list[async_sessionmaker[AsyncSession]]:
+    # Every database holding user data, for maintenance that scans all of them.
+    router = get_shard_router()
+    if router is None:
+        return [get_sessionmaker()]
+    return [router.sessionmaker(name) for name in router.names]
+
+
+def all_engines() -> list[AsyncEngine]:
+    router = get_shard_router()
+    if router is None:
+        return [get_engine()]
+    return [router.engine(name) for name in router.names]
+
+
+def _user_tables(user_id: str) -> list:
+    # Every table holding a user's rows, parents first, with the rows' filter.
+    from app.models import (
+        User, Project, Task, TaskTombstone, ArchivedTask, TaskReminder, Job, IdempotencyKey,
+        WebhookEndpoint, WebhookDelivery, OutboxEvent,
+    )
+
+    project_ids = select(Project.id).where(Project.owner_id == user_id).scalar_subquery()
+    endpoint_ids = select(WebhookEndpoint.id).where(WebhookEndpoint.owner_id == user_id).scalar_subquery()
+    return [
+        (User.__table__, User.id == user_id),
+        (WebhookEndpoint.__table__, WebhookEndpoint.owner_id == user_id),
+        (WebhookDelivery.__table__, WebhookDelivery.endpoint_id.in_(endpoint_ids)),
+        (OutboxEvent.__table__, OutboxEvent.owner_id == user_id),
+        (Project.__table__, Project.owner_id == user_id),
+        (Task.__table__, Task.project_id.in_(project_ids)),
+        (ArchivedTask.__table__, ArchivedTask.project_id.in_(project_ids)),
+        (TaskTombstone.__table__, TaskTombstone.project_id.in_(project_ids)),
+        (TaskReminder.__table__, TaskReminder.project_id.in_(project_ids)),
+        (Job.__table__, Job.owner_id == user_id),
+        (IdempotencyKey.__table__, IdempotencyKey.owner_id == user_id),
+    ]
+
+
+def _copied_columns(table) -> list:
+    # Integer surrogate keys are left for the target to assign, since the
+    # source's values may already be taken there.
+    return [
+        column for column in table.columns
+        if not (column.primary_key and isinstance(column.type, Integer) and column.autoincrement in (True, "auto"))
+    ]
+
+
+async def _delete_user_rows(session: AsyncSession, user_id: str) -> None:
+    from app.models import Task, ArchivedTask
+
+    # Assignments of other users' tasks to this user do not move with it.
+    for model in (Task, ArchivedTask):
+        await session.execute(update(model).where(model.assignee_id == user_id).values(assignee_id=None))
+    for table, condition in reversed(_user_tables(user_id)):
+        await session.execute(delete(table).where(condition))
+
+
+async def move_user(
+    user_id: str,
+    source: async_sessionmaker[AsyncSession],
+    target: async_sessionmaker[AsyncSession],
+    batch_size: int = 1000,
+) -> int:
+    # Copies all of a user's rows to ``target`` in one transaction, then
+    # deletes them from ``source`` in another. Rerunning after a failure
+    # starts over from the source copy, which stays authoritative until the
+    # delete commits. The user's writes should be paused meanwhile.
+    from app.models import Task, ArchivedTask
+
+    copied = 0
+    async with source() as src, target() as dst:
+        await _delete_user_rows(dst, user_id)
+        for table, condition in _user_tables(user_id):
+            columns = _copied_columns(table)
+            result = await src.stream(select(*columns).where(condition))
+            async for rows in result.mappings().partitions(batch_size):
+                values = [dict(row) for row in rows]
+                if table in (Task.__table__, ArchivedTask.__table__):
+                    # Other users on the source shard are not there on the target.
+                    for row in values:
+                        if row["assignee_id"] != user_id:
+                            row["assignee_id"] = None
+                await dst.execute(insert(table), values)
+                copied += len(values)
+        await dst.commit()
+
+    async with source() as src:
+        await _delete_user_rows(src, user_id)
+        await src.commit()
+    return copied
+
+
+async def rebalance(router: ShardRouter, execute: bool = False, batch_size: int = 1000) -> list[tuple[str, str, str]]:
+    # Finds users stored on a shard other than the one the ring assigns them
+    # (after a shard was added or removed) and, with ``execute``, moves them.
+    from app.models import User
+
+    moves = []
+    for name in router.names:
+        async with router.sessionmaker(name)() as session:
+            result = await session.execute(select(User.id).order_by(User.id))
+            user_ids = result.scalars().all()
+        for user_id in user_ids:
+            target = router.shard_for_user(user_id)
+            if target != name:
+                moves.append((user_id, name, target))
+
+    if execute:
+        for user_id, source, target in moves:
+            rows = await move_user(user_id, router.sessionmaker(source), router.sessionmaker(target), batch_size)
+            logger.info("Moved user %s from shard %s to %s (%d rows)", user_id, source, target, rows)
+    return moves
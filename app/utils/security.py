@@ -1,22 +1,105 @@
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from app.config import get_settings
 
-settings = get_settings()
+# Hashes in any of these schemes still verify; only the configured one is
+# used for new hashes, so the others are upgraded on the next login.
+PASSWORD_SCHEMES = ("bcrypt", "argon2", "pbkdf2_sha256")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def hashing_policy(scheme: str, rounds: int | None = None, memory_cost: int | None = None) -> dict:
+    # CryptContext settings for the configured scheme. Pinning min and max
+    # rounds to the target makes needs_update flag hashes made with any other
+    # cost, cheaper or more expensive.
+    policy = {}
+    if rounds is not None:
+        policy.update({
+            f"{scheme}__default_rounds": rounds,
+            f"{scheme}__min_rounds": rounds,
+            f"{scheme}__max_rounds": rounds,
+        })
+    if memory_cost is not None and scheme == "argon2":
+        policy["argon2__memory_cost"] = memory_cost
+    return policy
+
+
+def build_pwd_context(scheme: str, rounds: int | None = None, memory_cost: int | None = None):
+    from passlib.context import CryptContext
+
+    if scheme not in PASSWORD_SCHEMES:
+        raise ValueError(f"Unsupported password hash scheme: {scheme}")
+    schemes = [scheme, *(other for other in PASSWORD_SCHEMES if other != scheme)]
+    return CryptContext(schemes=schemes, deprecated="auto", **hashing_policy(scheme, rounds, memory_cost))
+
+
+# passlib and python-jose (with its cryptography backend) are imported on first
+# use; together they are a large share of the app's import time.
+@lru_cache
+def get_pwd_context():
+    settings = get_settings()
+    return build_pwd_context(
+        settings.password_hash_scheme,
+        settings.password_hash_rounds,
+        settings.password_hash_memory_cost,
+    )
+
+
+def warm_up() -> None:
+    # Called from the app lifespan so the first login does not pay for the imports.
+    get_pwd_context()
+    import jose.jwt  # noqa: F401
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def password_needs_update(hashed_password: str) -> bool:
+    return get_pwd_context().needs_update(hashed_password)
+
+
+# Costs tried by calibrate_hashing, cheapest first.
+CALIBRATION_ROUNDS = {
+    "bcrypt": range(4, 32),
+    "argon2": range(1, 64),
+    "pbkdf2_sha256": tuple(10_000 * 2 ** i for i in range(12)),
+}
+
+
+def measure_verify(scheme: str, rounds: int, memory_cost: int | None = None, samples: int = 3) -> float:
+    # Best-of-N seconds to verify one password at this cost.
+    context = build_pwd_context(scheme, rounds, memory_cost)
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibrate_hashing(scheme: str, target_seconds: float, memory_cost: int | None = None) -> tuple[int, float]:
+    # The highest cost (rounds, or argon2's time cost) whose verification
+    # stays within ``target_seconds`` on this host, with its measured time.
+    candidates = CALIBRATION_ROUNDS[scheme]
+    best = (candidates[0], measure_verify(scheme, candidates[0], memory_cost))
+    for rounds in candidates[1:]:
+        seconds = measure_verify(scheme, rounds, memory_cost)
+        if seconds > target_seconds:
+            break
+        best = (rounds, seconds)
+    return best
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
+    from jose import jwt
+
+    settings = get_settings()
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})
@@ -24,8 +107,38 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 
 
 def verify_token(token: str) -> dict | None:
+    from jose import JWTError, jwt
+
+    settings = get_settings()
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _token_claims(token: str) -> tuple[str | None, float | None]:
+    payload = verify_token(token)
+    if payload is None:
+        return None, None
+    return payload.get("sub"), payload.get("exp")
+
+
+def token_subject(token: str) -> str | None:
+    # The signature is checked once per token; expiry on every call, since a
+    # cached token may have expired since.
+    subject, expires = _token_claims(token)
+    if expires is not None and expires <= time.time():
+        return None
+    return subject
+
+
+def bearer_subject(authorization: str | None) -> str | None:
+    # The user id in an ``Authorization: Bearer`` header, if the token is valid.
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token_subject(token)
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db_dir}/sparse.db")
+os.environ.setdefault("SECRET_KEY", "sparse-fields-benchmark")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from app.database import Base, get_engine, get_sessionmaker  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.models import User, Project, Task  # noqa: E402
+from app.schemas.task import TASK_FIELDS  # noqa: E402
+from app.utils.security import create_access_token  # noqa: E402
+
+
+async def seed(tasks: int, description_bytes: int) -> tuple[str, str]:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with get_sessionmaker()() as db:
+        user = User(email="bench@example.com", hashed_password="x", full_name="Bench")
+        db.add(user)
+        await db.flush()
+        project = Project(name="Bench", description="d" * description_bytes, owner_id=user.id)
+        db.add(project)
+        await db.flush()
+        db.add_all(
+            Task(title=f"Task {i}", description="d" * description_bytes, project_id=project.id)
+            for i in range(tasks)
+        )
+        await db.commit()
+        return user.id, project.id
+
+
+async def run(tasks: int, description_bytes: int, requests: int) -> None:
+    user_id, project_id = await seed(tasks, description_bytes)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    variants = (
+        ("all fields", {"fields": ",".join(TASK_FIELDS)}),
+        ("default (no description)", {}),
+        ("fields=title,status", {"fields": "title,status"}),
+    )
+    transport = ASGITransport(app=create_app())
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        url = f"/projects/{project_id}/tasks"
+        for name, params in variants:
+            params = {"per_page": 100, **params}
+            response = await client.get(url, params=params, headers=headers)
+            size = len(response.content)
+            timings = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                await client.get(url, params=params, headers=headers)
+                timings.append(time.perf_counter() - start)
+            print(f"{name:26} {size:9d} bytes   median {statistics.median(timings) * 1000:7.2f} ms")
+    await get_engine().dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare list_tasks payloads with and without sparse fieldsets")
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--description-bytes", type=int, default=4000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.tasks, args.description_bytes, args.requests))
+
+
+if __name__ == "__main__":
+    main()
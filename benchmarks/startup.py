@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs in a fresh interpreter: time to build the app, then to serve a first
+# request that touches auth (JWT decode) and the database.
+FIRST_REQUEST_PROBE = """
+import asyncio, json, sys, time
+from httpx import AsyncClient, ASGITransport
+
+LAZY_MODULES = ("passlib", "jose", "asyncpg", "aiosqlite")
+
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+loaded_at_import = sorted(m for m in LAZY_MODULES if m in sys.modules)
+
+async def first_request():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/health")
+        await client.get("/auth/me", headers={"Authorization": "Bearer not-a-token"})
+
+asyncio.run(first_request())
+done = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - start,
+    "first_request_seconds": done - imported,
+    "total_seconds": done - start,
+    "lazy_modules_at_import": loaded_at_import,
+}))
+"""
+
+
+def probe_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./bench.db")
+    env.setdefault("SECRET_KEY", "startup-benchmark")
+    return env
+
+
+def measure_first_request() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST_PROBE],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=probe_env(),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_time_breakdown(top: int = 15) -> list[tuple[str, int, int]]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from app.main import app"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=probe_env(),
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    # Top-level packages only, which is where the actionable costs show up.
+    top_level = [row for row in rows if "." not in row[0] or row[0].startswith("app.")]
+    return sorted(top_level, key=lambda row: row[2], reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure Task Manager API cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'module':40} {'self ms':>9} {'cumulative ms':>14}")
+    for module, self_us, cumulative_us in import_time_breakdown(args.top):
+        print(f"{module:40} {self_us / 1000:9.1f} {cumulative_us / 1000:14.1f}")
+
+    runs = [measure_first_request() for _ in range(args.runs)]
+    print()
+    for key in ("import_seconds", "first_request_seconds", "total_seconds"):
+        values = sorted(run[key] for run in runs)
+        print(f"{key:24} median {values[len(values) // 2] * 1000:8.1f} ms   best {values[0] * 1000:8.1f} ms")
+    print(f"deferred modules loaded by building the app: {runs[-1]['lazy_modules_at_import'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
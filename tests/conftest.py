@@ -1,9 +1,13 @@
+from contextlib import contextmanager
 import pytest
+from fastapi import Request
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.database import Base, get_db
 from app.main import app
 from app.models import User
+from app.services.jobs import job_queue
 from app.utils.security import hash_password
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -12,7 +16,11 @@ engine = create_async_engine(TEST_DATABASE_URL, echo=False)
 TestSessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 
-async def override_get_db():
+async def override_get_db(request: Request):
+    shared = getattr(request.state, "batch_db", None)
+    if shared is not None:
+        yield shared
+        return
     async with TestSessionLocal() as session:
         try:
             yield session
@@ -23,6 +31,7 @@ async def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+job_queue.session_factory = TestSessionLocal
 
 
 @pytest.fixture(autouse=True)
@@ -30,10 +39,19 @@ async def setup_database():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
+    await job_queue.stop()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    limiter = getattr(app.state, "rate_limiter", None)
+    if limiter is not None:
+        limiter.reset()
+    yield
+
+
 @pytest.fixture
 async def client():
     transport = ASGITransport(app=app)
@@ -62,4 +80,34 @@ async def auth_headers(client, test_user):
         data={"username": "testuser@example.com", "password": "testpass123"},
     )
     token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def test_project(client, auth_headers):
+    response = await client.post(
+        "/projects",
+        json={"name": "Test Project"},
+        headers=auth_headers,
+    )
+    return response.json()
+
+
+@pytest.fixture
+def count_statements():
+    # ``with count_statements() as statements:`` collects the SQL sent to the
+    # test database inside the block.
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    return counting
@@ -0,0 +1,57 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from httpx import AsyncClient
+from app.services.archive import archive_done_tasks, partition_statements
+from tests.conftest import TestSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_archived_tasks_stay_readable(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks"
+    done = (await client.post(url, json={"title": "Done", "status": "done"}, headers=auth_headers)).json()
+    await client.post(url, json={"title": "Open"}, headers=auth_headers)
+
+    # Nothing is old enough yet.
+    assert await archive_done_tasks(TestSessionLocal, datetime.now(timezone.utc) - timedelta(days=1), 10) == 0
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    assert await archive_done_tasks(TestSessionLocal, future, 1) == 1
+
+    response = await client.get(url, headers=auth_headers)
+    assert [task["title"] for task in response.json()["tasks"]] == ["Open"]
+
+    response = await client.get(url, params={"include_archived": "true", "sort_by": "rank", "order": "asc"}, headers=auth_headers)
+    data = response.json()
+    assert data["total"] == 2
+    assert [task["title"] for task in data["tasks"]] == ["Done", "Open"]
+
+    response = await client.get(f"{url}/{done['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Done"
+    assert response.json()["status"] == "done"
+
+    response = await client.put(f"{url}/{done['id']}", json={"title": "Edited"}, headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_archiving_shows_up_in_delta_sync(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks"
+    done = (await client.post(url, json={"title": "Done", "status": "done"}, headers=auth_headers)).json()
+    cursor = (await client.get(f"{url}/changes", headers=auth_headers)).json()["cursor"]
+
+    assert await archive_done_tasks(TestSessionLocal, datetime.now(timezone.utc) + timedelta(days=1), 10) == 1
+
+    response = await client.get(f"{url}/changes", params={"since": cursor}, headers=auth_headers)
+    assert [(c["op"], c["task_id"]) for c in response.json()["changes"]] == [("delete", done["id"])]
+
+
+def test_partition_statements():
+    statements = partition_statements("status")
+    assert statements[0].endswith("PARTITION BY LIST (status)")
+    assert "ALTER TABLE tasks_partitioned ADD PRIMARY KEY (id, status)" in statements
+    assert any(s.startswith("CREATE INDEX ix_tasks_open_due_date ON tasks ") for s in statements)
+
+    statements = partition_statements("created_at", range(2025, 2027))
+    assert "FOR VALUES FROM ('2026-01-01') TO ('2027-01-01')" in statements[3]
+    with pytest.raises(ValueError):
+        partition_statements("owner")
@@ -1,5 +1,12 @@
+import time
+from datetime import timedelta
 import pytest
 from httpx import AsyncClient
+from app.config import get_settings
+from app.models import User
+from app.utils import security
+from app.utils.security import get_pwd_context, calibrate_hashing, create_access_token, token_subject
+from tests.conftest import TestSessionLocal
 
 
 @pytest.mark.asyncio
@@ -103,4 +110,60 @@ async def test_get_me_success(client: AsyncClient, auth_headers):
 @pytest.mark.asyncio
 async def test_get_me_unauthorized(client: AsyncClient):
     response = await client.get("/auth/me")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+
+@pytest.fixture
+def hashing_policy(monkeypatch):
+    def configure(**values):
+        for name, value in values.items():
+            monkeypatch.setattr(get_settings(), name, value)
+        get_pwd_context.cache_clear()
+
+    yield configure
+    monkeypatch.undo()
+    get_pwd_context.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password_hash(client: AsyncClient, test_user, hashing_policy):
+    assert test_user.hashed_password.startswith("$2b$12$")
+    hashing_policy(password_hash_rounds=5)
+
+    response = await client.post(
+        "/auth/login",
+        data={"username": "testuser@example.com", "password": "testpass123"},
+    )
+    assert response.status_code == 200
+    async with TestSessionLocal() as session:
+        user = await session.get(User, test_user.id)
+    assert user.hashed_password.startswith("$2b$05$")
+
+    # Switching schemes upgrades on the next login too, and the new hash works.
+    hashing_policy(password_hash_scheme="pbkdf2_sha256", password_hash_rounds=1000)
+    for _ in range(2):
+        response = await client.post(
+            "/auth/login",
+            data={"username": "testuser@example.com", "password": "testpass123"},
+        )
+        assert response.status_code == 200
+    async with TestSessionLocal() as session:
+        user = await session.get(User, test_user.id)
+    assert user.hashed_password.startswith("$pbkdf2-sha256$1000$")
+
+
+def test_calibrate_hashing_respects_target(monkeypatch):
+    # Each bcrypt round doubles the work: 10 ms at cost 4, 20 ms at 5, ...
+    monkeypatch.setattr(security, "measure_verify", lambda scheme, rounds, memory_cost=None: 0.01 * 2 ** (rounds - 4))
+    assert calibrate_hashing("bcrypt", 0.1) == (7, 0.08)
+    assert calibrate_hashing("bcrypt", 0.16) == (8, 0.16)
+    # The cheapest cost is kept even when it is over the target.
+    assert calibrate_hashing("bcrypt", 0.001) == (4, 0.01)
+
+
+def test_cached_token_expires(monkeypatch):
+    token = create_access_token({"sub": "user-1"}, timedelta(minutes=5))
+    assert token_subject(token) == "user-1"
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 600)
+    assert token_subject(token) is None
@@ -0,0 +1,56 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_sub_requests_in_order(client: AsyncClient, auth_headers, test_project):
+    tasks_url = f"/projects/{test_project['id']}/tasks"
+    response = await client.post(
+        "/batch",
+        json={
+            "requests": [
+                {"id": "me", "path": "/auth/me"},
+                {"id": "create", "method": "POST", "path": tasks_url, "body": {"title": "Batched"}},
+                {"id": "list", "path": f"{tasks_url}?fields=title"},
+                {"id": "missing", "path": "/projects/does-not-exist"},
+                {"id": "invalid", "method": "POST", "path": tasks_url, "body": {"title": ""}},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    results = {r["id"]: r for r in response.json()["responses"]}
+    assert results["me"]["status"] == 200
+    assert results["me"]["body"]["email"] == "testuser@example.com"
+    assert results["create"]["status"] == 201
+    assert results["list"]["status"] == 200
+    assert results["list"]["body"]["tasks"] == [{"id": results["create"]["body"]["id"], "title": "Batched"}]
+    assert results["missing"]["status"] == 404
+    assert results["invalid"]["status"] == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_concurrent(client: AsyncClient, auth_headers, test_project):
+    requests = [{"id": str(i), "path": f"/projects/{test_project['id']}"} for i in range(5)]
+    response = await client.post(
+        "/batch",
+        json={"requests": requests, "concurrent": True},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [r["id"] for r in results] == [str(i) for i in range(5)]
+    assert all(r["status"] == 200 and r["body"]["name"] == "Test Project" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_auth_and_rejects_nesting(client: AsyncClient, auth_headers):
+    response = await client.post("/batch", json={"requests": [{"path": "/auth/me"}]})
+    assert response.status_code == 401
+
+    response = await client.post(
+        "/batch",
+        json={"requests": [{"method": "POST", "path": "/batch", "body": {"requests": []}}]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from httpx import AsyncClient
+from app.services.changes import compact_tombstones
+from tests.conftest import TestSessionLocal
+
+
+async def create_task(client, headers, project_id, title):
+    response = await client.post(
+        f"/projects/{project_id}/tasks",
+        json={"title": title},
+        headers=headers,
+    )
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_full_sync_then_delta(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks/changes"
+    first = await create_task(client, auth_headers, test_project["id"], "First")
+    second = await create_task(client, auth_headers, test_project["id"], "Second")
+
+    response = await client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [c["task_id"] for c in data["changes"]] == [first["id"], second["id"]]
+    assert all(c["op"] == "upsert" for c in data["changes"])
+    assert data["has_more"] is False
+    cursor = data["cursor"]
+
+    await client.put(
+        f"/projects/{test_project['id']}/tasks/{first['id']}",
+        json={"status": "done"},
+        headers=auth_headers,
+    )
+    await client.delete(f"/projects/{test_project['id']}/tasks/{second['id']}", headers=auth_headers)
+
+    response = await client.get(url, params={"since": cursor}, headers=auth_headers)
+    changes = response.json()["changes"]
+    assert [(c["op"], c["task_id"]) for c in changes] == [
+        ("upsert", first["id"]),
+        ("delete", second["id"]),
+    ]
+    assert changes[0]["task"]["status"] == "done"
+    assert changes[1]["task"] is None
+
+    response = await client.get(url, params={"since": response.json()["cursor"]}, headers=auth_headers)
+    assert response.json()["changes"] == []
+
+
+@pytest.mark.asyncio
+async def test_changes_paginate_with_cursor(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks/changes"
+    for i in range(3):
+        await create_task(client, auth_headers, test_project["id"], f"Task {i}")
+
+    seen = []
+    cursor = "0"
+    while True:
+        data = (await client.get(url, params={"since": cursor, "limit": 2}, headers=auth_headers)).json()
+        seen.extend(c["task"]["title"] for c in data["changes"])
+        cursor = data["cursor"]
+        if not data["has_more"]:
+            break
+    assert seen == ["Task 0", "Task 1", "Task 2"]
+
+
+@pytest.mark.asyncio
+async def test_compacted_cursor_requires_resync(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks/changes"
+    task = await create_task(client, auth_headers, test_project["id"], "Doomed")
+    cursor = (await client.get(url, headers=auth_headers)).json()["cursor"]
+    await client.delete(f"/projects/{test_project['id']}/tasks/{task['id']}", headers=auth_headers)
+
+    async with TestSessionLocal() as session:
+        removed = await compact_tombstones(session, datetime.now(timezone.utc) + timedelta(days=1))
+        await session.commit()
+    assert removed == 1
+
+    response = await client.get(url, params={"since": cursor}, headers=auth_headers)
+    assert response.status_code == 410
+
+    response = await client.get(url, params={"since": "0"}, headers=auth_headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_changes_invalid_cursor(client: AsyncClient, auth_headers, test_project):
+    response = await client.get(
+        f"/projects/{test_project['id']}/tasks/changes",
+        params={"since": "bogus"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
@@ -0,0 +1,155 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app import metrics
+from app.circuit_breaker import CircuitBreaker
+from app.config import get_settings
+from app.database import RetryingSession, breaker_for, get_db, retry_stats, _breakers
+from app.main import app
+from app.models import User
+from tests.conftest import engine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_on_failures_and_recovers_after_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=4, failure_rate=0.5, open_seconds=10, half_open_probes=1, clock=clock)
+    for failed in (False, True, False):
+        assert breaker.allow()
+        breaker.record_failure() if failed else breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 11
+    assert breaker.allow()
+    # Only one probe at a time while half-open.
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 22
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["opened"] == 2
+
+
+def test_breaker_recovers_from_abandoned_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=1, open_seconds=10, half_open_probes=1, clock=clock)
+    breaker.allow()
+    breaker.record_failure()
+
+    # A cancelled probe gives its slot back.
+    clock.now = 11
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # One that never reports back stops holding it half-open after open_seconds.
+    clock.now = 21
+    assert not breaker.allow()
+    assert breaker.state == "open"
+    clock.now = 31
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_breaker_opens_on_slow_calls_within_window():
+    clock = FakeClock()
+    breaker = CircuitBreaker(window_seconds=10, min_calls=3, slow_seconds=1.0, slow_rate=0.6, clock=clock)
+    breaker.record_success(2.0)
+    breaker.record_success(2.0)
+    clock.now = 20
+    # The slow calls have left the window.
+    breaker.record_success(2.0)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_success(2.0)
+    assert breaker.state == "closed"
+    breaker.record_success(2.0)
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast(client: AsyncClient):
+    override = app.dependency_overrides.pop(get_db)
+    breaker = breaker_for(None)
+    breaker.state, breaker.opened_at = "open", breaker.clock()
+    try:
+        response = await client.get("/projects")
+    finally:
+        app.dependency_overrides[get_db] = override
+        _breakers.clear()
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_breaker_metrics_are_keyed_by_shard_name():
+    breaker_for(None)
+    breaker_for("eu-1")
+    try:
+        snapshot = metrics.snapshot()["db_circuit_breaker"]["breakers"]
+    finally:
+        _breakers.clear()
+    assert set(snapshot) == {"DATABASE_URL", "eu-1"}
+
+
+@pytest.mark.asyncio
+async def test_reads_are_retried_on_transient_errors(monkeypatch):
+    monkeypatch.setattr(get_settings(), "db_retry_base_ms", 0.0)
+    failures = {"left": 0}
+
+    def flaky(conn, cursor, statement, parameters, context, executemany):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise OperationalError(statement, parameters, ConnectionResetError("connection reset"))
+
+    sessions = async_sessionmaker(bind=engine, class_=RetryingSession, expire_on_commit=False)
+    event.listen(engine.sync_engine, "before_cursor_execute", flaky)
+    try:
+        retries = retry_stats["retries"]
+        async with sessions() as session:
+            failures["left"] = 2
+            assert (await session.execute(select(User))).all() == []
+        assert retry_stats["retries"] == retries + 2
+
+        # Past the configured retries the error reaches the caller.
+        async with sessions() as session:
+            failures["left"] = 3
+            with pytest.raises(OperationalError):
+                await session.scalar(select(User.id))
+        # scalars() goes through execute() but is still only retried once over.
+        async with sessions() as session:
+            failures["left"] = 3
+            with pytest.raises(OperationalError):
+                await session.scalars(select(User.id))
+
+        # Statements later in a transaction are never retried.
+        async with sessions() as session:
+            await session.execute(select(User))
+            failures["left"] = 1
+            with pytest.raises(OperationalError):
+                await session.execute(select(User))
+
+        # Neither are writes.
+        async with sessions() as session:
+            failures["left"] = 1
+            with pytest.raises(OperationalError):
+                await session.execute(text("DELETE FROM users"))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", flaky)
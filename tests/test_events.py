@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.services.events import EventBroker
+
+
+async def read_frames(path: str, headers: dict, count: int) -> list[str]:
+    # httpx's ASGI transport buffers whole responses, so drive the app directly
+    # and disconnect once enough frames have arrived.
+    body = b""
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal body
+        if message["type"] == "http.response.body":
+            body += message.get("body", b"")
+            if body.count(b"\n\n") >= count:
+                disconnected.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    return body.decode().split("\n\n")[:count]
+
+
+def test_broker_replays_after_last_event_id():
+    broker = EventBroker(buffer_size=10, queue_size=10)
+    first = broker.publish("p1", "task.created", "{}")
+    broker.publish("p2", "task.created", "{}")
+    second = broker.publish("p1", "task.updated", "{}")
+
+    subscription = broker.subscribe("p1", last_event_id=first)
+    assert len(subscription.backlog) == 1
+    assert subscription.backlog[0].startswith(f"id: {second}\n")
+
+
+def test_broker_sends_reset_when_buffer_overrun():
+    broker = EventBroker(buffer_size=2, queue_size=10)
+    first = broker.publish("p1", "task.created", "{}")
+    for _ in range(3):
+        broker.publish("p1", "task.updated", "{}")
+
+    subscription = broker.subscribe("p1", last_event_id=first)
+    assert subscription.backlog == ["event: reset\ndata: {}\n\n"]
+
+
+def test_broker_sends_reset_for_evicted_topic():
+    broker = EventBroker(buffer_size=10, queue_size=10, max_topics=1)
+    first = broker.publish("p1", "task.created", "{}")
+    broker.publish("p2", "task.created", "{}")
+
+    # p1's buffer went with its topic; resuming it can't replay anything.
+    subscription = broker.subscribe("p1", last_event_id=first)
+    assert subscription.backlog == ["event: reset\ndata: {}\n\n"]
+    assert broker.subscribe("p1", last_event_id=broker.format_id(broker.last_id)).backlog == []
+
+
+def test_broker_sends_reset_for_ids_from_another_process():
+    broker = EventBroker(buffer_size=10, queue_size=10)
+    other = EventBroker(buffer_size=10, queue_size=10)
+    broker.publish("p1", "task.created", "{}")
+    broker.publish("p1", "task.updated", "{}")
+
+    # Same counter value, different process: nothing is replayed from it.
+    stale = other.publish("p1", "task.created", "{}")
+    assert broker.subscribe("p1", last_event_id=stale).backlog == ["event: reset\ndata: {}\n\n"]
+    assert broker.subscribe("p1", last_event_id="7").backlog == ["event: reset\ndata: {}\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_broker_disconnects_slow_consumer():
+    broker = EventBroker(buffer_size=10, queue_size=2)
+    subscription = broker.subscribe("p1")
+    for _ in range(3):
+        broker.publish("p1", "task.updated", "{}")
+
+    assert await subscription.queue.get() is None
+    assert subscription not in subscription.topic.subscribers
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_task_events(client: AsyncClient, auth_headers, test_project):
+    from app.services.events import broker
+
+    start = broker.format_id(broker.last_id)
+    create_response = await client.post(
+        f"/projects/{test_project['id']}/tasks",
+        json={"title": "Streamed Task"},
+        headers=auth_headers,
+    )
+    task_id = create_response.json()["id"]
+    await client.delete(f"/projects/{test_project['id']}/tasks/{task_id}", headers=auth_headers)
+
+    frames = await read_frames(
+        f"/projects/{test_project['id']}/events",
+        {**auth_headers, "Last-Event-ID": start},
+        count=3,
+    )
+    assert frames[0] == "retry: 3000"
+    assert "event: task.created" in frames[1]
+    assert "Streamed Task" in frames[1]
+    assert "event: task.deleted" in frames[2]
+    assert task_id in frames[2]
+
+
+@pytest.mark.asyncio
+async def test_stream_project_not_found(client: AsyncClient, auth_headers):
+    response = await client.get("/projects/nonexistent-id/events", headers=auth_headers)
+    assert response.status_code == 404
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from app.services.idempotency import response_cache, stats
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_replay_returns_first_response(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks"
+    headers = {**auth_headers, "Idempotency-Key": "create-1"}
+
+    first = await client.post(url, json={"title": "Once"}, headers=headers)
+    assert first.status_code == 201
+    second = await client.post(url, json={"title": "Once"}, headers=headers)
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+
+    # Also replayed from the table once the in-memory cache is gone.
+    response_cache.clear()
+    third = await client.post(url, json={"title": "Once"}, headers=headers)
+    assert third.json()["id"] == first.json()["id"]
+
+    listing = await client.get(url, headers=auth_headers)
+    assert listing.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_different_request(client: AsyncClient, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": "project-1"}
+    response = await client.post("/projects", json={"name": "A"}, headers=headers)
+    assert response.status_code == 201
+    response = await client.post("/projects", json={"name": "B"}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_coalesce(client: AsyncClient, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": "project-2"}
+    executed = stats["executed"]
+    responses = await asyncio.gather(
+        *(client.post("/projects", json={"name": "Coalesced"}, headers=headers) for _ in range(3))
+    )
+    assert [r.status_code for r in responses] == [201, 201, 201]
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert stats["executed"] == executed + 1
+
+    listing = await client.get("/projects", headers=auth_headers)
+    assert listing.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_request_does_not_store_key(client: AsyncClient, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": "missing-project"}
+    response = await client.post("/projects/nope/tasks", json={"title": "X"}, headers=headers)
+    assert response.status_code == 404
+    response = await client.post("/projects/nope/tasks", json={"title": "X"}, headers=headers)
+    assert response.status_code == 404
+    assert "idempotent-replayed" not in response.headers
@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from httpx import AsyncClient
+from app.config import get_settings
+from app.models import Job, JobStatus
+from app.services.jobs import JobQueue, job_queue
+from tests.conftest import TestSessionLocal
+
+
+@pytest.fixture
+async def project_with_tasks(client: AsyncClient, auth_headers, test_project):
+    for i in range(3):
+        await client.post(
+            f"/projects/{test_project['id']}/tasks",
+            json={"title": f"Task {i}", "status": "done" if i == 0 else "todo"},
+            headers=auth_headers,
+        )
+    return test_project
+
+
+@pytest.mark.asyncio
+async def test_export_project_job(client: AsyncClient, auth_headers, project_with_tasks):
+    response = await client.post(f"/projects/{project_with_tasks['id']}/export", headers=auth_headers)
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "queued"
+
+    await job_queue.join()
+
+    response = await client.get(f"/jobs/{job_id}", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "succeeded"
+    assert data["progress"] == 100
+    assert data["result"]["project"]["id"] == project_with_tasks["id"]
+    assert len(data["result"]["tasks"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_project_stats_job(client: AsyncClient, auth_headers, project_with_tasks):
+    response = await client.post(f"/projects/{project_with_tasks['id']}/stats", headers=auth_headers)
+    assert response.status_code == 202
+    await job_queue.join()
+
+    response = await client.get(f"/jobs/{response.json()['id']}", headers=auth_headers)
+    result = response.json()["result"]
+    assert result["total"] == 3
+    assert result["by_status"] == {"done": 1, "todo": 2}
+
+
+@pytest.mark.asyncio
+async def test_delete_large_project_runs_in_background(
+    client: AsyncClient, auth_headers, project_with_tasks, monkeypatch
+):
+    monkeypatch.setattr(get_settings(), "job_inline_delete_limit", 1)
+    monkeypatch.setattr(get_settings(), "job_batch_size", 2)
+
+    response = await client.delete(f"/projects/{project_with_tasks['id']}", headers=auth_headers)
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    await job_queue.join()
+
+    job = (await client.get(f"/jobs/{job_id}", headers=auth_headers)).json()
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"deleted_tasks": 3}
+    response = await client.get(f"/projects/{project_with_tasks['id']}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cancel_queued_job(client: AsyncClient, auth_headers, test_user, test_project):
+    async with TestSessionLocal() as session:
+        job = Job(kind="project_stats", owner_id=test_user.id, project_id=test_project["id"])
+        session.add(job)
+        await session.commit()
+
+    response = await client.post(f"/jobs/{job.id}/cancel", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+
+    response = await client.post(f"/jobs/{job.id}/cancel", headers=auth_headers)
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_job_requests_cancellation(client: AsyncClient, auth_headers, test_user, test_project):
+    async with TestSessionLocal() as session:
+        job = Job(kind="project_stats", owner_id=test_user.id, project_id=test_project["id"], status=JobStatus.RUNNING)
+        session.add(job)
+        await session.commit()
+
+    response = await client.post(f"/jobs/{job.id}/cancel", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "running"
+    async with TestSessionLocal() as session:
+        assert (await session.get(Job, job.id)).cancel_requested
+
+
+@pytest.mark.asyncio
+async def test_interrupted_jobs_resume_on_start(client: AsyncClient, auth_headers, test_user, test_project):
+    async with TestSessionLocal() as session:
+        job = Job(
+            kind="project_stats",
+            owner_id=test_user.id,
+            project_id=test_project["id"],
+            status=JobStatus.RUNNING,
+        )
+        session.add(job)
+        await session.commit()
+
+    await job_queue.start()
+    await job_queue.join()
+
+    response = await client.get(f"/jobs/{job.id}", headers=auth_headers)
+    assert response.json()["status"] == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_claimed_once(client: AsyncClient, auth_headers, test_user, test_project):
+    now = datetime.now(timezone.utc)
+    async with TestSessionLocal() as session:
+        # Another process is still running this one.
+        leased = Job(
+            kind="project_stats",
+            owner_id=test_user.id,
+            project_id=test_project["id"],
+            status=JobStatus.RUNNING,
+            lease_owner="elsewhere",
+            lease_expires_at=now + timedelta(minutes=5),
+        )
+        expired = Job(
+            kind="project_stats",
+            owner_id=test_user.id,
+            project_id=test_project["id"],
+            status=JobStatus.RUNNING,
+            lease_owner="elsewhere",
+            lease_expires_at=now - timedelta(minutes=5),
+        )
+        session.add_all([leased, expired])
+        await session.commit()
+
+    await job_queue.start()
+    await job_queue.join()
+    response = await client.get(f"/jobs/{leased.id}", headers=auth_headers)
+    assert response.json()["status"] == "running"
+    response = await client.get(f"/jobs/{expired.id}", headers=auth_headers)
+    assert response.json()["status"] == "succeeded"
+
+    # Two queues racing for the same job: only one claims it.
+    async with TestSessionLocal() as session:
+        job = Job(kind="project_stats", owner_id=test_user.id, project_id=test_project["id"])
+        session.add(job)
+        await session.commit()
+    other = JobQueue(session_factory=TestSessionLocal)
+    claims = await asyncio.gather(
+        job_queue._claim(TestSessionLocal, job.id),
+        other._claim(TestSessionLocal, job.id),
+    )
+    assert len([claim for claim in claims if claim is not None]) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_job_not_found(client: AsyncClient, auth_headers):
+    response = await client.get("/jobs/nonexistent-id", headers=auth_headers)
+    assert response.status_code == 404
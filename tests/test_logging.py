@@ -0,0 +1,55 @@
+import json
+import logging
+import queue
+import pytest
+from httpx import AsyncClient
+from app.log import JsonFormatter, SamplingFilter, DroppingQueueHandler, request_id_var, stats
+
+
+@pytest.mark.asyncio
+async def test_access_log_carries_request_id_and_latency(client: AsyncClient, auth_headers, caplog):
+    caplog.set_level(logging.INFO, logger="app.access")
+    response = await client.get("/projects", headers={**auth_headers, "X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+
+    record = [r for r in caplog.records if r.name == "app.access"][-1]
+    assert record.status == 200
+    assert record.route == "/projects"
+    assert record.duration_ms >= 0
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "GET /projects 200"
+    assert entry["method"] == "GET"
+    assert entry["status"] == 200
+
+    response = await client.get("/health")
+    assert len(response.headers["x-request-id"]) == 32
+
+
+def test_queue_handler_stamps_request_id_and_counts_drops():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("tests.logging.queue")
+    logger.propagate = False
+    logger.addHandler(handler)
+    dropped = stats["dropped"]
+    token = request_id_var.set("req-1")
+    try:
+        logger.warning("first %s", "one")
+        logger.warning("second")
+    finally:
+        request_id_var.reset(token)
+        logger.removeHandler(handler)
+
+    record = handler.queue.get_nowait()
+    assert record.getMessage() == "first one"
+    assert json.loads(JsonFormatter().format(record))["request_id"] == "req-1"
+    assert stats["dropped"] == dropped + 1
+
+
+def test_sampling_filter_keeps_warnings():
+    sampling = SamplingFilter({"noisy": 0.0, "noisy.ok": 1.0})
+    record = logging.makeLogRecord({"name": "noisy.child", "levelno": logging.INFO})
+    assert not sampling.filter(record)
+    assert sampling.filter(logging.makeLogRecord({"name": "noisy.child", "levelno": logging.WARNING}))
+    assert sampling.filter(logging.makeLogRecord({"name": "noisy.ok", "levelno": logging.INFO}))
+    assert sampling.filter(logging.makeLogRecord({"name": "other", "levelno": logging.INFO}))
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+import pytest
+from httpx import AsyncClient
+from app.config import get_settings
+from app.log import request_id_var
+from app.profiling import ProfilingMiddleware, profile_store, sign_profile_token, verify_profile_token, stats
+
+
+@pytest.mark.asyncio
+async def test_signed_header_profiles_request(client: AsyncClient, auth_headers):
+    token = sign_profile_token(int(time.time()) + 60)
+    response = await client.get("/projects", headers={**auth_headers, "X-Profile": token})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    response = await client.get(f"/debug/profiles/{profile_id}", headers={"X-Profile": token})
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["route"] == "/projects"
+    assert profile["status"] == 200
+    assert profile["db"]["queries"] >= 2
+    assert len(profile["db"]["statements"]) == profile["db"]["queries"]
+    assert profile["calls"]
+
+    response = await client.get(f"/debug/profiles/{profile_id}")
+    assert response.status_code == 403
+
+    # A forged or expired token is ignored.
+    response = await client.get("/projects", headers={**auth_headers, "X-Profile": token[:-1] + "0"})
+    assert "x-profile-id" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_sampling_skips_overlapping_requests():
+    class App:
+        async def __call__(self, scope, receive, send):
+            await asyncio.sleep(0.01)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+    async def call(request_id, headers=()):
+        request_id_var.set(request_id)
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": list(headers)}
+        await middleware(scope, None, lambda message: asyncio.sleep(0))
+
+    middleware = ProfilingMiddleware(App(), sample_rate=1.0, rng=lambda: 0.0)
+    profiled, skipped = stats["profiled"], stats["skipped_busy"]
+    await asyncio.gather(call("sampled-1"), call("sampled-2"))
+    assert (stats["profiled"] - profiled, stats["skipped_busy"] - skipped) == (1, 1)
+
+    # Asked-for profiles still run, and say what else was running.
+    middleware.sample_rate = 0.0
+    token = sign_profile_token(int(time.time()) + 60).encode()
+    await asyncio.gather(call("other"), call("asked", [(b"x-profile", token)]))
+    assert profile_store.get("asked")["overlapping_requests"] == 1
+
+
+def test_profile_tokens_expire():
+    token = sign_profile_token(1000)
+    assert verify_profile_token(token, now=999)
+    assert not verify_profile_token(token, now=1001)
+    assert not verify_profile_token("garbage")
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log(client: AsyncClient, auth_headers, caplog, monkeypatch):
+    monkeypatch.setattr(get_settings(), "slow_query_ms", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        await client.post("/projects", json={"name": "Secret name"}, headers=auth_headers)
+
+    records = [r for r in caplog.records if r.name == "app.slow_query"]
+    insert = next(r for r in records if r.statement.startswith("INSERT INTO projects"))
+    assert insert.route == "/projects"
+    assert insert.duration_ms >= 0
+    assert "Secret name" not in str(insert.parameters)
+    assert "str" in str(insert.parameters)
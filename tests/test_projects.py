@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 from httpx import AsyncClient
 
 
@@ -65,6 +66,59 @@ async def test_list_projects(client: AsyncClient, auth_headers):
     assert "total_pages" in data
 
 
+@pytest.mark.asyncio
+async def test_list_projects_sparse_fields(client: AsyncClient, auth_headers):
+    await client.post("/projects", json={"name": "Project 1", "description": "Long"}, headers=auth_headers)
+
+    response = await client.get("/projects", headers=auth_headers)
+    project = response.json()["projects"][0]
+    assert "description" not in project
+    assert project["name"] == "Project 1"
+
+    response = await client.get("/projects", params={"fields": "name"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert set(response.json()["projects"][0]) == {"id", "name"}
+
+
+@pytest.mark.asyncio
+async def test_list_projects_with_task_previews(client: AsyncClient, auth_headers, count_statements):
+    for name in ("One", "Two", "Empty"):
+        project = (await client.post("/projects", json={"name": name}, headers=auth_headers)).json()
+        if name != "Empty":
+            for i in range(3):
+                await client.post(
+                    f"/projects/{project['id']}/tasks",
+                    json={"title": f"{name} {i}", "description": "Long"},
+                    headers=auth_headers,
+                )
+
+    with count_statements() as statements:
+        await client.get("/projects", headers=auth_headers)
+    plain = len(statements)
+    with count_statements() as statements:
+        response = await client.get(
+            "/projects",
+            params={"include": "tasks_preview", "preview_limit": 2},
+            headers=auth_headers,
+        )
+
+    assert response.status_code == 200
+    # One extra query for the whole page.
+    assert len(statements) == plain + 1
+    previews = {project["name"]: project["tasks_preview"] for project in response.json()["projects"]}
+    assert [task["title"] for task in previews["One"]] == ["One 0", "One 1"]
+    assert [task["title"] for task in previews["Two"]] == ["Two 0", "Two 1"]
+    assert previews["Empty"] == []
+    assert "description" not in previews["One"][0]
+    assert previews["One"][0]["status"] == "todo"
+
+    response = await client.get("/projects", headers=auth_headers)
+    assert "tasks_preview" not in response.json()["projects"][0]
+
+    response = await client.get("/projects", params={"include": "members"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_get_project_success(client: AsyncClient, auth_headers):
     # Create a project
@@ -165,4 +219,61 @@ async def test_delete_project_success(client: AsyncClient, auth_headers):
 @pytest.mark.asyncio
 async def test_delete_project_not_found(client: AsyncClient, auth_headers):
     response = await client.delete("/projects/nonexistent-id", headers=auth_headers)
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_duplicate_project(client: AsyncClient, auth_headers, test_user, count_statements):
+    response = await client.post("/projects", json={"name": "Template", "description": "Launch plan"}, headers=auth_headers)
+    template = response.json()
+    url = f"/projects/{template['id']}/tasks"
+    due = datetime(2026, 3, 1, 9, 30, 15, 250000, tzinfo=timezone.utc)
+    first = (await client.post(
+        url,
+        json={"title": "Kickoff", "status": "done", "due_date": due.isoformat(), "assignee_id": test_user.id},
+        headers=auth_headers,
+    )).json()
+    second = (await client.post(url, json={"title": "Ship", "priority": "high"}, headers=auth_headers)).json()
+    # Board order is copied, not creation order.
+    await client.post(f"{url}/{second['id']}/move", json={"before_id": first["id"]}, headers=auth_headers)
+
+    with count_statements() as statements:
+        response = await client.post(f"/projects/{template['id']}/duplicate", json={}, headers=auth_headers)
+    assert response.status_code == 201
+    copy = response.json()
+    assert copy["name"] == "Template (copy)"
+    assert copy["description"] == "Launch plan"
+    assert copy["tasks_copied"] == 2
+    assert len([statement for statement in statements if statement.lstrip().upper().startswith("INSERT INTO TASKS")]) == 1
+
+    response = await client.get(
+        f"/projects/{copy['id']}/tasks", params={"sort_by": "rank", "order": "asc", "fields": "title,status,due_date,assignee_id"},
+        headers=auth_headers,
+    )
+    tasks = response.json()["tasks"]
+    assert [task["title"] for task in tasks] == ["Ship", "Kickoff"]
+    assert tasks[1]["status"] == "done"
+    assert tasks[1]["assignee_id"] == test_user.id
+    assert {task["id"] for task in tasks}.isdisjoint({first["id"], second["id"]})
+
+    response = await client.post(
+        f"/projects/{template['id']}/duplicate",
+        json={"name": "Q2 launch", "reset_status": True, "due_date_shift_days": 30, "clear_assignees": True},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    copy = response.json()
+    assert copy["name"] == "Q2 launch"
+    response = await client.get(f"/projects/{copy['id']}/tasks", params={"status": "todo"}, headers=auth_headers)
+    tasks = {task["title"]: task for task in response.json()["tasks"]}
+    assert set(tasks) == {"Kickoff", "Ship"}
+    assert tasks["Kickoff"]["assignee_id"] is None
+    assert datetime.fromisoformat(tasks["Kickoff"]["due_date"]).replace(tzinfo=timezone.utc) == due + timedelta(days=30)
+    assert tasks["Ship"]["due_date"] is None
+
+    # Copies show up in delta sync.
+    response = await client.get(f"/projects/{copy['id']}/tasks/changes", params={"since": "0"}, headers=auth_headers)
+    assert len(response.json()["changes"]) == 2
+
+    response = await client.post("/projects/missing/duplicate", json={}, headers=auth_headers)
+    assert response.status_code == 404
@@ -0,0 +1,30 @@
+import time
+import pytest
+from httpx import AsyncClient
+from app import queries
+from app.profiling import sign_profile_token
+from tests.conftest import TestSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_owned_project_lookup_is_scoped_to_owner(client: AsyncClient, auth_headers, test_user):
+    response = await client.post("/projects", json={"name": "Scoped"}, headers=auth_headers)
+    project_id = response.json()["id"]
+
+    async with TestSessionLocal() as db:
+        assert (await queries.get_owned_project(db, project_id, test_user.id)).name == "Scoped"
+        assert await queries.get_owned_project(db, project_id, "someone-else") is None
+
+
+@pytest.mark.asyncio
+async def test_metrics_report_compiled_cache_hits(client: AsyncClient, auth_headers):
+    for _ in range(3):
+        await client.get("/auth/me", headers=auth_headers)
+
+    assert (await client.get("/metrics")).status_code == 403
+    token = sign_profile_token(int(time.time()) + 60)
+    response = await client.get("/metrics", headers={"X-Profile": token})
+    assert response.status_code == 200
+    cache = response.json()["db_compiled_cache"]
+    assert cache["hit"] > 0
+    assert 0 < cache["hit_rate"] <= 1
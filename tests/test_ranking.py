@@ -0,0 +1,125 @@
+import pytest
+from httpx import AsyncClient
+from app.config import get_settings
+from app.services.jobs import job_queue
+from app.services import ranking
+from app.services.ranking import rank_between, spaced_ranks
+
+
+async def create_tasks(client, headers, project_id, count):
+    tasks = []
+    for i in range(count):
+        response = await client.post(
+            f"/projects/{project_id}/tasks",
+            json={"title": f"Task {i}"},
+            headers=headers,
+        )
+        tasks.append(response.json())
+    return tasks
+
+
+async def ranked_titles(client, headers, project_id, **params):
+    response = await client.get(
+        f"/projects/{project_id}/tasks",
+        params={"sort_by": "rank", "order": "asc", "per_page": 100, **params},
+        headers=headers,
+    )
+    return [task["title"] for task in response.json()["tasks"]]
+
+
+def test_rank_between_orders_keys():
+    assert rank_between(None, None) < rank_between("i", None)
+    assert rank_between(None, "i") < "i"
+    assert "a" < rank_between("a", "a1") < "a1"
+    assert "az" < rank_between("az", "b") < "b"
+    with pytest.raises(ValueError):
+        rank_between("b", "a")
+    ranks = spaced_ranks(1000)
+    assert ranks == sorted(ranks) and len(set(ranks)) == 1000
+
+
+@pytest.mark.asyncio
+async def test_move_task(client: AsyncClient, auth_headers, test_project):
+    project_id = test_project["id"]
+    a, b, c = await create_tasks(client, auth_headers, project_id, 3)
+    assert await ranked_titles(client, auth_headers, project_id) == ["Task 0", "Task 1", "Task 2"]
+
+    url = f"/projects/{project_id}/tasks/{c['id']}/move"
+    response = await client.post(url, json={"after_id": a["id"], "before_id": b["id"]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert await ranked_titles(client, auth_headers, project_id) == ["Task 0", "Task 2", "Task 1"]
+
+    # One neighbour is enough; the other side is looked up.
+    response = await client.post(url, json={"before_id": a["id"]}, headers=auth_headers)
+    assert await ranked_titles(client, auth_headers, project_id) == ["Task 2", "Task 0", "Task 1"]
+
+    response = await client.post(url, json={"status": "done"}, headers=auth_headers)
+    assert response.json()["status"] == "done"
+    assert await ranked_titles(client, auth_headers, project_id) == ["Task 0", "Task 1", "Task 2"]
+    assert await ranked_titles(client, auth_headers, project_id, status="todo") == ["Task 0", "Task 1"]
+
+    response = await client.post(url, json={"after_id": b["id"], "before_id": a["id"]}, headers=auth_headers)
+    assert response.status_code == 400
+    response = await client.post(url, json={"after_id": "missing"}, headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_long_ranks_trigger_rebalance(client: AsyncClient, auth_headers, test_project, monkeypatch):
+    project_id = test_project["id"]
+    first, second, third = await create_tasks(client, auth_headers, project_id, 3)
+
+    # Moving tasks into the same gap over and over makes the keys longer.
+    for i in range(12):
+        task = (third, first)[i % 2]
+        response = await client.post(
+            f"/projects/{project_id}/tasks/{task['id']}/move",
+            json={"before_id": second["id"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+    assert len(response.json()["rank"]) > 3
+
+    monkeypatch.setattr(get_settings(), "rank_rebalance_length", 3)
+    response = await client.post(
+        f"/projects/{project_id}/tasks/{third['id']}/move",
+        json={"before_id": second["id"]},
+        headers=auth_headers,
+    )
+    await job_queue.join()
+
+    response = await client.get(
+        f"/projects/{project_id}/tasks",
+        params={"sort_by": "rank", "order": "asc", "fields": "title,rank"},
+        headers=auth_headers,
+    )
+    tasks = response.json()["tasks"]
+    assert all(len(task["rank"]) <= 3 for task in tasks)
+    assert [task["title"] for task in tasks] == ["Task 0", "Task 2", "Task 1"]
+
+
+@pytest.mark.asyncio
+async def test_ranks_too_long_for_the_column_rebalance_inline(client: AsyncClient, auth_headers, test_project, monkeypatch):
+    # The rebalance job may never run (queue full, one already pending), so
+    # a key that would not fit rewrites the project's ranks in the request.
+    monkeypatch.setattr(ranking, "RANK_MAX_LENGTH", 3)
+    project_id = test_project["id"]
+    first, second, third = await create_tasks(client, auth_headers, project_id, 3)
+    for i in range(12):
+        task = (third, first)[i % 2]
+        response = await client.post(
+            f"/projects/{project_id}/tasks/{task['id']}/move",
+            json={"before_id": second["id"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert len(response.json()["rank"]) <= 3
+
+    response = await client.get(
+        f"/projects/{project_id}/tasks",
+        params={"sort_by": "rank", "order": "asc", "fields": "title,rank"},
+        headers=auth_headers,
+    )
+    tasks = response.json()["tasks"]
+    assert all(len(task["rank"]) <= 3 for task in tasks)
+    assert [task["title"] for task in tasks] == ["Task 2", "Task 0", "Task 1"]
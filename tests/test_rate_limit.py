@@ -0,0 +1,58 @@
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.middleware.rate_limit import Limit, MemoryBucketStore
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills_over_time():
+    store = MemoryBucketStore(shards=4)
+    limit = Limit(per_minute=60)
+    for _ in range(60):
+        assert await store.consume("k", limit, now=0.0) == 0.0
+    retry_after = await store.consume("k", limit, now=0.0)
+    assert retry_after == pytest.approx(1.0)
+    assert await store.consume("k", limit, now=1.0) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_memory_store_evicts_idle_buckets():
+    store = MemoryBucketStore(shards=1, max_keys_per_shard=8)
+    limit = Limit(per_minute=1)
+    for i in range(20):
+        await store.consume(f"key-{i}", limit, now=0.0)
+    assert sum(len(shard) for shard in store._shards) <= 8
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited(client: AsyncClient, test_user):
+    limit = app.state.rate_limiter.groups[0].per_ip.per_minute
+    for _ in range(limit):
+        response = await client.post(
+            "/auth/login",
+            data={"username": "testuser@example.com", "password": "wrongpassword"},
+        )
+        assert response.status_code == 401
+
+    response = await client.post(
+        "/auth/login",
+        data={"username": "testuser@example.com", "password": "testpass123"},
+    )
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.json()["status_code"] == 429
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_returns_503(client: AsyncClient, auth_headers):
+    limiter = app.state.rate_limiter
+    limiter.in_flight = limiter.max_concurrency
+    try:
+        response = await client.get("/auth/me", headers=auth_headers)
+    finally:
+        limiter.in_flight = 0
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+    health = await client.get("/health")
+    assert health.status_code == 200
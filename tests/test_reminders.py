@@ -0,0 +1,53 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from httpx import AsyncClient
+from sqlalchemy import select
+from app.models import TaskReminder
+from app.services.events import broker
+from app.services.reminders import scan_due_tasks
+from tests.conftest import TestSessionLocal
+
+
+async def create_task(client, headers, project_id, title, due_in_hours, status="todo"):
+    due_date = datetime.now(timezone.utc) + timedelta(hours=due_in_hours)
+    response = await client.post(
+        f"/projects/{project_id}/tasks",
+        json={"title": title, "due_date": due_date.isoformat(), "status": status},
+        headers=headers,
+    )
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_scan_creates_each_reminder_once(client: AsyncClient, auth_headers, test_project):
+    project_id = test_project["id"]
+    overdue = await create_task(client, auth_headers, project_id, "Overdue", -2)
+    upcoming = await create_task(client, auth_headers, project_id, "Upcoming", 3)
+    await create_task(client, auth_headers, project_id, "Done", 3, status="done")
+    await create_task(client, auth_headers, project_id, "Later", 24 * 7)
+    subscription = broker.subscribe(project_id)
+
+    assert await scan_due_tasks(TestSessionLocal, "worker-a") == 2
+    assert await scan_due_tasks(TestSessionLocal, "worker-a") == 0
+
+    async with TestSessionLocal() as session:
+        result = await session.execute(select(TaskReminder.task_id, TaskReminder.kind))
+        assert set(result.all()) == {(overdue["id"], "overdue"), (upcoming["id"], "upcoming")}
+
+    frames = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+    broker.unsubscribe(subscription)
+    assert len(frames) == 2
+    assert all("event: task.reminder" in frame for frame in frames)
+
+
+@pytest.mark.asyncio
+async def test_only_the_lease_holder_scans(client: AsyncClient, auth_headers, test_project):
+    await create_task(client, auth_headers, test_project["id"], "Upcoming", 1)
+
+    assert await scan_due_tasks(TestSessionLocal, "worker-a") == 1
+    assert await scan_due_tasks(TestSessionLocal, "worker-b") is None
+
+    # Once worker-a's lease runs out, worker-b takes over.
+    later = datetime.now(timezone.utc) + timedelta(hours=1)
+    assert await scan_due_tasks(TestSessionLocal, "worker-b", now=later) == 1
+    assert await scan_due_tasks(TestSessionLocal, "worker-a") is None
@@ -0,0 +1,23 @@
+import pytest
+from httpx import AsyncClient
+from app import server
+
+
+def test_worker_count_defaults_to_one():
+    assert server.worker_count(None) == 1
+    assert server.worker_count(3, shared_rate_limits=True) == 3
+    # In-memory rate limits would be multiplied by the worker count.
+    with pytest.raises(SystemExit):
+        server.worker_count(3)
+
+
+def test_event_loop_and_http_protocol_prefer_fast_implementations():
+    assert server.event_loop() in ("uvloop", "asyncio")
+    assert server.http_protocol() in ("httptools", "h11")
+
+
+@pytest.mark.asyncio
+async def test_not_ready_before_lifespan_startup(client: AsyncClient):
+    response = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
@@ -0,0 +1,178 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func
+from app.config import get_settings
+from app.database import Base, get_db
+from app.main import app
+from app.models import User, Project, WebhookEndpoint, WebhookDelivery, OutboxEvent
+from app.sharding import HashRing, get_shard_router, dispose_shards, rebalance
+from app.utils.security import hash_password, create_access_token
+
+
+@pytest.fixture
+async def shards(tmp_path, monkeypatch):
+    # Points DATABASE_SHARDS at SQLite files and lets requests use the real get_db.
+    async def configure(*names):
+        await dispose_shards()
+        urls = ",".join(f"{name}=sqlite+aiosqlite:///{tmp_path / name}.db" for name in names)
+        monkeypatch.setattr(get_settings(), "database_shards", urls)
+        router = get_shard_router()
+        for name in names:
+            async with router.engine(name).begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        return router
+
+    override = app.dependency_overrides.pop(get_db)
+    yield configure
+    app.dependency_overrides[get_db] = override
+    await dispose_shards()
+
+
+async def count_rows(router, name, model, condition):
+    async with router.sessionmaker(name)() as session:
+        return (await session.execute(select(func.count()).select_from(model).where(condition))).scalar()
+
+
+def test_hash_ring_only_moves_keys_to_a_new_shard():
+    keys = [f"user-{i}" for i in range(3000)]
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+
+    counts = {}
+    for key in keys:
+        counts[before.shard_for(key)] = counts.get(before.shard_for(key), 0) + 1
+    assert all(700 < count < 1300 for count in counts.values())
+
+    moved = [key for key in keys if before.shard_for(key) != after.shard_for(key)]
+    assert all(after.shard_for(key) == "d" for key in moved)
+    assert 400 < len(moved) < 1100
+
+
+@pytest.mark.asyncio
+async def test_requests_use_the_users_shard(client: AsyncClient, shards):
+    router = await shards("a", "b")
+
+    for i in range(3):
+        email = f"shard{i}@example.com"
+        response = await client.post(
+            "/auth/register",
+            json={"email": email, "password": "testpass123", "full_name": f"User {i}"},
+        )
+        assert response.status_code == 201
+        user_id = response.json()["id"]
+        response = await client.post("/auth/login", data={"username": email, "password": "testpass123"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post("/projects", json={"name": f"Project {i}"}, headers=headers)
+        assert response.status_code == 201
+
+        home = router.shard_for_user(user_id)
+        for name in router.names:
+            expected = 1 if name == home else 0
+            assert await count_rows(router, name, User, User.id == user_id) == expected
+            assert await count_rows(router, name, Project, Project.owner_id == user_id) == expected
+
+    # E-mail addresses stay unique across shards.
+    response = await client.post(
+        "/auth/register",
+        json={"email": "shard0@example.com", "password": "testpass123", "full_name": "Again"},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_concurrent_registrations_of_one_email(client: AsyncClient, shards):
+    router = await shards("a", "b")
+    body = {"email": "race@example.com", "password": "testpass123", "full_name": "Race"}
+
+    responses = await asyncio.gather(*(client.post("/auth/register", json=body) for _ in range(2)))
+    assert sorted(response.status_code for response in responses) == [201, 400]
+    user_id = next(response.json()["id"] for response in responses if response.status_code == 201)
+    for name in router.names:
+        expected = 1 if name == router.shard_for_user(user_id) else 0
+        assert await count_rows(router, name, User, User.email == body["email"]) == expected
+    assert router.shard_for_user(user_id) == router.ring.shard_for(body["email"])
+
+
+@pytest.mark.asyncio
+async def test_assignee_on_another_shard_is_rejected(client: AsyncClient, shards):
+    router = await shards("a", "b")
+    users = {}
+    for i in range(20):
+        email = f"assign{i}@example.com"
+        body = {"email": email, "password": "testpass123", "full_name": f"User {i}"}
+        user_id = (await client.post("/auth/register", json=body)).json()["id"]
+        users.setdefault(router.shard_for_user(user_id), (user_id, email))
+        if len(users) == 2:
+            break
+    (owner_id, email), (other_id, _) = users["a"], users["b"]
+    token = (await client.post("/auth/login", data={"username": email, "password": "testpass123"})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    project_id = (await client.post("/projects", json={"name": "Cross"}, headers=headers)).json()["id"]
+
+    response = await client.post(f"/projects/{project_id}/tasks", json={"title": "T", "assignee_id": other_id}, headers=headers)
+    assert response.status_code == 400
+    assert "another shard" in response.json()["detail"]
+    response = await client.post(f"/projects/{project_id}/tasks", json={"title": "T", "assignee_id": "nobody"}, headers=headers)
+    assert response.json()["detail"] == "Assignee not found"
+    response = await client.post(f"/projects/{project_id}/tasks", json={"title": "T", "assignee_id": owner_id}, headers=headers)
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_rebalance_moves_users_to_a_new_shard(client: AsyncClient, shards):
+    router = await shards("a", "b")
+    users = {}
+    for i in range(12):
+        user_id = f"user-{i}"
+        async with router.sessionmaker(router.shard_for_user(user_id))() as session:
+            session.add(User(
+                id=user_id,
+                email=f"{user_id}@example.com",
+                hashed_password=hash_password("testpass123"),
+                full_name=user_id,
+            ))
+            await session.flush()
+            endpoint = WebhookEndpoint(owner_id=user_id, url="https://hooks.example.com/", secret="s")
+            session.add(endpoint)
+            await session.flush()
+            session.add(WebhookDelivery(
+                endpoint_id=endpoint.id,
+                event_id=1,
+                event_type="project.created",
+                payload="{}",
+                created_at=datetime.now(timezone.utc),
+            ))
+            await session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+        project = (await client.post("/projects", json={"name": user_id}, headers=headers)).json()
+        await client.post(f"/projects/{project['id']}/tasks", json={"title": "Task", "assignee_id": user_id}, headers=headers)
+        users[user_id] = (router.shard_for_user(user_id), project["id"], headers)
+
+    router = await shards("a", "b", "c")
+    moves = await rebalance(router)
+    assert moves
+    assert all(target == "c" for _, _, target in moves)
+    # A dry run changes nothing.
+    assert await count_rows(router, "c", User, User.id.is_not(None)) == 0
+
+    assert await rebalance(router, execute=True) == moves
+    for user_id, source, _ in moves:
+        assert await count_rows(router, source, User, User.id == user_id) == 0
+        assert await count_rows(router, source, Project, Project.owner_id == user_id) == 0
+        assert await count_rows(router, "c", User, User.id == user_id) == 1
+        # Webhook endpoints, their pending deliveries and unsent outbox events move along.
+        for model, condition in (
+            (WebhookEndpoint, WebhookEndpoint.owner_id == user_id),
+            (WebhookDelivery, WebhookDelivery.endpoint_id.in_(select(WebhookEndpoint.id).where(WebhookEndpoint.owner_id == user_id))),
+            (OutboxEvent, OutboxEvent.owner_id == user_id),
+        ):
+            assert await count_rows(router, source, model, condition) == 0
+            assert await count_rows(router, "c", model, condition) >= 1
+
+    for user_id, (_, project_id, headers) in users.items():
+        response = await client.get(f"/projects/{project_id}/tasks", headers=headers)
+        assert response.status_code == 200
+        assert [task["assignee_id"] for task in response.json()["tasks"]] == [user_id]
+    assert await rebalance(router) == []
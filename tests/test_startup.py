@@ -0,0 +1,20 @@
+import os
+import pytest
+from benchmarks.startup import measure_first_request
+
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "3.0"))
+
+
+@pytest.fixture(scope="module")
+def startup():
+    # Best of three fresh interpreters, to keep a noisy CI box from flaking.
+    runs = [measure_first_request() for _ in range(3)]
+    return min(runs, key=lambda run: run["total_seconds"])
+
+
+def test_app_build_defers_heavy_imports(startup):
+    assert startup["lazy_modules_at_import"] == []
+
+
+def test_time_to_first_request_within_budget(startup):
+    assert startup["total_seconds"] < STARTUP_BUDGET_SECONDS
@@ -1,15 +1,9 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 from httpx import AsyncClient
-
-
-@pytest.fixture
-async def test_project(client: AsyncClient, auth_headers):
-    response = await client.post(
-        "/projects",
-        json={"name": "Task Test Project"},
-        headers=auth_headers,
-    )
-    return response.json()
+from app.config import get_settings
+from app.models import Project, Task, User
+from tests.conftest import TestSessionLocal
 
 
 @pytest.mark.asyncio
@@ -97,6 +91,27 @@ async def test_list_tasks(client: AsyncClient, auth_headers, test_project):
     assert "total_pages" in data
 
 
+@pytest.mark.asyncio
+async def test_list_tasks_sparse_fields(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks"
+    await client.post(url, json={"title": "Task 1", "description": "x" * 1000}, headers=auth_headers)
+
+    response = await client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    task = response.json()["tasks"][0]
+    assert "description" not in task
+    assert task["title"] == "Task 1"
+
+    response = await client.get(url, params={"fields": "title,description"}, headers=auth_headers)
+    assert response.status_code == 200
+    task = response.json()["tasks"][0]
+    assert set(task) == {"id", "title", "description"}
+    assert task["description"] == "x" * 1000
+
+    response = await client.get(url, params={"fields": "title,secret"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_list_tasks_filter_by_status(client: AsyncClient, auth_headers, test_project):
     # Create tasks with different statuses
@@ -147,6 +162,49 @@ async def test_list_tasks_filter_by_priority(client: AsyncClient, auth_headers,
         assert task["priority"] == "high"
 
 
+@pytest.mark.asyncio
+async def test_list_tasks_rich_filters(client: AsyncClient, auth_headers, test_project, test_user):
+    url = f"/projects/{test_project['id']}/tasks"
+    now = datetime.now(timezone.utc)
+    for title, body in (
+        ("Late", {"status": "todo", "due_date": (now - timedelta(days=2)).isoformat()}),
+        ("Late but done", {"status": "done", "due_date": (now - timedelta(days=1)).isoformat()}),
+        ("Soon", {"status": "in_progress", "due_date": (now + timedelta(days=1)).isoformat(), "assignee_id": test_user.id}),
+        ("Someday", {"status": "todo", "priority": "high"}),
+    ):
+        await client.post(url, json={"title": title, **body}, headers=auth_headers)
+
+    async def titles(**params):
+        response = await client.get(url, params={"sort_by": "due_date", "order": "asc", **params}, headers=auth_headers)
+        assert response.status_code == 200
+        return {task["title"] for task in response.json()["tasks"]}
+
+    assert await titles(status="todo,in_progress") == {"Late", "Soon", "Someday"}
+    assert await titles(overdue="true") == {"Late"}
+    assert await titles(overdue="false") == {"Late but done", "Soon", "Someday"}
+    assert await titles(due_after=(now - timedelta(days=1, hours=1)).isoformat()) == {"Late but done", "Soon"}
+    assert await titles(due_before=now.isoformat(), status="done") == {"Late but done"}
+    assert await titles(assignee_id=test_user.id) == {"Soon"}
+    assert await titles(assignee_id="unassigned", priority="high,low") == {"Someday"}
+    assert await titles(assignee_id=f"unassigned,{test_user.id}", created_since=(now - timedelta(hours=1)).isoformat()) == {
+        "Late", "Late but done", "Soon", "Someday",
+    }
+    assert await titles(created_since=(now + timedelta(hours=1)).isoformat()) == set()
+
+    # Filters combine with every sort, including over archived tasks.
+    for sort_by in ("created_at", "due_date", "priority", "rank"):
+        response = await client.get(
+            url,
+            params={"status": "todo", "sort_by": sort_by, "include_archived": "true"},
+            headers=auth_headers,
+        )
+        assert response.json()["total"] == 2
+
+    response = await client.get(url, params={"status": "todo,blocked"}, headers=auth_headers)
+    assert response.status_code == 422
+    assert response.json()["details"][0]["field"] == "query -> status"
+
+
 @pytest.mark.asyncio
 async def test_get_task_success(client: AsyncClient, auth_headers, test_project):
     # Create a task
@@ -264,4 +322,127 @@ async def test_delete_task_not_found(client: AsyncClient, auth_headers, test_pro
         f"/projects/{test_project['id']}/tasks/nonexistent-id",
         headers=auth_headers,
     )
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_sort_by_priority(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks"
+    for priority in ("medium", "high", "low"):
+        await client.post(url, json={"title": priority, "priority": priority}, headers=auth_headers)
+
+    response = await client.get(url, params={"sort_by": "priority", "order": "desc"}, headers=auth_headers)
+    assert [task["priority"] for task in response.json()["tasks"]] == ["high", "medium", "low"]
+
+    response = await client.get(url, params={"sort_by": "priority", "order": "asc"}, headers=auth_headers)
+    assert [task["priority"] for task in response.json()["tasks"]] == ["low", "medium", "high"]
+
+
+@pytest.mark.asyncio
+async def test_multi_get_tasks(client: AsyncClient, auth_headers, test_project, count_statements):
+    url = f"/projects/{test_project['id']}/tasks"
+    first = (await client.post(url, json={"title": "First"}, headers=auth_headers)).json()
+    second = (await client.post(url, json={"title": "Second"}, headers=auth_headers)).json()
+
+    # A task in someone else's project is reported as missing.
+    async with TestSessionLocal() as session:
+        other = User(email="other@example.com", hashed_password="x", full_name="Other User")
+        session.add(other)
+        await session.flush()
+        project = Project(name="Other", owner_id=other.id)
+        session.add(project)
+        await session.flush()
+        foreign = Task(title="Foreign", project_id=project.id, rank="a")
+        session.add(foreign)
+        await session.commit()
+
+    with count_statements() as statements:
+        response = await client.post(
+            "/tasks/multi-get",
+            json={"ids": [second["id"], "nope", first["id"], foreign.id, second["id"]]},
+            headers=auth_headers,
+        )
+    assert response.status_code == 200
+    # The current user, then the tasks.
+    assert len(statements) == 2
+    data = response.json()
+    assert [task["title"] for task in data["tasks"]] == ["Second", "First"]
+    assert data["tasks"][0]["rank"] == second["rank"]
+    assert data["missing"] == ["nope", foreign.id]
+
+    response = await client.post("/tasks/multi-get", json={"ids": ["x"] * 501}, headers=auth_headers)
+    assert response.status_code == 422
+    response = await client.post("/tasks/multi-get", json={"ids": [first["id"]]})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_bulk_move_tasks(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks"
+    target = (await client.post("/projects", json={"name": "Next sprint"}, headers=auth_headers)).json()
+    target_url = f"/projects/{target['id']}/tasks"
+    await client.post(target_url, json={"title": "Already there"}, headers=auth_headers)
+    for title, task_status in (("One", "todo"), ("Two", "in_progress"), ("Three", "done"), ("Four", "todo")):
+        await client.post(url, json={"title": title, "status": task_status}, headers=auth_headers)
+    cursor = (await client.get(f"{url}/changes", params={"since": "0"}, headers=auth_headers)).json()["cursor"]
+
+    response = await client.post(
+        f"{url}/bulk-move",
+        json={"target_project_id": target["id"], "filter": {"status": "todo,in_progress"}},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"affected": 3}
+
+    response = await client.get(url, headers=auth_headers)
+    assert [task["title"] for task in response.json()["tasks"]] == ["Three"]
+    # Appended after the target's tasks, in their old order.
+    response = await client.get(target_url, params={"sort_by": "rank", "order": "asc"}, headers=auth_headers)
+    assert [task["title"] for task in response.json()["tasks"]] == ["Already there", "One", "Two", "Four"]
+    # Fresh ranks of one length, short enough not to need a rebalance.
+    moved = [task["rank"] for task in response.json()["tasks"][1:]]
+    assert len({len(rank) for rank in moved}) == 1
+    assert len(moved[0]) <= get_settings().rank_rebalance_length
+
+    # The source's delta feed reports the moved tasks as deleted.
+    response = await client.get(f"{url}/changes", params={"since": cursor}, headers=auth_headers)
+    assert sorted(change["op"] for change in response.json()["changes"]) == ["delete"] * 3
+
+    response = await client.post(
+        f"{url}/bulk-move", json={"target_project_id": "elsewhere"}, headers=auth_headers,
+    )
+    assert response.status_code == 404
+    response = await client.post(
+        f"{url}/bulk-move", json={"target_project_id": test_project["id"]}, headers=auth_headers,
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_tasks(client: AsyncClient, auth_headers, test_project):
+    url = f"/projects/{test_project['id']}/tasks"
+    ids = []
+    for title, priority in (("One", "low"), ("Two", "low"), ("Three", "high")):
+        response = await client.post(url, json={"title": title, "priority": priority}, headers=auth_headers)
+        ids.append(response.json()["id"])
+
+    response = await client.post(
+        f"{url}/bulk-update", json={"filter": {"priority": "low"}, "status": "done"}, headers=auth_headers,
+    )
+    assert response.json() == {"affected": 2}
+    response = await client.post(
+        f"{url}/bulk-update", json={"filter": {"ids": ids[1:]}, "priority": "medium"}, headers=auth_headers,
+    )
+    assert response.json() == {"affected": 2}
+
+    response = await client.get(url, headers=auth_headers)
+    tasks = {task["title"]: (task["status"], task["priority"]) for task in response.json()["tasks"]}
+    assert tasks == {"One": ("done", "low"), "Two": ("done", "medium"), "Three": ("todo", "medium")}
+
+    response = await client.post(f"{url}/bulk-update", json={"filter": {}}, headers=auth_headers)
+    assert response.status_code == 422
+    response = await client.post(
+        f"{url}/bulk-update", json={"filter": {"status": "closed"}, "status": "done"}, headers=auth_headers,
+    )
+    assert response.status_code == 422
+    assert response.json()["details"][0]["field"] == "body -> filter -> status"
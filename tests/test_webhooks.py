@@ -0,0 +1,239 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import httpx
+import pytest
+import uvicorn
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from app.config import get_settings
+from app.models import OutboxEvent, WebhookDelivery
+from app.services.archive import archive_done_tasks
+from app.services.webhooks import dispatch_webhooks, post_batch, sign_payload
+from tests.conftest import TestSessionLocal
+
+
+class Receiver:
+    # Stand-in for a customer's webhook endpoint. Answers with the queued
+    # statuses (then 200) and records every request.
+    def __init__(self):
+        self.url = None
+        self.requests = []
+        self.statuses = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        self.requests.append(({k.decode(): v.decode() for k, v in scope["headers"]}, body))
+        status = self.statuses.pop(0) if self.statuses else 200
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    def events(self) -> list[dict]:
+        return [event for _, body in self.requests for event in json.loads(body)["events"]]
+
+
+class LocalServer(uvicorn.Server):
+    def install_signal_handlers(self) -> None:
+        pass
+
+
+@pytest.fixture
+async def receiver(monkeypatch):
+    # Loopback is refused as a webhook target unless allowed explicitly.
+    monkeypatch.setattr(get_settings(), "webhook_allowed_hosts", "127.0.0.1")
+    app = Receiver()
+    server = LocalServer(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", ws="none", log_config=None, access_log=False))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    app.url = f"http://127.0.0.1:{port}/hooks"
+    yield app
+    server.should_exit = True
+    await serving
+
+
+async def dispatch() -> int | None:
+    async with httpx.AsyncClient() as http:
+        return await dispatch_webhooks(TestSessionLocal, http, "test-dispatcher")
+
+
+async def pending_deliveries() -> list[WebhookDelivery]:
+    async with TestSessionLocal() as session:
+        return (await session.execute(select(WebhookDelivery).order_by(WebhookDelivery.id))).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_writes_append_outbox_events(client: AsyncClient, auth_headers, test_user):
+    project = (await client.post("/projects", json={"name": "Outbox"}, headers=auth_headers)).json()
+    url = f"/projects/{project['id']}/tasks"
+    task = (await client.post(url, json={"title": "Write"}, headers=auth_headers)).json()
+    await client.put(f"{url}/{task['id']}", json={"status": "done"}, headers=auth_headers)
+    await client.delete(f"{url}/{task['id']}", headers=auth_headers)
+    # Rejected writes leave nothing behind.
+    response = await client.post(url, json={"title": "Bad", "assignee_id": "nobody"}, headers=auth_headers)
+    assert response.status_code == 400
+
+    async with TestSessionLocal() as session:
+        events = (await session.execute(select(OutboxEvent).order_by(OutboxEvent.id))).scalars().all()
+    assert [event.event_type for event in events] == ["project.created", "task.created", "task.updated", "task.deleted"]
+    assert {event.owner_id for event in events} == {test_user.id}
+    assert json.loads(events[2].payload)["status"] == "done"
+
+    # Without an endpoint the events are dropped on fan-out.
+    assert await dispatch() == 0
+    async with TestSessionLocal() as session:
+        assert (await session.execute(select(OutboxEvent))).first() is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_writes_append_one_event_per_task(client: AsyncClient, auth_headers):
+    source = (await client.post("/projects", json={"name": "Source"}, headers=auth_headers)).json()
+    target = (await client.post("/projects", json={"name": "Target"}, headers=auth_headers)).json()
+    url = f"/projects/{source['id']}/tasks"
+    tasks = [(await client.post(url, json={"title": title}, headers=auth_headers)).json() for title in ("A", "B")]
+    ids = sorted(task["id"] for task in tasks)
+
+    async def events_since(after: int) -> list[dict]:
+        async with TestSessionLocal() as session:
+            result = await session.execute(select(OutboxEvent).where(OutboxEvent.id > after).order_by(OutboxEvent.id))
+            return [{"type": event.event_type, "project_id": event.project_id, **json.loads(event.payload)} for event in result.scalars()]
+
+    async def last_event_id() -> int:
+        async with TestSessionLocal() as session:
+            return (await session.execute(select(func.max(OutboxEvent.id)))).scalar()
+
+    mark = await last_event_id()
+    await client.post(f"{url}/bulk-update", json={"status": "done"}, headers=auth_headers)
+    events = await events_since(mark)
+    assert sorted(event["id"] for event in events) == ids
+    assert {(event["type"], event["project_id"], event["status"]) for event in events} == {("task.updated", source["id"], "done")}
+
+    mark = await last_event_id()
+    await client.post(f"{url}/bulk-move", json={"target_project_id": target["id"]}, headers=auth_headers)
+    events = await events_since(mark)
+    assert sorted(event["id"] for event in events) == ids
+    assert {(event["type"], event["project_id"], event["from_project_id"]) for event in events} == {
+        ("task.moved", target["id"], source["id"])
+    }
+
+    mark = await last_event_id()
+    copy = (await client.post(f"/projects/{target['id']}/duplicate", json={}, headers=auth_headers)).json()
+    events = await events_since(mark)
+    assert [event["type"] for event in events] == ["project.created", "task.created", "task.created"]
+    assert {event["project_id"] for event in events} == {copy["id"]}
+
+    mark = await last_event_id()
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    assert await archive_done_tasks(TestSessionLocal, future, 10) == 4
+    events = await events_since(mark)
+    assert [event["type"] for event in events] == ["task.archived"] * 4
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_batches_and_signs(client: AsyncClient, auth_headers, receiver, monkeypatch):
+    monkeypatch.setattr(get_settings(), "webhook_batch_size", 2)
+    monkeypatch.setattr(get_settings(), "webhook_endpoint_concurrency", 1)
+    response = await client.post("/webhooks", json={"url": receiver.url}, headers=auth_headers)
+    assert response.status_code == 201
+    secret = response.json()["secret"]
+    assert "secret" not in (await client.get("/webhooks", headers=auth_headers)).json()[0]
+
+    project = (await client.post("/projects", json={"name": "Hooks"}, headers=auth_headers)).json()
+    for title in ("One", "Two", "Three"):
+        await client.post(f"/projects/{project['id']}/tasks", json={"title": title}, headers=auth_headers)
+
+    assert await dispatch() == 4
+    assert len(receiver.requests) == 2
+    assert receiver.max_in_flight == 1
+    events = receiver.events()
+    assert [event["type"] for event in events] == ["project.created"] + ["task.created"] * 3
+    assert [event["data"]["title"] for event in events[1:]] == ["One", "Two", "Three"]
+    assert [event["id"] for event in events] == sorted(event["id"] for event in events)
+    for headers, body in receiver.requests:
+        assert headers["x-webhook-signature"] == sign_payload(secret, int(headers["x-webhook-timestamp"]), body)
+    assert await pending_deliveries() == []
+
+    assert await dispatch() == 0
+    assert len(receiver.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_deliveries_are_retried_then_given_up(client: AsyncClient, auth_headers, receiver, monkeypatch):
+    monkeypatch.setattr(get_settings(), "webhook_retry_base_seconds", 0.0)
+    monkeypatch.setattr(get_settings(), "webhook_max_attempts", 2)
+    await client.post("/webhooks", json={"url": receiver.url}, headers=auth_headers)
+
+    receiver.statuses = [500]
+    await client.post("/projects", json={"name": "Flaky"}, headers=auth_headers)
+    assert await dispatch() == 1
+    [delivery] = await pending_deliveries()
+    assert delivery.attempts == 1
+    assert delivery.last_error == "HTTP 500"
+    assert delivery.failed_at is None
+    assert await dispatch() == 1
+    assert await pending_deliveries() == []
+    assert receiver.events()[0]["id"] == receiver.events()[1]["id"]
+
+    receiver.statuses = [502, 502]
+    await client.post("/projects", json={"name": "Down"}, headers=auth_headers)
+    await dispatch()
+    await dispatch()
+    [delivery] = await pending_deliveries()
+    assert delivery.attempts == 2
+    assert delivery.failed_at is not None
+    # Given up: no more attempts.
+    assert await dispatch() == 0
+    assert len(receiver.requests) == 4
+
+    response = await client.post("/webhooks", json={"url": "ftp://example.com"}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_private_targets_are_refused(client: AsyncClient, auth_headers, receiver, monkeypatch):
+    for url in ("http://localhost:8080/", "http://10.0.0.1/", "http://169.254.169.254/latest", "http://[::1]/"):
+        response = await client.post("/webhooks", json={"url": url}, headers=auth_headers)
+        assert response.status_code == 400, url
+
+    # Checked again on delivery, in case the host now resolves elsewhere.
+    assert (await client.post("/webhooks", json={"url": receiver.url}, headers=auth_headers)).status_code == 201
+    monkeypatch.setattr(get_settings(), "webhook_allowed_hosts", "")
+    await client.post("/projects", json={"name": "Internal"}, headers=auth_headers)
+    assert await dispatch() == 1
+    assert receiver.requests == []
+    [delivery] = await pending_deliveries()
+    assert delivery.last_error == "127.0.0.1 resolves to a non-public address"
+
+
+@pytest.mark.asyncio
+async def test_delivery_connects_to_the_checked_address():
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(204)
+
+    row = SimpleNamespace(
+        event_id=1, event_type="project.created", project_id="p", created_at=datetime.now(timezone.utc), payload="{}",
+    )
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        error = await post_batch(http, "https://hooks.example.com:8443/in?x=1", "s", [row], address="93.184.216.34")
+    assert error is None
+    # No second lookup that could be rebound: the URL carries the address,
+    # Host and SNI still name the original host.
+    [request] = sent
+    assert str(request.url) == "https://93.184.216.34:8443/in?x=1"
+    assert request.headers["host"] == "hooks.example.com:8443"
+    assert request.extensions["sni_hostname"] == "hooks.example.com"